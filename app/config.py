@@ -8,10 +8,109 @@ class Settings:
         # Load .env once when settings are first constructed
         load_dotenv(override=False)
         self.database_url: str = os.getenv("DATABASE_URL", "sqlite:///./ats.db")
+        # Async mode serves the auth/jobs/resumes/matching routes from an AsyncEngine (aiosqlite/asyncpg).
+        # ASYNC_DATABASE_URL defaults to DATABASE_URL with the async driver swapped in.
+        self.db_async: bool = os.getenv("DB_ASYNC", "false").lower() in {"1", "true", "yes"}
+        self.async_database_url: str = os.getenv("ASYNC_DATABASE_URL", "")
+        self.db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        self.db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        self.db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in {"1", "true", "yes"}
+        self.sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        # Schema migrations are a deploy step (`python -m app.migrations`); an outdated database refuses to start.
+        # AUTO_MIGRATE=true applies pending migrations at startup instead (single-process development setups).
+        self.auto_migrate: bool = os.getenv("AUTO_MIGRATE", "false").lower() in {"1", "true", "yes"}
         self.jwt_secret: str = os.getenv("JWT_SECRET", "change_me")
         self.jwt_algorithm: str = os.getenv("JWT_ALGORITHM", "HS256")
         self.access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+        # Authenticated principals cached per token; 0 disables the cache
+        self.auth_cache_size: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+        self.auth_cache_ttl_seconds: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+        # Password hashing runs on its own bounded pool; calls beyond workers + queue get a 503.
+        # API_THREADS sizes the threadpool that serves everything else (sync routes, file I/O).
+        self.bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+        self.password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+        self.password_hash_queue: int = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+        self.api_threads: int = int(os.getenv("API_THREADS", "40"))
+        # /auth/login token buckets: `burst` attempts up front, refilled at `per minute`; 0 disables
+        self.login_ip_burst: int = int(os.getenv("LOGIN_IP_BURST", "20"))
+        self.login_ip_per_minute: float = float(os.getenv("LOGIN_IP_PER_MINUTE", "60"))
+        self.login_account_burst: int = int(os.getenv("LOGIN_ACCOUNT_BURST", "5"))
+        self.login_account_per_minute: float = float(os.getenv("LOGIN_ACCOUNT_PER_MINUTE", "6"))
+        # Blob storage for uploads and extracted text: "local" (STORAGE_DIR, sharded into nested
+        # directories by hash prefix) or "s3" (any S3-compatible service; credentials from the usual AWS_* variables).
+        # STORAGE_DIR is also the local spool for uploads in flight.
         self.storage_dir: str = os.getenv("STORAGE_DIR", "storage")
+        self.storage_backend: str = os.getenv("STORAGE_BACKEND", "local").lower()
+        self.storage_shard_depth: int = int(os.getenv("STORAGE_SHARD_DEPTH", "2"))
+        self.s3_bucket: str = os.getenv("S3_BUCKET", "")
+        self.s3_prefix: str = os.getenv("S3_PREFIX", "")
+        self.s3_endpoint_url: str = os.getenv("S3_ENDPOINT_URL", "")
+        self.s3_region: str = os.getenv("S3_REGION", "")
+        # Compression for the extracted-text artifact kept with each blob: "none", "gzip" or "zstd" (needs zstandard)
+        self.text_compression: str = os.getenv("TEXT_COMPRESSION", "none").lower()
+        # Resume parsing pipeline: "inprocess" runs the worker inside the API process,
+        # "external" leaves it to `python -m app.worker`
+        self.parse_worker_mode: str = os.getenv("PARSE_WORKER_MODE", "inprocess").lower()
+        self.parse_workers: int = int(os.getenv("PARSE_WORKERS", "2"))
+        self.parse_queue_max: int = int(os.getenv("PARSE_QUEUE_MAX", "10000"))
+        self.parse_max_attempts: int = int(os.getenv("PARSE_MAX_ATTEMPTS", "3"))
+        self.parse_poll_interval: float = float(os.getenv("PARSE_POLL_INTERVAL", "0.5"))
+        self.parse_stale_after_seconds: int = int(os.getenv("PARSE_STALE_AFTER_SECONDS", "600"))
+        # Per-file parse budgets; a file that blows the time or memory budget fails with that reason,
+        # one that hits the page/character budget is kept truncated. 0 disables a limit.
+        self.parse_max_pages: int = int(os.getenv("PARSE_MAX_PAGES", "50"))
+        self.parse_max_chars: int = int(os.getenv("PARSE_MAX_CHARS", "200000"))
+        self.parse_timeout_seconds: float = float(os.getenv("PARSE_TIMEOUT_SECONDS", "30"))
+        self.parse_memory_mb: int = int(os.getenv("PARSE_MEMORY_MB", "1024"))
+        # Materialized match scores: pairs scored per batch, and how often the score worker polls for tasks
+        self.score_batch_size: int = int(os.getenv("SCORE_BATCH_SIZE", "1000"))
+        self.score_poll_interval: float = float(os.getenv("SCORE_POLL_INTERVAL", "1.0"))
+        self.score_stale_after_seconds: int = int(os.getenv("SCORE_STALE_AFTER_SECONDS", "600"))
+        # Pair score cache: in-process LRU capped at this many bytes (0 disables), optionally backed by a
+        # SQLite file shared by every worker process on the host
+        self.match_cache_max_bytes: int = int(os.getenv("MATCH_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+        self.match_cache_shared_path: str = os.getenv("MATCH_CACHE_SHARED_PATH", "")
+        self.match_cache_shared_max_entries: int = int(os.getenv("MATCH_CACHE_SHARED_MAX_ENTRIES", "1000000"))
+        # Corpus snapshot: resume features as flat arrays in one file under STORAGE_DIR that every process on the
+        # host maps read-only. Rebuilt once MIN_CHANGES resumes are stale, or when older than MAX_AGE_SECONDS
+        # and anything is stale; checked every POLL_INTERVAL seconds by the worker.
+        self.corpus_snapshot: bool = os.getenv("CORPUS_SNAPSHOT", "true").lower() in {"1", "true", "yes"}
+        self.corpus_snapshot_min_changes: int = int(os.getenv("CORPUS_SNAPSHOT_MIN_CHANGES", "1000"))
+        self.corpus_snapshot_max_age_seconds: float = float(os.getenv("CORPUS_SNAPSHOT_MAX_AGE_SECONDS", "300"))
+        self.corpus_snapshot_poll_interval: float = float(os.getenv("CORPUS_SNAPSHOT_POLL_INTERVAL", "10"))
+        # Response compression (br when brotli is installed, else gzip) above a size threshold
+        self.compression_enabled: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() in {"1", "true", "yes"}
+        self.compression_min_bytes: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+        self.gzip_level: int = int(os.getenv("GZIP_LEVEL", "6"))
+        self.brotli_quality: int = int(os.getenv("BROTLI_QUALITY", "4"))
+        # Observability: Prometheus text on GET /metrics (and on METRICS_PORT for `python -m app.worker`),
+        # plus `?profile=1` stack sampling for the listed admin accounts when PROFILE_ENABLED is set
+        self.metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() in {"1", "true", "yes"}
+        self.metrics_port: int = int(os.getenv("METRICS_PORT", "0"))
+        self.profile_enabled: bool = os.getenv("PROFILE_ENABLED", "false").lower() in {"1", "true", "yes"}
+        self.profile_interval_ms: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+        self.admin_emails: list[str] = [e.strip() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()]
+        # Skill taxonomy (JSON/CSV); empty means the bundled app/data/skills.json
+        self.skills_taxonomy_path: str = os.getenv("SKILLS_TAXONOMY_PATH", "")
+        self.skills_reload_seconds: float = float(os.getenv("SKILLS_RELOAD_SECONDS", "30"))
+        # Streaming and resumable uploads: size cap per file, and how long an idle resumable upload is kept
+        self.upload_max_bytes: int = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+        self.upload_session_ttl_seconds: int = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600)))
+        # Parse status events (GET /resumes/events). "local" fans out inside one process, which is enough when
+        # the parse worker runs in the API process; "database" relays through the parse_events table so an
+        # external worker or several API processes can publish and subscribe
+        default_events = "local" if self.parse_worker_mode == "inprocess" else "database"
+        self.events_backend: str = os.getenv("EVENTS_BACKEND", default_events).lower()
+        self.events_poll_interval: float = float(os.getenv("EVENTS_POLL_INTERVAL", "0.5"))
+        self.events_retention_seconds: int = int(os.getenv("EVENTS_RETENTION_SECONDS", "3600"))
+        self.events_heartbeat_seconds: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+        # Near-duplicate detection: estimated Jaccard similarity of word shingles at which two resumes count as copies
+        self.dedup_threshold: float = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+        # Bulk ingestion (multi-file form or ZIP archives)
+        self.bulk_max_files: int = int(os.getenv("BULK_MAX_FILES", "1000"))
+        self.bulk_max_member_bytes: int = int(os.getenv("BULK_MAX_MEMBER_BYTES", str(20 * 1024 * 1024)))
 
 
 @lru_cache
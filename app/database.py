@@ -1,19 +1,85 @@
-from typing import Generator
+from typing import AsyncGenerator, Callable, Generator, Optional, TypeVar
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import anyio
+from sqlalchemy import Insert, create_engine, event, insert
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .config import get_settings
+from .utils.metrics import instrument_engine
 
 
 settings = get_settings()
+T = TypeVar("T")
+
+# Async drivers used when ASYNC_DATABASE_URL is not given explicitly
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def _pool_args(url: str) -> dict:
+    backend = make_url(url).get_backend_name()
+    # In-memory SQLite lives in a single connection; there is no pool to size
+    if backend == "sqlite" and make_url(url).database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    # WAL lets readers run alongside the single writer; busy_timeout makes writers wait instead of
+    # failing with "database is locked"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _configure(sync_engine: Engine) -> None:
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _sqlite_pragmas)
+    if settings.metrics_enabled:
+        instrument_engine(sync_engine)
+
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.get_driver_name() == driver:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
 
 # SQLite needs check_same_thread=False when used in single-threaded dev servers
 connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
 
-engine = create_engine(settings.database_url, echo=False, future=True, connect_args=connect_args)
+engine = create_engine(
+    settings.database_url, echo=False, future=True, connect_args=connect_args, **_pool_args(settings.database_url)
+)
+_configure(engine)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
 
+# Only built in async mode so the async driver stays an optional dependency
+async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+if settings.db_async:
+    _async_database_url = settings.async_database_url or async_url(settings.database_url)
+    _async_pool_args = _pool_args(_async_database_url)
+    if _async_pool_args and make_url(_async_database_url).get_backend_name() == "sqlite":
+        # aiosqlite defaults to NullPool (a new connection, and pragma round-trip, per checkout)
+        _async_pool_args["poolclass"] = AsyncAdaptedQueuePool
+    async_engine = create_async_engine(_async_database_url, echo=False, **_async_pool_args)
+    _configure(async_engine.sync_engine)
+    # expire_on_commit=False: attributes stay loaded after commit, since lazy loads cannot run under await
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -25,3 +91,32 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_in_session(fn: Callable[..., T], *args) -> T:
+    # For async routes that reuse CPU-heavy sync service code (scoring, ranking, dedup): runs fn(db, *args)
+    # on a worker thread with its own sync session, so the event loop keeps serving other requests.
+    # The session sees committed data only; anything that must join the caller's transaction uses run_sync.
+    def _run() -> T:
+        with SessionLocal() as db:
+            return fn(db, *args)
+
+    return await anyio.to_thread.run_sync(_run)
+
+
+def insert_ignore(db: Session, model) -> Insert:
+    # INSERT that silently skips rows violating a unique constraint (ON CONFLICT DO NOTHING)
+    # Dialect modules are imported here: the postgresql one alone costs tens of ms at startup
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects import sqlite
+
+        return sqlite.insert(model).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        from sqlalchemy.dialects import postgresql
+
+        return postgresql.insert(model).on_conflict_do_nothing()
+    return insert(model)
@@ -1,14 +1,30 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import RedirectResponse
+from starlette.responses import RedirectResponse, Response
 import os
 
+import anyio
+
 from .config import get_settings
-from .database import Base, engine
+from . import migrations
+from .database import SessionLocal, async_engine, engine
+from .services.score_service import pair_cache
+from .services.feature_service import warm_index
+from .services.index_service import resume_index
+from .services import parse_service, score_service
+from .utils import metrics
+from .utils.compression import CompressionMiddleware
+from .utils.http_cache import CachedStaticFiles
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.profiler import ProfilerMiddleware
+from .utils.security import principal_cache, principal_from_header
+from .worker import ParseWorker, ScoreWorker, SnapshotWorker
 
 
 settings = get_settings()
+parse_worker = ParseWorker()
+score_worker = ScoreWorker()
+snapshot_worker = SnapshotWorker()
 
 app = FastAPI(title="ATS-lite", version="0.1.0")
 
@@ -18,16 +34,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
+if settings.profile_enabled:
+    app.add_middleware(
+        ProfilerMiddleware,
+        admin_emails=settings.admin_emails,
+        interval=settings.profile_interval_ms / 1000,
+        resolve_principal=principal_from_header,
+    )
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_bytes,
+        gzip_level=settings.gzip_level,
+        brotli_quality=settings.brotli_quality,
+    )
+if settings.metrics_enabled:
+    # Added last so it is outermost and times everything, including CORS and profiling
+    app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.on_event("startup")
+async def size_threadpool() -> None:
+    # Threads for sync routes and file I/O; password hashing has its own pool (utils.security)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = max(settings.api_threads, 1)
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
+    # Schema changes and one-off backfills are versioned migrations: when the schema is current this costs
+    # two small queries, not a create_all inspection of every table
+    migrations.ensure(engine)
+    db = SessionLocal()
+    try:
+        warm_index(db)
+    finally:
+        db.close()
+    if settings.parse_worker_mode == "inprocess":
+        parse_worker.start()
+        score_worker.start()
+        snapshot_worker.start()
 
-app.mount("/app", StaticFiles(directory="app/frontend", html=True), name="frontend")
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    parse_worker.stop(timeout=5)
+    score_worker.stop(timeout=5)
+    snapshot_worker.stop(timeout=5)
+    if async_engine is not None:
+        await async_engine.dispose()
+
+app.mount("/app", CachedStaticFiles(directory="app/frontend", html=True), name="frontend")
 if os.path.isdir("frontend/dist"):
-    app.mount("/ui", StaticFiles(directory="frontend/dist", html=True), name="react-ui")
+    app.mount("/ui", CachedStaticFiles(directory="frontend/dist", html=True), name="react-ui")
 
 # Ensure /ui (no trailing slash) loads correctly
 @app.get("/ui")
@@ -37,13 +97,45 @@ def _ui_redirect() -> RedirectResponse:
 
 @app.get("/health")
 def health() -> dict:
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "principal_cache": principal_cache.stats(),
+        "match_cache": pair_cache.stats(),
+        "corpus": resume_index.stats(),
+    }
+
+
+def _count(fn) -> int:
+    db = SessionLocal()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+metrics.registry.gauge("parse_queue_depth", "Parse jobs queued or running.", lambda: _count(parse_service.queue_depth))
+metrics.registry.gauge("score_queue_depth", "Match score recompute tasks pending.", lambda: _count(score_service.queue_depth))
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> Response:
+    if not settings.metrics_enabled:
+        return Response(status_code=404)
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 
+from .routers import events, skills, uploads
 
-from .routers import auth, jobs, resumes, matching
+if settings.db_async:
+    from .routers.aio import auth, jobs, resumes, matching
+else:
+    from .routers import auth, jobs, resumes, matching
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 app.include_router(resumes.router, prefix="/resumes", tags=["resumes"])
+app.include_router(uploads.router, prefix="/resumes", tags=["resumes"])
+app.include_router(events.router, prefix="/resumes", tags=["resumes"])
 app.include_router(matching.router, prefix="/matching", tags=["matching"])
+app.include_router(skills.router, prefix="/skills", tags=["skills"])
 
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    func,
+    insert,
+    inspect,
+    select,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import get_settings
+from .database import engine
+from .services import search_service
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# One row per applied migration. Kept off Base.metadata so no create_all ever touches it.
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Arbitrary key for the Postgres advisory lock that serializes concurrent upgrades
+_LOCK_KEY = 7305118
+
+
+# The schema as version 1 created it, frozen here so the migration means the same thing however the models
+# change later. Later migrations alter it step by step; the models must end up matching the latest one.
+_v1 = MetaData()
+Table(
+    "users",
+    _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String(255), nullable=False, index=True),
+    Column("password_hash", String(255), nullable=False),
+    Column("full_name", String(255), nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    UniqueConstraint("email", name="uq_users_email"),
+)
+Table(
+    "jobs",
+    _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String(255), nullable=False),
+    Column("description", Text, nullable=False),
+    Column("skills", JSON, nullable=True),
+    Column("version", Integer, server_default="1", nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+Table(
+    "blobs",
+    _v1,
+    Column("sha256", String(64), primary_key=True),
+    Column("filename", String(512), nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("ref_count", Integer, nullable=False),
+    Column("content_text", Text, nullable=True),
+    Column("text_key", String(128), nullable=True),
+    Column("skills", JSON, nullable=True),
+    Column("parse_status", String(16), nullable=True),
+    Column("parse_detail", String(512), nullable=True),
+    Column("parsed_at", DateTime, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+)
+Table(
+    "resumes",
+    _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("filename", String(512), nullable=False),
+    Column("content_text", Text, nullable=True),
+    Column("skills", JSON, nullable=True),
+    Column("parsed", Boolean, nullable=False),
+    Column("parse_status", String(16), nullable=True),
+    Column("parse_detail", String(512), nullable=True),
+    Column("blob_sha256", ForeignKey("blobs.sha256"), nullable=True, index=True),
+    Column("version", Integer, server_default="1", nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_resumes_user_id_id", "user_id", "id"),
+)
+Table(
+    "terms",
+    _v1,
+    Column("id", Integer, primary_key=True),
+    Column("term", String(255), nullable=False),
+    UniqueConstraint("term", name="uq_terms_term"),
+)
+Table(
+    "resume_features",
+    _v1,
+    Column("resume_id", ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True),
+    Column("term_ids", LargeBinary, nullable=False),
+    Column("term_counts", LargeBinary, nullable=False),
+    Column("skills", JSON, nullable=True),
+    Column("minhash", LargeBinary, nullable=True),
+    Column("updated_at", DateTime, nullable=False, index=True),
+)
+Table(
+    "job_features",
+    _v1,
+    Column("job_id", ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True),
+    Column("term_ids", LargeBinary, nullable=False),
+    Column("term_counts", LargeBinary, nullable=False),
+    Column("skills", JSON, nullable=True),
+    Column("updated_at", DateTime, nullable=False, index=True),
+)
+Table(
+    "resume_skills",
+    _v1,
+    Column("resume_id", ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True),
+    Column("skill", String(255), primary_key=True),
+    Index("ix_resume_skills_skill_resume_id", "skill", "resume_id"),
+)
+Table(
+    "job_skills",
+    _v1,
+    Column("job_id", ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True),
+    Column("skill", String(255), primary_key=True),
+    Index("ix_job_skills_skill_job_id", "skill", "job_id"),
+)
+Table(
+    "resume_bands",
+    _v1,
+    Column("resume_id", ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True),
+    Column("band", Integer, primary_key=True),
+    Column("bucket", BigInteger, nullable=False),
+    Index("ix_resume_bands_band_bucket", "band", "bucket"),
+)
+Table(
+    "match_scores",
+    _v1,
+    Column("job_id", ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True),
+    Column("resume_id", ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True),
+    Column("scorer_version", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("score", Float, nullable=False),
+    Column("computed_at", DateTime, nullable=False),
+    Index("ix_match_scores_job_user_version_score", "job_id", "user_id", "scorer_version", "score"),
+    Index("ix_match_scores_resume_id", "resume_id"),
+)
+Table(
+    "score_tasks",
+    _v1,
+    Column("id", Integer, primary_key=True),
+    Column("kind", String(16), nullable=False),
+    Column("target_id", Integer, nullable=False),
+    Column("scorer_version", Integer, nullable=False),
+    Column("enqueued_at", DateTime, nullable=False),
+    Column("started_at", DateTime, nullable=True),
+    UniqueConstraint("kind", "target_id", "scorer_version", name="uq_score_tasks_target"),
+)
+Table(
+    "scorer_versions",
+    _v1,
+    Column("version", Integer, primary_key=True),
+    Column("state", String(16), nullable=False),
+    Column("started_at", DateTime, nullable=False),
+    Column("activated_at", DateTime, nullable=True),
+)
+Table(
+    "parse_jobs",
+    _v1,
+    Column("id", Integer, primary_key=True),
+    Column("resume_id", ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("path", String(1024), nullable=False),
+    Column("status", String(16), nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("last_error", Text, nullable=True),
+    Column("enqueued_at", DateTime, nullable=False),
+    Column("started_at", DateTime, nullable=True),
+    Column("finished_at", DateTime, nullable=True),
+    Index("ix_parse_jobs_status_id", "status", "id"),
+)
+Table(
+    "upload_sessions",
+    _v1,
+    Column("id", String(32), primary_key=True),
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("filename", String(512), nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("offset", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+Table(
+    "parse_events",
+    _v1,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("resume_id", Integer, nullable=False),
+    Column("status", String(16), nullable=False),
+    Column("detail", String(512), nullable=True),
+    Column("created_at", DateTime, nullable=False, index=True),
+    Index("ix_parse_events_user_id_id", "user_id", "id"),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def _add_column(conn: Connection, table: str, col: Column) -> None:
+    # Adopted databases may already have the column, so migrations check before changing anything
+    if col.name in {c["name"] for c in inspect(conn).get_columns(table)}:
+        return
+    ddl = f"ALTER TABLE {table} ADD COLUMN {col.name} {col.type.compile(conn.dialect)}"
+    if col.server_default is not None:
+        ddl += f" DEFAULT {col.server_default.arg}"
+    if not col.nullable:
+        ddl += " NOT NULL"
+    conn.exec_driver_sql(ddl)
+
+
+def _initial_schema(conn: Connection) -> None:
+    # Creates whatever tables are missing, so databases made by create_all at startup are adopted as they are
+    _v1.create_all(conn)
+    search_service.create_search_indexes(_v1, conn)
+
+
+def _pre_migration_columns(conn: Connection) -> None:
+    # Columns added to existing tables while the schema was still managed by create_all, which never
+    # altered a table. Foreign keys are not added after the fact (SQLite cannot), only the columns.
+    for table, column in (
+        ("jobs", "version"),
+        ("resumes", "blob_sha256"),
+        ("resumes", "parse_status"),
+        ("resumes", "parse_detail"),
+        ("resumes", "version"),
+        ("blobs", "parse_status"),
+        ("blobs", "parse_detail"),
+        ("blobs", "text_key"),
+        ("resume_features", "minhash"),
+    ):
+        _add_column(conn, table, _v1.tables[table].c[column])
+    # Version 1 indexes missing from tables that create_all made before those indexes existed
+    for table in _v1.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _backfill_features(conn: Connection) -> None:
+    # Feature rows, skill links and MinHash bands for rows written before those existed; this used to
+    # run on every startup
+    from .services.feature_service import backfill
+
+    with Session(bind=conn) as db:
+        backfill(db)
+
+
+def _updated_at(conn: Connection) -> None:
+    # Version stamps for HTTP ETags on the job and resume listings
+    for table in ("jobs", "resumes"):
+        _add_column(conn, table, Column("updated_at", DateTime, nullable=True))
+        conn.exec_driver_sql(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_jobs_updated_at ON jobs (updated_at)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_resumes_user_id_updated_at ON resumes (user_id, updated_at)")
+
+
+# Append only. A new migration takes the next version, and an applied one is never edited.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial schema", _initial_schema),
+    Migration(2, "columns added before versioned migrations", _pre_migration_columns),
+    Migration(3, "backfill features, skills and signatures", _backfill_features),
+    Migration(4, "updated_at on jobs and resumes", _updated_at),
+]
+LATEST = MIGRATIONS[-1].version
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    return conn.scalar(select(func.max(schema_migrations.c.version))) or 0
+
+
+def _lock(conn: Connection) -> None:
+    # Two processes upgrading at once take turns on Postgres. Other backends rely on migrations being
+    # idempotent: the loser of a race re-applies, then hits the version row the winner recorded and
+    # rolls back (see upgrade).
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_LOCK_KEY})")
+
+
+def upgrade(bind: Engine = engine) -> List[int]:
+    # Applies pending migrations, each in its own transaction, and returns the versions this call applied
+    with bind.begin() as conn:
+        _metadata.create_all(conn)
+    applied = []
+    for migration in MIGRATIONS:
+        try:
+            with bind.begin() as conn:
+                _lock(conn)
+                done = conn.scalar(
+                    select(schema_migrations.c.version).where(schema_migrations.c.version == migration.version)
+                )
+                if done is not None:
+                    continue
+                logger.info("Applying migration %s: %s", migration.version, migration.name)
+                migration.apply(conn)
+                conn.execute(
+                    insert(schema_migrations).values(
+                        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                    )
+                )
+        except IntegrityError:
+            # Another process recorded this version first and its transaction is the one that counts;
+            # any other constraint failure is a real error
+            with bind.connect() as conn:
+                if current_version(conn) < migration.version:
+                    raise
+            logger.info("Migration %s was applied concurrently", migration.version)
+            continue
+        applied.append(migration.version)
+    return applied
+
+
+def ensure(bind: Engine = engine) -> None:
+    # Startup check: two cheap queries when the schema is current. With AUTO_MIGRATE off, an outdated
+    # database stops the process instead of being changed under running peers.
+    with bind.connect() as conn:
+        version = current_version(conn)
+    if version >= LATEST:
+        return
+    if not settings.auto_migrate:
+        raise RuntimeError(f"Database schema is at version {version}, this build needs {LATEST}: run `python -m app.migrations`")
+    upgrade(bind)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bring the database schema up to date")
+    parser.add_argument("--check", action="store_true", help="only report; exit 1 if migrations are pending")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if args.check:
+        print(f"schema version {version}, latest {LATEST}")
+        sys.exit(0 if version >= LATEST else 1)
+    applied = upgrade(engine)
+    print(f"applied {applied}" if applied else f"schema is current (version {version})")
+
+
+if __name__ == "__main__":
+    main()
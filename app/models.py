@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text, UniqueConstraint
 from sqlalchemy import JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -30,20 +30,218 @@ class Job(Base):
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     skills: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    # Bumped on every edit; part of the match cache key
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Set on every write, ORM or Core; with count and max(id) it stamps the listing for ETags.
+    # Nullable only because it was added to existing tables (migration 4 fills it).
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True, index=True
+    )
+
+    features: Mapped[Optional[JobFeatures]] = relationship("JobFeatures", uselist=False, cascade="all, delete-orphan")
+    skill_rows: Mapped[List[JobSkill]] = relationship("JobSkill", cascade="all, delete-orphan")
 
 
 class Resume(Base):
     __tablename__ = "resumes"
+    # Per-user listings walk the first index newest-first (keyset pagination); the second answers the
+    # listing's ETag stamp (count, max id, max updated_at) without touching the table
+    __table_args__ = (
+        Index("ix_resumes_user_id_id", "user_id", "id"),
+        Index("ix_resumes_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Indexed through ix_resumes_user_id_id
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     filename: Mapped[str] = mapped_column(String(512), nullable=False)
-    content_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Deferred: only parsing and feature extraction need the text, never a listing or lookup
+    content_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
     skills: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
     parsed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # "parsed", "truncated" (a page/character budget was hit) or "failed"; detail says why
+    parse_status: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    parse_detail: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    blob_sha256: Mapped[Optional[str]] = mapped_column(ForeignKey("blobs.sha256"), nullable=True, index=True)
+    # Bumped when parsing completes; part of the match cache key
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Set on every write, including parse failures recorded with a Core UPDATE (see Job.updated_at)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True
+    )
 
     user: Mapped[User] = relationship("User", back_populates="resumes")
+    features: Mapped[Optional[ResumeFeatures]] = relationship("ResumeFeatures", uselist=False, cascade="all, delete-orphan")
+    parse_jobs: Mapped[List[ParseJob]] = relationship("ParseJob", cascade="all, delete-orphan")
+    skill_rows: Mapped[List[ResumeSkill]] = relationship("ResumeSkill", cascade="all, delete-orphan")
+    band_rows: Mapped[List[ResumeBand]] = relationship("ResumeBand", cascade="all, delete-orphan")
+
+
+# A stored upload, addressed by content hash and shared by every resume with identical bytes.
+# Also caches the parse result so re-uploads never hit the parsers again.
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    filename: Mapped[str] = mapped_column(String(512), nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Cached text lives in the blob store under text_key (optionally compressed); content_text is only
+    # set on rows cached before that
+    content_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    text_key: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    skills: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    parse_status: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    parse_detail: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    parsed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Term(Base):
+    __tablename__ = "terms"
+    __table_args__ = (UniqueConstraint("term", name="uq_terms_term"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    term: Mapped[str] = mapped_column(String(255), nullable=False)
+
+
+# Precomputed scoring features: sorted term ids and their counts packed as uint32 arrays,
+# plus the normalized skill set. Written at parse time and on job create/update.
+class ResumeFeatures(Base):
+    __tablename__ = "resume_features"
+
+    resume_id: Mapped[int] = mapped_column(ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+    term_ids: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    term_counts: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    skills: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    # MinHash signature of the text's word shingles (uint32 array); null for empty text
+    minhash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class JobFeatures(Base):
+    __tablename__ = "job_features"
+
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    term_ids: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    term_counts: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    skills: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+# Normalized skills, one row per (owner, skill), so skill filters are index lookups instead of scans
+# over the JSON columns. Rewritten together with the feature rows.
+class ResumeSkill(Base):
+    __tablename__ = "resume_skills"
+    __table_args__ = (Index("ix_resume_skills_skill_resume_id", "skill", "resume_id"),)
+
+    resume_id: Mapped[int] = mapped_column(ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+    skill: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+
+class JobSkill(Base):
+    __tablename__ = "job_skills"
+    __table_args__ = (Index("ix_job_skills_skill_job_id", "skill", "job_id"),)
+
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    skill: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+
+# LSH buckets of each resume's MinHash signature, one row per band. Resumes sharing a bucket in any band
+# are near-duplicate candidates, found by index lookups instead of comparing every pair.
+class ResumeBand(Base):
+    __tablename__ = "resume_bands"
+    __table_args__ = (Index("ix_resume_bands_band_bucket", "band", "bucket"),)
+
+    resume_id: Mapped[int] = mapped_column(ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+    band: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bucket: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+# Materialized resume/job scores, one row per pair and scorer version. user_id is copied from the resume
+# so "best candidates for this job" is a single index range scan.
+class MatchScore(Base):
+    __tablename__ = "match_scores"
+    __table_args__ = (
+        Index("ix_match_scores_job_user_version_score", "job_id", "user_id", "scorer_version", "score"),
+        Index("ix_match_scores_resume_id", "resume_id"),
+    )
+
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    resume_id: Mapped[int] = mapped_column(ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+    scorer_version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Pending recomputes: score one resume against every job, or one job against every parsed resume.
+# started_at is the claim; a claim older than the stale timeout can be taken over.
+class ScoreTask(Base):
+    __tablename__ = "score_tasks"
+    __table_args__ = (UniqueConstraint("kind", "target_id", "scorer_version", name="uq_score_tasks_target"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    target_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    scorer_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+# One row per scorer version: "building" while its backfill runs, then "active". Reads use the newest
+# active version, so a scoring change never mixes old and new scores in one result.
+class ScorerVersion(Base):
+    __tablename__ = "scorer_versions"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    state: Mapped[str] = mapped_column(String(16), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    activated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class ParseJob(Base):
+    __tablename__ = "parse_jobs"
+    __table_args__ = (Index("ix_parse_jobs_status_id", "status", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    resume_id: Mapped[int] = mapped_column(ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Blob store key of the file (absolute paths on jobs queued before the blob store)
+    path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    # queued -> running -> done | failed (running goes back to queued while attempts remain)
+    status: Mapped[str] = mapped_column(String(16), default="queued", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+# A resumable upload in progress: bytes land in STORAGE_DIR/.partial/<id> and `offset` is how many of
+# them are durable. The client resumes from `offset` after a dropped connection.
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename: Mapped[str] = mapped_column(String(512), nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    offset: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
 
+# Parse state transitions, kept for a while so API processes other than the one that published them
+# can fan them out (EVENTS_BACKEND=database) and reconnecting clients can catch up via Last-Event-ID.
+class ParseEvent(Base):
+    __tablename__ = "parse_events"
+    __table_args__ = (Index("ix_parse_events_user_id_id", "user_id", "id"),)
 
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    resume_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    detail: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -1,19 +1,29 @@
 from __future__ import annotations
 
 import re
-from typing import List
+from typing import Iterable, List, Optional
 
-# Lightweight fallback NLP: regex-based skill extraction and simple overlap-based similarity.
+from .taxonomy import skill_registry
 
-SKILL_PATTERN = re.compile(
-    r"\b(python|java|c\+\+|sql|aws|docker|kubernetes|react|node|fastapi|nlp|ml|pandas|numpy|scikit-learn|tensorflow|pytorch)\b",
-    re.I,
-)
+# Lightweight fallback NLP: taxonomy-based skill extraction and simple overlap-based similarity.
+
+TOKEN_PATTERN = re.compile(r"[a-zA-Z\+#\.]+")
+
+TEXT_WEIGHT = 0.6
+SKILL_WEIGHT = 0.4
 
 
 def extract_skills(text: str) -> List[str]:
-    skills = {m.lower() for m in SKILL_PATTERN.findall(text or "")}
-    return sorted(skills)
+    return skill_registry.matcher().extract(text)
+
+
+def canonical_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    matcher = skill_registry.matcher()
+    return sorted({matcher.canonical(s) for s in skills or [] if s and s.strip()})
+
+
+def tokenize(text: str) -> List[str]:
+    return [w.lower() for w in TOKEN_PATTERN.findall(text or "")]
 
 
 def _jaccard(a: set[str], b: set[str]) -> float:
@@ -24,12 +34,11 @@ def _jaccard(a: set[str], b: set[str]) -> float:
 
 def match_score(resume_text: str, resume_skills: List[str], jd_text: str, jd_skills: List[str]) -> float:
     # Simple text overlap proxy: count shared keywords from the skill list present in the texts
-    resume_words = set([w.lower() for w in re.findall(r"[a-zA-Z\+#\.]+", resume_text or "")])
-    jd_words = set([w.lower() for w in re.findall(r"[a-zA-Z\+#\.]+", jd_text or "")])
+    resume_words = set(tokenize(resume_text))
+    jd_words = set(tokenize(jd_text))
     text_overlap = _jaccard(resume_words, jd_words)
 
     # Skill overlap
     skill_overlap = _jaccard(set(map(str.lower, resume_skills or [])), set(map(str.lower, jd_skills or [])))
 
-    return float(0.6 * text_overlap + 0.4 * skill_overlap)
-
+    return float(TEXT_WEIGHT * text_overlap + SKILL_WEIGHT * skill_overlap)
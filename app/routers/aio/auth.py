@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...database import get_async_db
+from ...models import User
+from ...schemas import Token, UserCreate, UserOut, LoginRequest
+from ...utils.principal_cache import Principal
+from ...utils.security import (
+    HasherBusyError,
+    create_access_token,
+    enforce_login_rate,
+    get_current_user_async,
+    hash_password_async,
+    hasher_busy,
+    verify_and_rehash_async,
+)
+
+
+router = APIRouter()
+
+
+@router.post("/signup", response_model=UserOut)
+async def signup(payload: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(User.id).where(User.email == payload.email))
+    # End the read transaction so no pooled connection is held while bcrypt runs
+    await db.rollback()
+    if existing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except HasherBusyError:
+        raise hasher_busy()
+    user = User(email=payload.email, full_name=payload.full_name, password_hash=password_hash)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+@router.post("/login", response_model=Token)
+async def login(payload: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    enforce_login_rate(request, payload.email)
+    credentials = (await db.execute(select(User.id, User.password_hash).where(User.email == payload.email))).first()
+    await db.rollback()
+    valid, new_hash = False, None
+    if credentials:
+        user_id, password_hash = credentials
+        try:
+            valid, new_hash = await verify_and_rehash_async(payload.password, password_hash)
+        except HasherBusyError:
+            raise hasher_busy()
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    if new_hash:
+        await db.execute(update(User).where(User.id == user_id).values(password_hash=new_hash))
+        await db.commit()
+    token = create_access_token(str(user_id), expires_minutes=60)
+    return Token(access_token=token, expires_in_minutes=60)
+
+
+@router.get("/me", response_model=UserOut)
+async def me(current_user: Principal = Depends(get_current_user_async)):
+    return current_user
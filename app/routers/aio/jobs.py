@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...database import get_async_db
+from ...models import Job
+from ...schemas import JobCreate, JobOut
+from ...services import score_service
+from ...services.feature_service import prepare_features, save_job_features
+from ...services.index_service import resume_index
+from ...services.search_service import SearchFilters, search_filters
+from ...utils.http_cache import not_modified, set_etag
+from ...utils.pagination import page_limit, set_next_cursor
+from ...utils.security import get_current_user_async
+from ..jobs import job_list_tag, list_job_rows
+
+
+router = APIRouter(dependencies=[Depends(get_current_user_async)])
+
+
+@router.post("/", response_model=JobOut)
+async def create_job(payload: JobCreate, db: AsyncSession = Depends(get_async_db)):
+    job = Job(title=payload.title, description=payload.description, skills=payload.skills)
+    db.add(job)
+    await db.flush()
+    # Tokenizing runs on a worker thread; the feature writes reuse the sync service code on this
+    # session's connection, inside its transaction
+    prepared = await anyio.to_thread.run_sync(prepare_features, job.description, job.skills)
+    features = await db.run_sync(save_job_features, job.id, job.description, job.skills, prepared)
+    await db.run_sync(score_service.enqueue_jobs, [job.id])
+    await db.commit()
+    resume_index.index_job(job.id, features)
+    return job
+
+
+@router.get("/", response_model=list[JobOut])
+async def list_jobs(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    filters: SearchFilters = Depends(search_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    tag = await db.run_sync(job_list_tag, request.url.query)
+    cached = not_modified(request, tag)
+    if cached is not None:
+        return cached
+    # One indexed query per page: awaiting the driver keeps it off both the threadpool and the sync pool
+    rows = await db.run_sync(list_job_rows, skip, limit, cursor, filters)
+    set_etag(response, tag)
+    return set_next_cursor(response, rows, page_limit(limit))
+
+
+@router.put("/{job_id}", response_model=JobOut)
+async def update_job(job_id: int, payload: JobCreate, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.title = payload.title
+    job.description = payload.description
+    job.skills = payload.skills
+    job.version = (job.version or 1) + 1
+    db.add(job)
+    # Features are rewritten in the same transaction so a committed edit never scores with stale terms
+    prepared = await anyio.to_thread.run_sync(prepare_features, job.description, job.skills)
+    features = await db.run_sync(save_job_features, job.id, job.description, job.skills, prepared)
+    await db.run_sync(score_service.enqueue_jobs, [job.id])
+    await db.commit()
+    resume_index.index_job(job.id, features)
+    return job
+
+
+@router.delete("/{job_id}")
+async def delete_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    await db.delete(job)
+    await db.commit()
+    resume_index.remove_job(job_id)
+    return {"ok": True}
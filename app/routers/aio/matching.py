@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...database import AsyncSessionLocal, get_async_db, run_in_session
+from ...models import Job, Resume
+from ...schemas import MatchOut, RankedResumeOut
+from ...services import export_service
+from ...services.score_service import pair_score
+from ...utils.http_cache import not_modified, set_etag
+from ...utils.security import get_current_user_async
+from ..matching import _as_percent, _attachment, match_tag, rank
+
+
+router = APIRouter(dependencies=[Depends(get_current_user_async)])
+
+
+@router.get("/resume/{resume_id}/job/{job_id}", response_model=MatchOut)
+async def match_resume_to_job(
+    request: Request,
+    response: Response,
+    resume_id: int,
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    resume = (await db.execute(select(Resume.user_id, Resume.version).where(Resume.id == resume_id))).first()
+    if resume is None or resume.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    job_version = await db.scalar(select(Job.version).where(Job.id == job_id))
+    if job_version is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    tag = match_tag(resume_id, resume.version, job_id, job_version)
+    cached = not_modified(request, tag)
+    if cached is not None:
+        return cached
+    set_etag(response, tag)
+    # Scoring and ranking are CPU-bound: they run on a worker thread, never on the event loop
+    score = await run_in_session(pair_score, resume_id, resume.version, job_id, job_version)
+    return MatchOut(resume_id=resume_id, job_id=job_id, score=_as_percent(score))
+
+
+@router.get("/job/{job_id}/top", response_model=list[RankedResumeOut])
+async def top_resumes(
+    job_id: int,
+    k: int = Query(10, ge=1, le=100),
+    dedup: bool = Query(False, description="Fold near-duplicate resumes into their best-ranked copy"),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    if await db.scalar(select(Job.id).where(Job.id == job_id)) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await run_in_session(rank, job_id, user.id, k, dedup)
+
+
+@router.get("/job/{job_id}/export")
+async def export_ranked(
+    job_id: int,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    min_score: float = Query(0, ge=0, le=100, description="Only candidates scoring above this (percent)"),
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    if await db.scalar(select(Job.id).where(Job.id == job_id)) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    version = await db.run_sync(export_service.export_version, job_id, user.id)
+    query = export_service.ranked_query(job_id, user.id, version, min_score / 100, limit)
+    return StreamingResponse(
+        export_service.stream_ranked_async(AsyncSessionLocal, query, fmt),
+        media_type=export_service.FORMATS[fmt],
+        headers=_attachment(job_id, fmt),
+    )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from ...database import SessionLocal, get_async_db, run_in_session
+from ...models import Resume
+from ...schemas import BulkUploadOut, DuplicateClustersOut, DuplicateOut, ResumeOut
+from ...utils.file_storage import delete_stored, save_upload
+from ...utils.http_cache import not_modified, set_etag
+from ...utils.pagination import page_limit, set_next_cursor
+from ...utils.security import get_current_user_async
+from ...services import blob_service, parse_service
+from ...services.index_service import resume_index
+from ...services.search_service import SearchFilters, search_filters
+from ..resumes import _queue_full, bulk_upload, duplicate_clusters, duplicate_rows, list_resume_rows, resume_list_tag
+
+
+router = APIRouter(dependencies=[Depends(get_current_user_async)])
+
+
+@router.post("/", response_model=ResumeOut)
+async def upload_resume(
+    file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user_async)
+):
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="Filename required")
+    # Reject before touching storage so a full queue sheds load cheaply
+    try:
+        await db.run_sync(parse_service.ensure_capacity)
+    except parse_service.QueueFullError:
+        raise _queue_full()
+    stored = await run_in_threadpool(save_upload, file)
+    blob = await db.run_sync(blob_service.acquire, stored)
+    resume = Resume(user_id=user.id, filename=blob.filename, blob_sha256=blob.sha256, parsed=False)
+    db.add(resume)
+    await db.flush()
+    # Parsing happens in the parse worker (app.worker), never on the event loop
+    job, features = await db.run_sync(parse_service.schedule, resume, blob)
+    await db.commit()
+    if features is not None:
+        resume_index.add_resume(resume.id, resume.user_id, features)
+
+    out = ResumeOut.model_validate(resume)
+    if job is not None:
+        out.queue_position = await db.run_sync(parse_service.queue_position, job.id)
+    return out
+
+
+@router.post("/bulk", response_model=BulkUploadOut)
+async def bulk_upload_resumes(files: List[UploadFile] = File(...), user=Depends(get_current_user_async)):
+    # Bulk ingestion is dominated by disk writes and ZIP inflation, so it runs on a worker thread
+    # with its own sync session rather than on the event loop
+    def _run() -> BulkUploadOut:
+        db = SessionLocal()
+        try:
+            return bulk_upload(db, user.id, files)
+        finally:
+            db.close()
+
+    return await run_in_threadpool(_run)
+
+
+@router.get("/", response_model=list[ResumeOut])
+async def list_resumes(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    filters: SearchFilters = Depends(search_filters),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    tag = await db.run_sync(resume_list_tag, user.id, request.url.query)
+    cached = not_modified(request, tag)
+    if cached is not None:
+        return cached
+    rows = await db.run_sync(list_resume_rows, user.id, skip, limit, cursor, filters)
+    set_etag(response, tag)
+    return set_next_cursor(response, rows, page_limit(limit))
+
+
+@router.get("/duplicates", response_model=DuplicateClustersOut)
+async def list_duplicate_clusters(
+    threshold: Optional[float] = Query(None, ge=0, le=1),
+    user=Depends(get_current_user_async),
+):
+    # MinHash comparisons are CPU-bound, so these run on a worker thread with a sync session
+    return await run_in_session(duplicate_clusters, user.id, threshold)
+
+
+@router.get("/{resume_id}/duplicates", response_model=list[DuplicateOut])
+async def list_duplicates(
+    resume_id: int,
+    threshold: Optional[float] = Query(None, ge=0, le=1, description="Minimum estimated similarity (default DEDUP_THRESHOLD)"),
+    user=Depends(get_current_user_async),
+):
+    return await run_in_session(duplicate_rows, resume_id, user.id, threshold)
+
+
+@router.delete("/{resume_id}")
+async def delete_resume(resume_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user_async)):
+    resume = await db.get(Resume, resume_id)
+    if not resume or resume.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    sha256, filename = resume.blob_sha256, resume.filename
+    await db.delete(resume)
+    await db.flush()
+    # Legacy uploads (before content addressing) own their file outright
+    orphans = await db.run_sync(blob_service.release, sha256) if sha256 else [filename]
+    await db.commit()
+    resume_index.remove_resume(resume_id)
+    # Off the event loop: with the S3 backend each delete is a network round trip
+    await run_in_threadpool(delete_stored, orphans)
+    return {"ok": True}
@@ -1,39 +1,82 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..database import get_db
 from ..models import User
 from ..schemas import Token, UserCreate, UserOut, LoginRequest
-from ..utils.security import create_access_token, get_current_user, hash_password, verify_password
+from ..utils.principal_cache import Principal
+from ..utils.security import (
+    HasherBusyError,
+    create_access_token,
+    enforce_login_rate,
+    get_current_user,
+    hash_password_async,
+    hasher_busy,
+    verify_and_rehash_async,
+)
 
 
 router = APIRouter()
 
 
-@router.post("/signup", response_model=UserOut)
-def signup(payload: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    user = User(email=payload.email, full_name=payload.full_name, password_hash=hash_password(payload.password))
+def _credentials(db: Session, email: str) -> Optional[Tuple[int, str]]:
+    row = db.execute(select(User.id, User.password_hash).where(User.email == email)).first()
+    # End the read transaction so no pooled connection is held while bcrypt runs
+    db.rollback()
+    return tuple(row) if row else None
+
+
+def _create_user(db: Session, payload: UserCreate, password_hash: str) -> User:
+    user = User(email=payload.email, full_name=payload.full_name, password_hash=password_hash)
     db.add(user)
     db.commit()
     db.refresh(user)
     return user
 
 
+def _store_hash(db: Session, user_id: int, password_hash: str) -> None:
+    db.execute(update(User).where(User.id == user_id).values(password_hash=password_hash))
+    db.commit()
+
+
+# signup/login are async so a request waiting on bcrypt holds no API thread; the short DB steps
+# still run on the threadpool with the request's sync session
+@router.post("/signup", response_model=UserOut)
+async def signup(payload: UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_credentials, db, payload.email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except HasherBusyError:
+        raise hasher_busy()
+    return await run_in_threadpool(_create_user, db, payload, password_hash)
+
+
 @router.post("/login", response_model=Token)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+async def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)):
+    enforce_login_rate(request, payload.email)
+    credentials = await run_in_threadpool(_credentials, db, payload.email)
+    valid, new_hash = False, None
+    if credentials:
+        user_id, password_hash = credentials
+        try:
+            valid, new_hash = await verify_and_rehash_async(payload.password, password_hash)
+        except HasherBusyError:
+            raise hasher_busy()
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
-    token = create_access_token(str(user.id), expires_minutes=60)
+    if new_hash:
+        await run_in_threadpool(_store_hash, db, user_id, new_hash)
+    token = create_access_token(str(user_id), expires_minutes=60)
     return Token(access_token=token, expires_in_minutes=60)
 
 
 @router.get("/me", response_model=UserOut)
-def me(current_user: User = Depends(get_current_user)):
+def me(current_user: Principal = Depends(get_current_user)):
     return current_user
-
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import get_settings
+from ..database import get_db
+from ..services import event_service
+from ..services.event_service import Event, Subscription
+from ..utils.security import get_current_user_or_token
+
+
+settings = get_settings()
+
+# Server-sent parse status, so clients stop polling GET /resumes/. Mounted in both DB_ASYNC modes.
+router = APIRouter()
+
+
+def _run(db: Session, fn, *args):
+    # The session is released before the stream starts; an open stream holds no connection
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def _event_id(value: Optional[str]) -> int:
+    try:
+        return max(int(value or 0), 0)
+    except ValueError:
+        return 0
+
+
+async def _stream(subscription: Subscription, initial: List[Event], resume_ids: List[int], until_done: bool) -> AsyncIterator[str]:
+    watched = set(resume_ids)
+    waiting = set()
+    try:
+        # Tells EventSource how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        for item in initial:
+            yield item.encode()
+            if item.status in event_service.TERMINAL:
+                waiting.discard(item.resume_id)
+            else:
+                waiting.add(item.resume_id)
+        while not (until_done and not waiting):
+            if subscription.overflowed:
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), timeout=settings.events_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            if watched and item.resume_id not in watched:
+                continue
+            yield item.encode()
+            if item.status in event_service.TERMINAL:
+                waiting.discard(item.resume_id)
+            else:
+                waiting.add(item.resume_id)
+    finally:
+        event_service.hub.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def parse_events(
+    request: Request,
+    resume_id: List[int] = Query([], description="Only these resumes; default all of yours"),
+    until_done: bool = Query(False, description="Close the stream once every watched resume has finished parsing"),
+    last_event_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user_or_token),
+):
+    # Starts with the current state of the requested resumes (or all unfinished ones), then pushes every
+    # transition: queued, parsing, parsed, truncated or failed. Subscribing before taking the snapshot
+    # means no transition can fall between the two.
+    subscription = event_service.hub.subscribe(user.id)
+    try:
+        initial = await run_in_threadpool(_run, db, event_service.snapshot, user.id, resume_id, _event_id(last_event_id))
+    except BaseException:
+        event_service.hub.unsubscribe(subscription)
+        raise
+    return StreamingResponse(
+        _stream(subscription, initial, resume_id, until_done),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import Job
 from ..schemas import JobCreate, JobOut
+from ..services import score_service
+from ..services.feature_service import save_job_features
+from ..services.index_service import resume_index
+from ..services.search_service import SearchFilters, filter_jobs, search_filters
+from ..utils.http_cache import etag, not_modified, set_etag
+from ..utils.pagination import decode_cursor, page_limit, set_next_cursor
 from ..utils.security import get_current_user
 
 
@@ -16,15 +25,48 @@ router = APIRouter(dependencies=[Depends(get_current_user)])
 def create_job(payload: JobCreate, db: Session = Depends(get_db)):
     job = Job(title=payload.title, description=payload.description, skills=payload.skills)
     db.add(job)
+    db.flush()
+    features = save_job_features(db, job.id, job.description, job.skills)
+    score_service.enqueue_jobs(db, [job.id])
     db.commit()
     db.refresh(job)
+    resume_index.index_job(job.id, features)
     return job
 
 
+def list_job_rows(db: Session, skip: int, limit: int, cursor: Optional[str], filters: Optional[SearchFilters] = None) -> list:
+    q = filter_jobs(db, select(Job), filters).order_by(Job.id.desc()).limit(page_limit(limit) + 1)
+    after = decode_cursor(cursor)
+    # `skip` (offset) is still honoured for clients that page by number
+    q = q.where(Job.id < after) if after is not None else q.offset(max(skip, 0))
+    return db.scalars(q).all()
+
+
+def job_list_tag(db: Session, query: str) -> str:
+    # An insert raises max(id) or max(updated_at), a delete lowers the count and an edit raises
+    # max(updated_at). Stamped over all jobs, so filtered pages revalidate conservatively.
+    count, last_id, last_update = db.execute(select(func.count(), func.max(Job.id), func.max(Job.updated_at))).one()
+    return etag("jobs", count, last_id, last_update, query)
+
+
 @router.get("/", response_model=list[JobOut])
-def list_jobs(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
-    q = db.query(Job).order_by(Job.id.desc()).offset(max(skip, 0)).limit(max(min(limit, 100), 1))
-    return q.all()
+def list_jobs(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    filters: SearchFilters = Depends(search_filters),
+    db: Session = Depends(get_db),
+):
+    # Stamped before the rows are read, so a concurrent write can only make the tag older than the body
+    tag = job_list_tag(db, request.url.query)
+    cached = not_modified(request, tag)
+    if cached is not None:
+        return cached
+    rows = list_job_rows(db, skip, limit, cursor, filters)
+    set_etag(response, tag)
+    return set_next_cursor(response, rows, page_limit(limit))
 
 
 @router.put("/{job_id}", response_model=JobOut)
@@ -35,9 +77,14 @@ def update_job(job_id: int, payload: JobCreate, db: Session = Depends(get_db)):
     job.title = payload.title
     job.description = payload.description
     job.skills = payload.skills
+    job.version = (job.version or 1) + 1
     db.add(job)
+    # Features are rewritten in the same transaction so a committed edit never scores with stale terms
+    features = save_job_features(db, job.id, job.description, job.skills)
+    score_service.enqueue_jobs(db, [job.id])
     db.commit()
     db.refresh(job)
+    resume_index.index_job(job.id, features)
     return job
 
 
@@ -48,6 +95,7 @@ def delete_job(job_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Job not found")
     db.delete(job)
     db.commit()
+    resume_index.remove_job(job_id)
     return {"ok": True}
 
 
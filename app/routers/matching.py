@@ -1 +1,110 @@
+from __future__ import annotations
 
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal, get_db
+from ..models import Job, Resume
+from ..schemas import MatchOut, RankedResumeOut
+from ..services import dedup_service, export_service
+from ..services.match_service import top_resumes_for_job
+from ..services.score_service import SCORER_VERSION, pair_score, top_from_scores
+from ..utils.http_cache import etag, not_modified, set_etag
+from ..utils.security import get_current_user
+
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+# With dedup, this many times k candidates are ranked so folding copies still leaves k results
+DEDUP_POOL_FACTOR = 5
+
+
+def _as_percent(score: float) -> float:
+    return round(score * 100, 2)
+
+
+def match_tag(resume_id: int, resume_version: int, job_id: int, job_version: int) -> str:
+    return etag("match", resume_id, resume_version, job_id, job_version, SCORER_VERSION)
+
+
+@router.get("/resume/{resume_id}/job/{job_id}", response_model=MatchOut)
+def match_resume_to_job(
+    request: Request, response: Response, resume_id: int, job_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)
+):
+    resume = db.execute(select(Resume.user_id, Resume.version).where(Resume.id == resume_id)).first()
+    if resume is None or resume.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    job_version = db.scalar(select(Job.version).where(Job.id == job_id))
+    if job_version is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # The versions just read already identify the score, so revalidation skips scoring entirely
+    tag = match_tag(resume_id, resume.version, job_id, job_version)
+    cached = not_modified(request, tag)
+    if cached is not None:
+        return cached
+    set_etag(response, tag)
+    # Cached by row versions, then materialized scores, then scored live
+    score = pair_score(db, resume_id, resume.version, job_id, job_version)
+    return MatchOut(resume_id=resume_id, job_id=job_id, score=_as_percent(score))
+
+
+def rank(db: Session, job_id: int, user_id: int, k: int, dedup: bool = False) -> list[RankedResumeOut]:
+    pool = k * DEDUP_POOL_FACTOR if dedup else k
+    ranked = top_from_scores(db, job_id, user_id, pool)
+    if ranked is None:
+        ranked = top_resumes_for_job(db, job_id, user_id, pool)
+    if not dedup:
+        return [
+            RankedResumeOut(resume_id=resume.id, filename=resume.filename, skills=resume.skills, score=_as_percent(score))
+            for resume, score in ranked
+        ]
+    # Near-copies of a higher-ranked resume are folded into it instead of taking their own slots
+    by_id = {resume.id: resume for resume, _ in ranked}
+    return [
+        RankedResumeOut(
+            resume_id=rid, filename=by_id[rid].filename, skills=by_id[rid].skills, score=_as_percent(score), duplicate_ids=folded
+        )
+        for rid, score, folded in dedup_service.collapse(db, [(resume.id, score) for resume, score in ranked], k)
+    ]
+
+
+@router.get("/job/{job_id}/top", response_model=list[RankedResumeOut])
+def top_resumes(
+    job_id: int,
+    k: int = Query(10, ge=1, le=100),
+    dedup: bool = Query(False, description="Fold near-duplicate resumes into their best-ranked copy"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    if db.scalar(select(Job.id).where(Job.id == job_id)) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return rank(db, job_id, user.id, k, dedup)
+
+
+def _attachment(job_id: int, fmt: str) -> dict:
+    return {"Content-Disposition": f'attachment; filename="job-{job_id}-candidates.{fmt}"'}
+
+
+@router.get("/job/{job_id}/export")
+def export_ranked(
+    job_id: int,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    min_score: float = Query(0, ge=0, le=100, description="Only candidates scoring above this (percent)"),
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    # Streams the caller's whole ranked shortlist from a server-side cursor; memory stays flat at any size
+    if db.scalar(select(Job.id).where(Job.id == job_id)) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    version = export_service.export_version(db, job_id, user.id)
+    query = export_service.ranked_query(job_id, user.id, version, min_score / 100, limit)
+    return StreamingResponse(
+        export_service.stream_ranked(SessionLocal, query, fmt),
+        media_type=export_service.FORMATS[fmt],
+        headers=_attachment(job_id, fmt),
+    )
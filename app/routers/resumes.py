@@ -1,67 +1,173 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from contextlib import ExitStack
+from typing import List, Optional
 
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, load_only
+
+from ..config import get_settings
 from ..database import get_db
 from ..models import Resume
-from ..schemas import ResumeOut
-from ..utils.file_storage import save_upload
+from ..schemas import BulkUploadItem, BulkUploadOut, DuplicateClustersOut, DuplicateOut, ResumeOut
+from ..utils.file_storage import StoredFile, delete_stored, save_upload
+from ..utils.http_cache import etag, not_modified, set_etag
+from ..utils.pagination import decode_cursor, page_limit, set_next_cursor
 from ..utils.security import get_current_user
-from ..services.resume_service import extract_text_and_skills
+from ..services import blob_service, dedup_service, ingest_service, parse_service
+from ..services.index_service import resume_index
+from ..services.search_service import SearchFilters, filter_resumes, search_filters
+
 
+settings = get_settings()
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
 
-def _parse_resume_background(resume_id: int, path: str, db: Session) -> None:
-    text, skills = extract_text_and_skills(path)
-    resume = db.get(Resume, resume_id)
-    if resume is None:
-        return
-    resume.content_text = text
-    resume.skills = skills
-    resume.parsed = True
-    db.add(resume)
-    db.commit()
+def _queue_full() -> HTTPException:
+    return HTTPException(status_code=503, detail="Parse queue is full, retry later", headers={"Retry-After": "30"})
 
 
 @router.post("/", response_model=ResumeOut)
-def upload_resume(background_tasks: BackgroundTasks, file: UploadFile = File(...), db: Session = Depends(get_db), user=Depends(get_current_user)):
+def upload_resume(file: UploadFile = File(...), db: Session = Depends(get_db), user=Depends(get_current_user)):
     if not file.filename:
         raise HTTPException(status_code=400, detail="Filename required")
-    saved_name, path = save_upload(file)
-    resume = Resume(user_id=user.id, filename=saved_name, parsed=False)
+    # Reject before touching storage so a full queue sheds load cheaply
+    try:
+        parse_service.ensure_capacity(db)
+    except parse_service.QueueFullError:
+        raise _queue_full()
+    return register_resume(db, user.id, save_upload(file))
+
+
+def register_resume(db: Session, user_id: int, stored: StoredFile) -> ResumeOut:
+    blob = blob_service.acquire(db, stored)
+    resume = Resume(user_id=user_id, filename=blob.filename, blob_sha256=blob.sha256, parsed=False)
     db.add(resume)
+    db.flush()
+    # Parsing happens in the parse worker (app.worker), never on this request thread
+    job, features = parse_service.schedule(db, resume, blob)
     db.commit()
     db.refresh(resume)
+    if features is not None:
+        resume_index.add_resume(resume.id, resume.user_id, features)
 
-    # Run background parsing using a fresh session inside the task
-    def task(resume_id: int, path: str) -> None:
-        # Get a new session to avoid cross-thread issues
-        from ..database import SessionLocal
+    out = ResumeOut.model_validate(resume)
+    if job is not None:
+        out.queue_position = parse_service.queue_position(db, job.id)
+    return out
 
-        local_db = SessionLocal()
-        try:
-            _parse_resume_background(resume_id, path, local_db)
-        finally:
-            local_db.close()
 
-    background_tasks.add_task(task, resume.id, path)
+@router.post("/bulk", response_model=BulkUploadOut)
+def bulk_upload_resumes(files: List[UploadFile] = File(...), db: Session = Depends(get_db), user=Depends(get_current_user)):
+    return bulk_upload(db, user.id, files)
+
 
-    return resume
+def bulk_upload(db: Session, user_id: int, files: List[UploadFile]) -> BulkUploadOut:
+    with ExitStack() as stack:
+        sources, skipped = ingest_service.collect_sources(files, stack)
+        if len(sources) > settings.bulk_max_files:
+            raise HTTPException(status_code=413, detail=f"At most {settings.bulk_max_files} resumes per request")
+        if not sources:
+            return BulkUploadOut(created=[], skipped=skipped)
+        try:
+            parse_service.ensure_capacity(db, len(sources))
+        except parse_service.QueueFullError:
+            raise _queue_full()
+        created = ingest_service.ingest(db, user_id, sources)
+    return BulkUploadOut(
+        created=[BulkUploadItem(id=rid, filename=name, original_filename=original) for rid, name, original in created],
+        skipped=skipped,
+    )
 
 
-@router.get("/", response_model=list[ResumeOut])
-def list_resumes(skip: int = 0, limit: int = 20, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def list_resume_rows(
+    db: Session, user_id: int, skip: int, limit: int, cursor: Optional[str], filters: Optional[SearchFilters] = None
+) -> list:
+    # Served from ix_resumes_user_id_id; only the ResumeOut columns are read
     q = (
-        db.query(Resume)
-        .filter(Resume.user_id == user.id)
+        filter_resumes(db, select(Resume), filters)
+        .options(
+            load_only(
+                Resume.id,
+                Resume.filename,
+                Resume.parsed,
+                Resume.parse_status,
+                Resume.parse_detail,
+                Resume.skills,
+                Resume.created_at,
+            )
+        )
+        .where(Resume.user_id == user_id)
         .order_by(Resume.id.desc())
-        .offset(max(skip, 0))
-        .limit(max(min(limit, 100), 1))
+        .limit(page_limit(limit) + 1)
     )
-    return q.all()
+    after = decode_cursor(cursor)
+    q = q.where(Resume.id < after) if after is not None else q.offset(max(skip, 0))
+    return db.scalars(q).all()
+
+
+def resume_list_tag(db: Session, user_id: int, query: str) -> str:
+    # Read from ix_resumes_user_id_updated_at alone. Parse results and failures move updated_at, uploads
+    # move max(id) and deletes the count.
+    count, last_id, last_update = db.execute(
+        select(func.count(), func.max(Resume.id), func.max(Resume.updated_at)).where(Resume.user_id == user_id)
+    ).one()
+    return etag("resumes", user_id, count, last_id, last_update, query)
+
+
+@router.get("/", response_model=list[ResumeOut])
+def list_resumes(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    filters: SearchFilters = Depends(search_filters),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    tag = resume_list_tag(db, user.id, request.url.query)
+    cached = not_modified(request, tag)
+    if cached is not None:
+        return cached
+    rows = list_resume_rows(db, user.id, skip, limit, cursor, filters)
+    set_etag(response, tag)
+    return set_next_cursor(response, rows, page_limit(limit))
+
+
+def duplicate_rows(db: Session, resume_id: int, user_id: int, threshold: Optional[float]) -> list[DuplicateOut]:
+    owner = db.scalar(select(Resume.user_id).where(Resume.id == resume_id))
+    if owner is None or owner != user_id:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    found = dedup_service.duplicates_of(db, resume_id, user_id, threshold)
+    names = dict(db.execute(select(Resume.id, Resume.filename).where(Resume.id.in_([rid for rid, _ in found]))).all())
+    return [DuplicateOut(resume_id=rid, filename=names[rid], similarity=round(s, 3)) for rid, s in found if rid in names]
+
+
+def duplicate_clusters(db: Session, user_id: int, threshold: Optional[float]) -> DuplicateClustersOut:
+    threshold = settings.dedup_threshold if threshold is None else threshold
+    return DuplicateClustersOut(threshold=threshold, clusters=dedup_service.clusters(db, user_id, threshold))
+
+
+@router.get("/duplicates", response_model=DuplicateClustersOut)
+def list_duplicate_clusters(
+    threshold: Optional[float] = Query(None, ge=0, le=1),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return duplicate_clusters(db, user.id, threshold)
+
+
+@router.get("/{resume_id}/duplicates", response_model=list[DuplicateOut])
+def list_duplicates(
+    resume_id: int,
+    threshold: Optional[float] = Query(None, ge=0, le=1, description="Minimum estimated similarity (default DEDUP_THRESHOLD)"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return duplicate_rows(db, resume_id, user.id, threshold)
 
 
 @router.delete("/{resume_id}")
@@ -69,8 +175,12 @@ def delete_resume(resume_id: int, db: Session = Depends(get_db), user=Depends(ge
     resume = db.get(Resume, resume_id)
     if not resume or resume.user_id != user.id:
         raise HTTPException(status_code=404, detail="Resume not found")
+    sha256, filename = resume.blob_sha256, resume.filename
     db.delete(resume)
+    db.flush()
+    # Legacy uploads (before content addressing) own their file outright
+    orphans = blob_service.release(db, sha256) if sha256 else [filename]
     db.commit()
+    resume_index.remove_resume(resume_id)
+    delete_stored(orphans)
     return {"ok": True}
-
-
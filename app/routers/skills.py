@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..schemas import SkillTaxonomyOut
+from ..taxonomy import skill_registry
+from ..utils.security import get_current_user, require_admin
+
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+def _describe() -> SkillTaxonomyOut:
+    matcher = skill_registry.matcher()
+    return SkillTaxonomyOut(
+        path=skill_registry.path, skills=matcher.skills, terms=matcher.terms, loaded_at=skill_registry.loaded_at
+    )
+
+
+@router.get("/", response_model=SkillTaxonomyOut)
+def get_taxonomy():
+    return _describe()
+
+
+@router.post("/reload", response_model=SkillTaxonomyOut, dependencies=[Depends(require_admin)])
+def reload_taxonomy():
+    # Other processes pick the new file up on their next mtime check (SKILLS_RELOAD_SECONDS)
+    try:
+        skill_registry.reload()
+    except (OSError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Could not load skill taxonomy: {exc}")
+    return _describe()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..database import get_db
+from ..models import UploadSession
+from ..schemas import ResumeOut, UploadCreate, UploadOut
+from ..services import parse_service, upload_service
+from ..utils.file_storage import StoredFile
+from ..utils.security import get_current_user
+from .resumes import _queue_full, register_resume
+
+
+# Upload paths that stream the request body straight to disk from the event loop: no multipart
+# spooling and no worker thread held for the length of the transfer. Database work hops to the
+# threadpool and closes the session afterwards, so no connection is pinned while bytes arrive.
+# Mounted in both DB_ASYNC modes.
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+def _run(db: Session, fn, *args):
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def _check_capacity(db: Session) -> None:
+    try:
+        parse_service.ensure_capacity(db)
+    except parse_service.QueueFullError:
+        raise _queue_full()
+
+
+def _out(session: UploadSession, resume: Optional[ResumeOut] = None) -> UploadOut:
+    return UploadOut(upload_id=session.id, filename=session.filename, size=session.size, offset=session.offset, resume=resume)
+
+
+def _offset_headers(response: Response, offset: int, size: int) -> None:
+    response.headers["Upload-Offset"] = str(offset)
+    response.headers["Upload-Length"] = str(size)
+
+
+@router.post("/stream", response_model=ResumeOut)
+async def stream_resume(request: Request, filename: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    # Raw request body (not multipart); type and size are checked from the headers and the first bytes
+    filename = os.path.basename(filename)
+    ext = upload_service.extension(filename)
+    upload_service.check_declared(
+        ext, request.headers.get("content-type"), upload_service.content_length(request.headers.get("content-length"))
+    )
+    await run_in_threadpool(_run, db, _check_capacity)
+    stored = await upload_service.receive(request.stream(), filename)
+    return await run_in_threadpool(_run, db, register_resume, user.id, stored)
+
+
+@router.post("/uploads", response_model=UploadOut, status_code=201)
+async def create_upload(
+    body: UploadCreate, request: Request, response: Response, db: Session = Depends(get_db), user=Depends(get_current_user)
+):
+    def _create(db: Session) -> UploadOut:
+        return _out(upload_service.create_session(db, user.id, body.filename, body.size))
+
+    out = await run_in_threadpool(_run, db, _create)
+    _offset_headers(response, out.offset, out.size)
+    response.headers["Location"] = str(request.url_for("get_upload", upload_id=out.upload_id))
+    return out
+
+
+@router.head("/uploads/{upload_id}")
+async def upload_offset(upload_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)) -> Response:
+    session = await run_in_threadpool(_run, db, upload_service.get_session, upload_id, user.id)
+    response = Response(status_code=200)
+    _offset_headers(response, session.offset, session.size)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadOut)
+async def get_upload(upload_id: str, response: Response, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    session = await run_in_threadpool(_run, db, upload_service.get_session, upload_id, user.id)
+    _offset_headers(response, session.offset, session.size)
+    return _out(session)
+
+
+@router.patch("/uploads/{upload_id}", response_model=UploadOut)
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(...),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    # Appends the body at Upload-Offset. A mismatched offset gets 409 with the server's offset; a dropped
+    # connection keeps what arrived, so the client asks for the offset (HEAD) and continues from there.
+    # The request carrying the last byte turns the upload into a resume.
+    with upload_service.exclusive(upload_id):
+        session = await run_in_threadpool(_run, db, upload_service.get_session, upload_id, user.id)
+        offset = await upload_service.append(session, upload_offset, request.stream())
+        if offset != session.offset:
+            saved = await run_in_threadpool(_run, db, upload_service.save_offset, upload_id, session.offset, offset)
+            if not saved:
+                raise HTTPException(status_code=409, detail="Upload was modified concurrently, check its offset")
+            session.offset = offset
+        resume = None
+        if offset == session.size:
+            resume = await run_in_threadpool(_run, db, _complete, user.id, session)
+    _offset_headers(response, session.offset, session.size)
+    return _out(session, resume)
+
+
+def _complete(db: Session, user_id: int, session: UploadSession) -> ResumeOut:
+    # A full parse queue, or a failure while registering, leaves the upload complete but pending; an
+    # empty PATCH at the final offset retries
+    _check_capacity(db)
+    stored: StoredFile = upload_service.finish(db, session.id, session.filename)
+    out = register_resume(db, user_id, stored)
+    upload_service.finished(session.id)
+    return out
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    def _abort(db: Session) -> None:
+        upload_service.get_session(db, upload_id, user.id)
+        upload_service.discard(db, upload_id)
+
+    await run_in_threadpool(_run, db, _abort)
+    return {"ok": True}
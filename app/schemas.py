@@ -54,8 +54,70 @@ class ResumeOut(BaseModel):
     id: int
     filename: str
     parsed: bool
+    parse_status: Optional[str] = None
+    parse_detail: Optional[str] = None
     skills: Optional[List[str]] = None
     created_at: datetime
+    # Only set on upload: 1-based position among queued parse jobs
+    queue_position: Optional[int] = None
 
     model_config = {"from_attributes": True}
 
+
+
+class MatchOut(BaseModel):
+    resume_id: int
+    job_id: int
+    score: float
+
+
+class RankedResumeOut(BaseModel):
+    resume_id: int
+    filename: str
+    skills: Optional[List[str]] = None
+    score: float
+    # With dedup=true: lower-ranked near-copies of this resume that were left out
+    duplicate_ids: Optional[List[int]] = None
+
+
+class DuplicateOut(BaseModel):
+    resume_id: int
+    filename: str
+    similarity: float
+
+
+class DuplicateClustersOut(BaseModel):
+    threshold: float
+    clusters: List[List[int]]
+
+
+class BulkUploadItem(BaseModel):
+    id: int
+    filename: str
+    original_filename: str
+
+
+class BulkUploadOut(BaseModel):
+    created: List[BulkUploadItem]
+    skipped: List[str]
+
+
+class UploadCreate(BaseModel):
+    filename: str
+    size: int = Field(gt=0)
+
+
+class UploadOut(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
+    # Set once the last byte arrives and the file becomes a resume
+    resume: Optional[ResumeOut] = None
+
+
+class SkillTaxonomyOut(BaseModel):
+    path: str
+    skills: int
+    terms: int
+    loaded_at: Optional[datetime] = None
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from ..database import insert_ignore
+from ..models import Blob
+from ..utils.blob_store import get_text, put_text, store
+from ..utils.file_storage import StoredFile
+
+
+def acquire(db: Session, stored: StoredFile) -> Blob:
+    # Takes one reference on the blob for `stored`, creating it on first sight. Concurrent uploads of
+    # the same bytes race on the insert; the loser simply shares the winner's row. A release that drops
+    # the last reference can delete the row between our insert and update, so that case inserts again.
+    row = {"sha256": stored.sha256, "filename": stored.name, "size": stored.size, "ref_count": 0}
+    for _ in range(3):
+        db.execute(insert_ignore(db, Blob), [dict(row, created_at=datetime.utcnow())])
+        result = db.execute(update(Blob).where(Blob.sha256 == stored.sha256).values(ref_count=Blob.ref_count + 1))
+        if result.rowcount == 1:
+            break
+    else:
+        raise RuntimeError(f"Could not take a reference on blob {stored.sha256}")
+    blob = db.get(Blob, stored.sha256, populate_existing=True)
+    if blob.filename != stored.name:
+        # Same bytes uploaded under another extension; keep only the blob's copy
+        store.delete(stored.name)
+    return blob
+
+
+def release(db: Session, sha256: Optional[str]) -> List[str]:
+    # Drops one reference. Returns the stored keys to delete once the caller has committed, if this was the last one.
+    if sha256 is None:
+        return []
+    db.execute(update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count - 1))
+    blob = db.get(Blob, sha256, populate_existing=True)
+    if blob is None or blob.ref_count > 0:
+        return []
+    keys = [blob.filename] + ([blob.text_key] if blob.text_key else [])
+    # The count is checked again by the delete itself: an upload that took a reference since the read
+    # above keeps the row, and then its files must stay too
+    result = db.execute(delete(Blob).where(Blob.sha256 == sha256, Blob.ref_count <= 0))
+    return keys if result.rowcount == 1 else []
+
+
+def cached_text(blob: Blob) -> Optional[str]:
+    # The text of an earlier parse of these bytes, or None when they still need parsing
+    if blob.parsed_at is None:
+        return None
+    if blob.text_key is None:
+        return blob.content_text or ""
+    try:
+        return get_text(store, blob.text_key)
+    except FileNotFoundError:
+        return None
+
+
+def cache_parse_result(
+    db: Session, sha256: Optional[str], text: str, skills: list[str], status: Optional[str] = None, detail: Optional[str] = None
+) -> None:
+    if sha256 is None:
+        return
+    # Written before the row points at it; a rolled-back transaction leaves an artifact that the next
+    # parse of the same bytes overwrites
+    key = put_text(store, sha256, text)
+    db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256)
+        .values(
+            content_text=None, text_key=key, skills=skills, parse_status=status, parse_detail=detail, parsed_at=datetime.utcnow()
+        )
+    )
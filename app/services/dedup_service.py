@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hashlib
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.orm import Session, aliased
+
+from ..config import get_settings
+from ..models import Resume, ResumeBand, ResumeFeatures
+from ..nlp import tokenize
+
+
+settings = get_settings()
+
+# 128 permutations in 16 bands of 8 rows: a pair shares at least one bucket with probability
+# 1 - (1 - J^8)^16, about 0.06 at Jaccard 0.5, 0.6 at 0.7 and above 0.99 from 0.85, so copies are found
+# and unrelated resumes are rarely even compared. Changing these invalidates stored signatures and bands.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+_SHINGLE_BLOCK = 2048
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures are persisted and compared across processes
+_rng = np.random.RandomState(20240501)
+_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingle_hashes(text: Optional[str]) -> np.ndarray:
+    # Overlapping word 5-grams, hashed to 32 bits. Word shingles ignore layout and punctuation changes
+    # but notice reordered or rewritten sentences.
+    words = tokenize(text or "")
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    count = max(len(words) - SHINGLE_WORDS + 1, 1)
+    hashes = {zlib.crc32(" ".join(words[i : i + SHINGLE_WORDS]).encode()) for i in range(count)}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def signature(text: Optional[str]) -> Optional[np.ndarray]:
+    hashes = shingle_hashes(text)
+    if hashes.size == 0:
+        return None
+    result = np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    # Universal hashing (a*x + b) mod p per permutation, in blocks so long documents stay within a few MB
+    for start in range(0, hashes.size, _SHINGLE_BLOCK):
+        block = hashes[start : start + _SHINGLE_BLOCK, None]
+        permuted = ((block * _A + _B) % _MERSENNE_PRIME) & _MAX_HASH
+        np.minimum(result, permuted.min(axis=0), out=result)
+    return result.astype(np.uint32)
+
+
+def pack(sig: Optional[np.ndarray]) -> Optional[bytes]:
+    return sig.astype("<u4").tobytes() if sig is not None else None
+
+
+def unpack(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    if not blob or len(blob) != NUM_PERM * 4:
+        return None
+    return np.frombuffer(blob, dtype="<u4")
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    # Fraction of agreeing permutations estimates the Jaccard similarity of the shingle sets
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def buckets(sig: np.ndarray) -> List[int]:
+    # 56-bit digests fit a signed BIGINT on every backend
+    return [
+        int.from_bytes(hashlib.blake2b(sig[band * ROWS : (band + 1) * ROWS].tobytes(), digest_size=7).digest(), "little")
+        for band in range(BANDS)
+    ]
+
+
+def replace_bands(db: Session, resume_id: int, sig: Optional[np.ndarray]) -> None:
+    db.execute(delete(ResumeBand).where(ResumeBand.resume_id == resume_id))
+    if sig is not None:
+        db.execute(
+            insert(ResumeBand), [{"resume_id": resume_id, "band": band, "bucket": bucket} for band, bucket in enumerate(buckets(sig))]
+        )
+
+
+def load_signatures(db: Session, resume_ids: Iterable[int]) -> Dict[int, np.ndarray]:
+    ids = list(resume_ids)
+    if not ids:
+        return {}
+    rows = db.execute(select(ResumeFeatures.resume_id, ResumeFeatures.minhash).where(ResumeFeatures.resume_id.in_(ids)))
+    signatures = {rid: unpack(blob) for rid, blob in rows}
+    return {rid: sig for rid, sig in signatures.items() if sig is not None}
+
+
+def duplicates_of(db: Session, resume_id: int, user_id: int, threshold: Optional[float] = None) -> List[Tuple[int, float]]:
+    # The caller's resumes sharing an LSH bucket with this one, confirmed against the full signatures.
+    # One index lookup per band: cost follows the number of candidates, not the size of the corpus.
+    threshold = settings.dedup_threshold if threshold is None else threshold
+    mine, other = aliased(ResumeBand), aliased(ResumeBand)
+    candidates = db.scalars(
+        select(other.resume_id)
+        .join(mine, (mine.band == other.band) & (mine.bucket == other.bucket))
+        .join(Resume, Resume.id == other.resume_id)
+        .where(mine.resume_id == resume_id, other.resume_id != resume_id, Resume.user_id == user_id)
+        .distinct()
+    ).all()
+    signatures = load_signatures(db, [resume_id, *candidates])
+    own = signatures.get(resume_id)
+    if own is None:
+        return []
+    scored = [(rid, similarity(own, signatures[rid])) for rid in candidates if rid in signatures]
+    return sorted(((rid, s) for rid, s in scored if s >= threshold), key=lambda item: (-item[1], item[0]))
+
+
+def clusters(db: Session, user_id: int, threshold: Optional[float] = None) -> List[List[int]]:
+    # Every group of near-duplicates among the caller's resumes. Only buckets holding more than one of
+    # them are read, and only pairs inside those buckets are compared.
+    threshold = settings.dedup_threshold if threshold is None else threshold
+    owned = select(ResumeBand.band, ResumeBand.bucket).join(Resume, Resume.id == ResumeBand.resume_id).where(Resume.user_id == user_id)
+    shared = owned.group_by(ResumeBand.band, ResumeBand.bucket).having(func.count() > 1)
+    rows = db.execute(
+        select(ResumeBand.band, ResumeBand.bucket, ResumeBand.resume_id)
+        .join(Resume, Resume.id == ResumeBand.resume_id)
+        .where(Resume.user_id == user_id, tuple_(ResumeBand.band, ResumeBand.bucket).in_(shared))
+    ).all()
+    members: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for band, bucket, rid in rows:
+        members[(band, bucket)].append(rid)
+    signatures = load_signatures(db, {rid for _, _, rid in rows})
+
+    parent: Dict[int, int] = {}
+
+    def find(rid: int) -> int:
+        parent.setdefault(rid, rid)
+        while parent[rid] != rid:
+            parent[rid] = parent[parent[rid]]
+            rid = parent[rid]
+        return rid
+
+    for group in members.values():
+        group = sorted(set(group))
+        for i, a in enumerate(group):
+            for b in group[i + 1 :]:
+                if find(a) != find(b) and a in signatures and b in signatures and similarity(signatures[a], signatures[b]) >= threshold:
+                    parent[find(b)] = find(a)
+    grouped: Dict[int, List[int]] = defaultdict(list)
+    for rid in parent:
+        grouped[find(rid)].append(rid)
+    return sorted((sorted(ids) for ids in grouped.values() if len(ids) > 1), key=lambda ids: (-len(ids), ids[0]))
+
+
+def collapse(db: Session, ranked: Sequence[Tuple[int, float]], k: int, threshold: Optional[float] = None) -> List[Tuple[int, float, List[int]]]:
+    # Dedup pass over a ranking: walking best-first, a resume that is a near-copy of one already kept is
+    # folded into it. Returns (resume id, score, folded ids) for at most k resumes.
+    threshold = settings.dedup_threshold if threshold is None else threshold
+    signatures = load_signatures(db, [rid for rid, _ in ranked])
+    kept: List[Tuple[int, float, List[int]]] = []
+    for rid, score in ranked:
+        sig = signatures.get(rid)
+        owner = None
+        if sig is not None:
+            owner = next((item for item in kept if item[0] in signatures and similarity(sig, signatures[item[0]]) >= threshold), None)
+        if owner is not None:
+            owner[2].append(rid)
+        elif len(kept) < k:
+            kept.append((rid, score, []))
+    return kept
+
+
+def backfill(db: Session) -> None:
+    # Feature rows written before signatures existed
+    missing = db.execute(
+        select(Resume.id, Resume.content_text)
+        .join(ResumeFeatures, ResumeFeatures.resume_id == Resume.id)
+        .where(ResumeFeatures.minhash.is_(None), Resume.content_text.is_not(None), Resume.content_text != "")
+    ).all()
+    for resume_id, text in missing:
+        sig = signature(text)
+        if sig is None:
+            continue
+        features = db.get(ResumeFeatures, resume_id)
+        features.minhash = pack(sig)
+        replace_bands(db, resume_id, sig)
+    if missing:
+        db.commit()
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from sqlalchemy import delete, event, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..models import ParseEvent, ParseJob, Resume
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+QUEUED = "queued"
+PARSING = "parsing"
+# Terminal states are the resume's parse_status values
+PARSED = "parsed"
+TRUNCATED = "truncated"
+FAILED = "failed"
+TERMINAL = frozenset({PARSED, TRUNCATED, FAILED})
+
+# Events a slow subscriber may fall behind by before its stream is closed (the client reconnects and resyncs)
+SUBSCRIBER_QUEUE_MAX = 1000
+_PENDING = "parse_events_pending"
+
+
+class Event(NamedTuple):
+    # 0 for snapshot events, which describe the current state rather than a transition
+    id: int
+    user_id: int
+    resume_id: int
+    status: str
+    detail: Optional[str] = None
+
+    def encode(self) -> str:
+        data = json.dumps({"resume_id": self.resume_id, "status": self.status, "detail": self.detail}, separators=(",", ":"))
+        head = f"id: {self.id}\n" if self.id else ""
+        return f"{head}event: parse\ndata: {data}\n\n"
+
+
+class Subscription:
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop) -> None:
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE_MAX)
+        self.overflowed = False
+
+    def _put(self, item: Event) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def push(self, item: Event) -> None:
+        # Called from any thread; the queue is only touched on the subscriber's loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # Loop already closed: the stream is gone and will unsubscribe itself
+            pass
+
+
+# In-process fan-out to open event streams, by user. Brokers feed it; it never blocks the publisher.
+class Hub:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        broker.on_subscribe()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def deliver(self, events: Iterable[Event]) -> None:
+        with self._lock:
+            targets = [(item, list(self._subscribers.get(item.user_id, ()))) for item in events]
+        for item, subscribers in targets:
+            for subscription in subscribers:
+                subscription.push(item)
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+hub = Hub()
+
+
+# Publishing is transactional for both backends: events ride on the session and only reach subscribers
+# once the state change they describe has committed.
+class LocalBroker:
+    name = "local"
+
+    def __init__(self) -> None:
+        self._ids = itertools.count(1)
+
+    def publish(self, db: Session, events: Sequence[Event]) -> None:
+        db.info.setdefault(_PENDING, []).extend(events)
+
+    def committed(self, events: List[Event]) -> None:
+        hub.deliver(e._replace(id=next(self._ids)) for e in events)
+
+    def replay(self, db: Session, user_id: int, after_id: int) -> List[Event]:
+        # Nothing is kept; a reconnecting client gets the snapshot instead
+        return []
+
+    def on_subscribe(self) -> None:
+        pass
+
+    def maintain(self, db: Session) -> None:
+        pass
+
+
+# Ids are assigned at insert, not at commit, so concurrent publishers can commit out of id order: a row
+# may become visible below ids already read. Skipped ids are re-checked for GAP_WINDOW_SECONDS (longer
+# than any publishing transaction stays open) before they are written off as rolled back or pruned.
+GAP_WINDOW_SECONDS = 60
+_GAP_MAX = 1000
+
+
+class Tail:
+    def __init__(self, last_id: int) -> None:
+        self.last_id = last_id
+        self.gaps: Dict[int, float] = {}
+
+    def read(self, db: Session) -> List[Event]:
+        now = time.monotonic()
+        self.gaps = {gap: deadline for gap, deadline in self.gaps.items() if deadline > now}
+        visible = ParseEvent.id > self.last_id
+        if self.gaps:
+            visible = or_(visible, ParseEvent.id.in_(list(self.gaps)))
+        rows = db.execute(
+            select(ParseEvent.id, ParseEvent.user_id, ParseEvent.resume_id, ParseEvent.status, ParseEvent.detail)
+            .where(visible)
+            .order_by(ParseEvent.id)
+            .limit(5000)
+        ).all()
+        for row in rows:
+            if row.id > self.last_id:
+                for gap in range(max(self.last_id + 1, row.id - _GAP_MAX), row.id):
+                    self.gaps[gap] = now + GAP_WINDOW_SECONDS
+                self.last_id = row.id
+            else:
+                self.gaps.pop(row.id, None)
+        return [Event(*row) for row in rows]
+
+
+# Events go into parse_events in the publisher's transaction. Each API process that has subscribers
+# runs one poller that tails the table and fans out locally, so the database sees one query per
+# interval per process however many clients are connected.
+class DatabaseBroker:
+    name = "database"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_pruned = 0.0
+
+    def publish(self, db: Session, events: Sequence[Event]) -> None:
+        now = datetime.utcnow()
+        db.execute(
+            insert(ParseEvent),
+            [
+                {"user_id": e.user_id, "resume_id": e.resume_id, "status": e.status, "detail": e.detail, "created_at": now}
+                for e in events
+            ],
+        )
+
+    def committed(self, events: List[Event]) -> None:
+        pass
+
+    def replay(self, db: Session, user_id: int, after_id: int) -> List[Event]:
+        rows = db.execute(
+            select(ParseEvent.id, ParseEvent.user_id, ParseEvent.resume_id, ParseEvent.status, ParseEvent.detail)
+            .where(ParseEvent.user_id == user_id, ParseEvent.id > after_id)
+            .order_by(ParseEvent.id)
+            .limit(SUBSCRIBER_QUEUE_MAX)
+        ).all()
+        return [Event(*row) for row in rows]
+
+    def on_subscribe(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name="events-poller", daemon=True)
+                self._thread.start()
+
+    def _poll(self) -> None:
+        db = SessionLocal()
+        try:
+            tail = Tail(db.scalar(select(func.max(ParseEvent.id))) or 0)
+        finally:
+            db.close()
+        while True:
+            time.sleep(settings.events_poll_interval)
+            if not hub.count():
+                continue
+            db = SessionLocal()
+            try:
+                events = tail.read(db)
+            except Exception:
+                logger.exception("Polling parse events failed")
+                continue
+            finally:
+                db.close()
+            if events:
+                hub.deliver(events)
+
+    def maintain(self, db: Session) -> None:
+        # Called by the parse worker while idle: events only need to outlive a client reconnect
+        if time.monotonic() - self._last_pruned < 60:
+            return
+        self._last_pruned = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.events_retention_seconds)
+        db.execute(delete(ParseEvent).where(ParseEvent.created_at < cutoff))
+        db.commit()
+
+
+def create_broker():
+    if settings.events_backend == "database":
+        return DatabaseBroker()
+    if settings.events_backend != "local":
+        raise RuntimeError(f"Unknown EVENTS_BACKEND {settings.events_backend!r}")
+    return LocalBroker()
+
+
+broker = create_broker()
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session: Session) -> None:
+    events = session.info.pop(_PENDING, None)
+    if events:
+        broker.committed(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def publish(db: Session, user_id: int, resume_ids: Iterable[int], status: str, detail: Optional[str] = None) -> None:
+    events = [Event(0, user_id, rid, status, detail) for rid in resume_ids]
+    if events:
+        broker.publish(db, events)
+
+
+def publish_for_resumes(db: Session, resume_ids: Sequence[int], status: str, detail: Optional[str] = None) -> None:
+    # For callers that only know resume ids (the worker's claim and failure paths)
+    if not resume_ids:
+        return
+    owners = db.execute(select(Resume.id, Resume.user_id).where(Resume.id.in_(resume_ids))).all()
+    events = [Event(0, user_id, rid, status, detail) for rid, user_id in owners]
+    if events:
+        broker.publish(db, events)
+
+
+def snapshot(db: Session, user_id: int, resume_ids: Sequence[int] = (), last_event_id: int = 0) -> List[Event]:
+    # What a new stream starts with: events missed since Last-Event-ID (database backend), then the
+    # current state of the requested resumes, or of all the caller's unfinished ones
+    events = broker.replay(db, user_id, last_event_id) if last_event_id else []
+    if resume_ids:
+        wanted = set(resume_ids)
+        events = [e for e in events if e.resume_id in wanted]
+    query = select(Resume.id, Resume.parsed, Resume.parse_status, Resume.parse_detail).where(Resume.user_id == user_id)
+    if resume_ids:
+        query = query.where(Resume.id.in_(resume_ids))
+    else:
+        query = query.where(Resume.parsed.is_(False), Resume.parse_status.is_(None))
+    rows = db.execute(query.order_by(Resume.id)).all()
+    pending = [rid for rid, parsed, status, _ in rows if not parsed and status not in TERMINAL]
+    running = set(
+        db.scalars(select(ParseJob.resume_id).where(ParseJob.resume_id.in_(pending), ParseJob.status == "running")).all()
+    ) if pending else set()
+    for rid, parsed, status, detail in rows:
+        # Rows parsed before parse_status existed have only the flag
+        status = status or (PARSED if parsed else None)
+        if status in TERMINAL:
+            events.append(Event(0, user_id, rid, status, detail))
+        else:
+            events.append(Event(0, user_id, rid, PARSING if rid in running else QUEUED))
+    return events
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import MatchScore, Resume
+from . import score_service
+
+FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+COLUMNS = ("rank", "resume_id", "filename", "score", "skills", "parse_status", "created_at")
+# Rows fetched per round trip from the server-side cursor, and written per chunk
+BATCH_SIZE = 500
+
+
+def export_version(db: Session, job_id: int, user_id: int) -> int:
+    # Exports read only materialized scores, so a ranking is always produced by one scorer over the
+    # job and the caller's resumes as they are now; while either is being rescored the client is asked
+    # to come back
+    version = score_service.active_version(db)
+    if version is None or score_service.scores_pending(db, job_id, Resume.user_id == user_id):
+        raise HTTPException(
+            status_code=503, detail="Scores for this job are being computed, retry shortly", headers={"Retry-After": "10"}
+        )
+    return version
+
+
+def ranked_query(job_id: int, user_id: int, version: int, min_score: float = 0.0, limit: Optional[int] = None) -> Select:
+    # Walks ix_match_scores_job_user_version_score backwards, so rows arrive already ranked
+    query = (
+        select(
+            MatchScore.resume_id,
+            MatchScore.score,
+            Resume.filename,
+            Resume.skills,
+            Resume.parse_status,
+            Resume.created_at,
+        )
+        .join(Resume, Resume.id == MatchScore.resume_id)
+        .where(
+            MatchScore.job_id == job_id,
+            MatchScore.user_id == user_id,
+            MatchScore.scorer_version == version,
+            MatchScore.score > min_score,
+        )
+        .order_by(MatchScore.score.desc(), MatchScore.resume_id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    return query.limit(limit) if limit else query
+
+
+def _record(rank: int, row) -> dict:
+    resume_id, score, filename, skills, parse_status, created_at = row
+    return {
+        "rank": rank,
+        "resume_id": resume_id,
+        "filename": filename,
+        "score": round(score * 100, 2),
+        "skills": skills or [],
+        "parse_status": parse_status,
+        "created_at": created_at.isoformat() if created_at else None,
+    }
+
+
+def encode(fmt: str, batch: Sequence, first_rank: int) -> str:
+    records = [_record(first_rank + i, row) for i, row in enumerate(batch)]
+    if fmt == "ndjson":
+        return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        record["skills"] = ";".join(record["skills"])
+        writer.writerow([record[column] for column in COLUMNS])
+    return buffer.getvalue()
+
+
+def header(fmt: str) -> str:
+    if fmt != "csv":
+        return ""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(COLUMNS)
+    return buffer.getvalue()
+
+
+def _stream(fmt: str, partitions: Iterable[List]) -> Iterator[str]:
+    rank = 1
+    for batch in partitions:
+        yield encode(fmt, batch, rank)
+        rank += len(batch)
+
+
+def stream_ranked(session_factory, query: Select, fmt: str) -> Iterator[str]:
+    # Runs after the request's own session has been closed, so it owns a session for the whole stream.
+    # The header goes out before the query runs, so the first byte never waits on the database.
+    head = header(fmt)
+    if head:
+        yield head
+    db = session_factory()
+    try:
+        yield from _stream(fmt, db.execute(query).partitions())
+    finally:
+        db.close()
+
+
+async def stream_ranked_async(session_factory, query: Select, fmt: str) -> AsyncIterator[str]:
+    head = header(fmt)
+    if head:
+        yield head
+    db: AsyncSession = session_factory()
+    try:
+        rank = 1
+        result = await db.stream(query)
+        async for batch in result.partitions():
+            yield encode(fmt, batch, rank)
+            rank += len(batch)
+    finally:
+        await db.close()
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..database import insert_ignore
+from ..models import Job, JobFeatures, JobSkill, Resume, ResumeFeatures, ResumeSkill, Term
+from ..nlp import canonical_skills, tokenize
+from . import dedup_service, search_service, snapshot_service
+from .index_service import Features, normalize_skills, resume_index
+from .tfidf_service import Vocabulary
+
+MAX_TERM_LENGTH = 255
+_CHUNK = 500
+# How often a process pulls feature rows written by other processes (parse worker, other API workers)
+INDEX_SYNC_INTERVAL_SECONDS = 1.0
+
+vocabulary = Vocabulary()
+_sync_lock = threading.Lock()
+_sync_state = {"watermark": datetime.min, "checked_at": 0.0}
+# Term ids seen inside a transaction reach the process-wide vocabulary only once it commits: ids of terms
+# inserted by a transaction that rolls back are handed out again, to other terms
+_PENDING_TERMS = "vocabulary_pending"
+
+
+def pack_ids(values: Iterable[int]) -> bytes:
+    return array("I", values).tobytes()
+
+
+def unpack_ids(blob: Optional[bytes]) -> array:
+    values = array("I")
+    values.frombytes(blob or b"")
+    return values
+
+
+def _chunks(items: Sequence[str]) -> Iterable[Sequence[str]]:
+    for start in range(0, len(items), _CHUNK):
+        yield items[start : start + _CHUNK]
+
+
+def term_ids(db: Session, terms: Iterable[str]) -> Dict[str, int]:
+    ids: Dict[str, int] = {}
+    missing: List[str] = []
+    for term in set(terms):
+        term_id = vocabulary.get(term)
+        if term_id is None:
+            missing.append(term)
+        else:
+            ids[term] = term_id
+    if not missing:
+        return ids
+
+    found: Dict[str, int] = {}
+    for chunk in _chunks(missing):
+        found.update(db.execute(select(Term.term, Term.id).where(Term.term.in_(chunk))).all())
+    new_terms = [t for t in missing if t not in found]
+    if new_terms:
+        # Concurrent writers may insert the same terms; the conflict clause makes that a no-op
+        db.execute(insert_ignore(db, Term), [{"term": t} for t in new_terms])
+        for chunk in _chunks(new_terms):
+            found.update(db.execute(select(Term.term, Term.id).where(Term.term.in_(chunk))).all())
+    db.info.setdefault(_PENDING_TERMS, {}).update(found)
+    ids.update(found)
+    return ids
+
+
+@event.listens_for(Session, "after_commit")
+def _learn_terms(session: Session) -> None:
+    found = session.info.pop(_PENDING_TERMS, None)
+    if found:
+        vocabulary.update(found)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_terms(session: Session) -> None:
+    session.info.pop(_PENDING_TERMS, None)
+
+
+# Tokenized text and normalized skills: the CPU-bound half of feature extraction, no database access
+Prepared = Tuple[Counter, FrozenSet[str]]
+
+
+def prepare_features(text: Optional[str], skills: Optional[Iterable[str]]) -> Prepared:
+    counts = Counter(t for t in tokenize(text or "") if len(t) <= MAX_TERM_LENGTH)
+    # Job skills are free-form input, so synonyms ("k8s") are folded to their canonical names here
+    return counts, normalize_skills(canonical_skills(skills))
+
+
+def compute_features(
+    db: Session, text: Optional[str], skills: Optional[Iterable[str]], prepared: Optional[Prepared] = None
+) -> Features:
+    counts, normalized = prepared or prepare_features(text, skills)
+    ids = term_ids(db, counts)
+    return {ids[t]: c for t, c in counts.items()}, normalized
+
+
+def _fill(row: Union[ResumeFeatures, JobFeatures], features: Features) -> None:
+    term_freqs, skills = features
+    ordered = sorted(term_freqs)
+    row.term_ids = pack_ids(ordered)
+    row.term_counts = pack_ids(term_freqs[t] for t in ordered)
+    row.skills = sorted(skills)
+    row.updated_at = datetime.utcnow()
+
+
+def _decode(term_ids_blob: bytes, term_counts_blob: bytes, skills: Optional[list]) -> Features:
+    return dict(zip(unpack_ids(term_ids_blob), unpack_ids(term_counts_blob))), normalize_skills(skills)
+
+
+def save_resume_features(db: Session, resume_id: int, text: Optional[str], skills: Optional[List[str]]) -> Features:
+    features = compute_features(db, text, skills)
+    row = db.get(ResumeFeatures, resume_id) or ResumeFeatures(resume_id=resume_id)
+    _fill(row, features)
+    signature = dedup_service.signature(text)
+    row.minhash = dedup_service.pack(signature)
+    db.add(row)
+    search_service.replace_skills(db, ResumeSkill, resume_id, features[1])
+    dedup_service.replace_bands(db, resume_id, signature)
+    return features
+
+
+def save_job_features(
+    db: Session, job_id: int, description: Optional[str], skills: Optional[List[str]], prepared: Optional[Prepared] = None
+) -> Features:
+    features = compute_features(db, description, skills, prepared)
+    row = db.get(JobFeatures, job_id) or JobFeatures(job_id=job_id)
+    _fill(row, features)
+    db.add(row)
+    search_service.replace_skills(db, JobSkill, job_id, features[1])
+    return features
+
+
+def load_resume_features(db: Session, resume_ids: Sequence[int]) -> Dict[int, Features]:
+    rows = db.execute(
+        select(ResumeFeatures.resume_id, ResumeFeatures.term_ids, ResumeFeatures.term_counts, ResumeFeatures.skills)
+        .where(ResumeFeatures.resume_id.in_(resume_ids))
+    )
+    return {rid: _decode(ids, counts, skills) for rid, ids, counts, skills in rows}
+
+
+def load_job_features(db: Session, job_ids: Sequence[int]) -> Dict[int, Features]:
+    rows = db.execute(
+        select(JobFeatures.job_id, JobFeatures.term_ids, JobFeatures.term_counts, JobFeatures.skills)
+        .where(JobFeatures.job_id.in_(job_ids))
+    )
+    return {jid: _decode(ids, counts, skills) for jid, ids, counts, skills in rows}
+
+
+def backfill(db: Session) -> None:
+    # One-off path for rows created before the feature store existed
+    resumes = db.execute(
+        select(Resume.id, Resume.content_text, Resume.skills)
+        .outerjoin(ResumeFeatures, ResumeFeatures.resume_id == Resume.id)
+        .where(Resume.parsed.is_(True), ResumeFeatures.resume_id.is_(None))
+    ).all()
+    for resume_id, text, skills in resumes:
+        save_resume_features(db, resume_id, text, skills)
+    jobs = db.execute(
+        select(Job.id, Job.description, Job.skills)
+        .outerjoin(JobFeatures, JobFeatures.job_id == Job.id)
+        .where(JobFeatures.job_id.is_(None))
+    ).all()
+    for job_id, description, skills in jobs:
+        save_job_features(db, job_id, description, skills)
+    if resumes or jobs:
+        db.commit()
+    search_service.backfill_skills(db)
+    dedup_service.backfill(db)
+
+
+def _changed_resumes(db: Session, since: datetime) -> Iterator[Tuple[int, int, Features, datetime]]:
+    rows = db.execute(
+        select(
+            Resume.id,
+            Resume.user_id,
+            ResumeFeatures.term_ids,
+            ResumeFeatures.term_counts,
+            ResumeFeatures.skills,
+            ResumeFeatures.updated_at,
+        )
+        .join(ResumeFeatures, ResumeFeatures.resume_id == Resume.id)
+        .where(ResumeFeatures.updated_at >= since)
+        .execution_options(yield_per=1000)
+    )
+    for resume_id, user_id, ids, counts, skills, updated_at in rows:
+        yield resume_id, user_id, _decode(ids, counts, skills), updated_at
+
+
+def _load_jobs(db: Session, since: datetime) -> datetime:
+    watermark = since
+    jobs = db.execute(
+        select(JobFeatures.job_id, JobFeatures.term_ids, JobFeatures.term_counts, JobFeatures.skills, JobFeatures.updated_at)
+        .where(JobFeatures.updated_at >= since)
+        .execution_options(yield_per=1000)
+    )
+    for job_id, ids, counts, skills, updated_at in jobs:
+        resume_index.index_job(job_id, _decode(ids, counts, skills))
+        watermark = max(watermark, updated_at)
+    return watermark
+
+
+def _load_into_index(db: Session, since: datetime) -> datetime:
+    watermark = since
+    for resume_id, user_id, features, updated_at in _changed_resumes(db, since):
+        resume_index.add_resume(resume_id, user_id, features)
+        watermark = max(watermark, updated_at)
+    return max(watermark, _load_jobs(db, since))
+
+
+def _attach(db: Session, snapshot: snapshot_service.CorpusSnapshot, since: datetime) -> datetime:
+    # The resumes written after the snapshot was built are read first and swapped in with it in one step,
+    # so no reader sees the new generation without them
+    changed = list(_changed_resumes(db, snapshot.watermark))
+    resume_index.attach(snapshot, [(resume_id, user_id, features) for resume_id, user_id, features, _ in changed])
+    return max([since, snapshot.watermark, _load_jobs(db, since)] + [updated_at for *_, updated_at in changed])
+
+
+def warm_index(db: Session) -> None:
+    with _sync_lock:
+        resume_index.clear()
+        snapshot = snapshot_service.open_snapshot()
+        if snapshot is not None:
+            _sync_state["watermark"] = _attach(db, snapshot, datetime.min)
+        else:
+            _sync_state["watermark"] = _load_into_index(db, datetime.min)
+        _sync_state["checked_at"] = time.monotonic()
+
+
+def sync_index(db: Session, force: bool = False) -> None:
+    # Incremental catch-up on rows written elsewhere; `>=` re-applies rows sharing the watermark
+    # timestamp, which is harmless because adding features is idempotent. A snapshot generation renamed
+    # into place since the last check replaces the resumes held in process. `force` skips the interval,
+    # for callers that must see every write committed before they started.
+    with _sync_lock:
+        if not force and time.monotonic() - _sync_state["checked_at"] < INDEX_SYNC_INTERVAL_SECONDS:
+            return
+        snapshot = snapshot_service.poll(resume_index.snapshot)
+        if snapshot is not None:
+            _sync_state["watermark"] = _attach(db, snapshot, _sync_state["watermark"])
+        else:
+            _sync_state["watermark"] = _load_into_index(db, _sync_state["watermark"])
+        _sync_state["checked_at"] = time.monotonic()
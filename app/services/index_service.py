@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import heapq
+import threading
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..nlp import SKILL_WEIGHT, TEXT_WEIGHT
+from .tfidf_service import idf_vector
+
+if TYPE_CHECKING:
+    from .snapshot_service import CorpusSnapshot
+
+# (term id -> count, normalized skills)
+Features = Tuple[Dict[int, int], FrozenSet[str]]
+
+
+def normalize_skills(skills: Optional[Iterable[str]]) -> FrozenSet[str]:
+    return frozenset(s.lower() for s in skills or [])
+
+
+def _overlap(hits: int, size_a: int, size_b: int) -> float:
+    # Jaccard from the intersection size alone: |A & B| / (|A| + |B| - |A & B|)
+    union = size_a + size_b - hits
+    return hits / float(union) if union else 0.0
+
+
+def _overlaps(hits: np.ndarray, sizes: np.ndarray, size_b: int) -> np.ndarray:
+    union = (sizes + size_b - hits).astype(np.float64)
+    return np.divide(hits, union, out=np.zeros_like(union), where=union > 0)
+
+
+# In-process inverted index over parsed resume term ids and skills, partitioned by owner.
+# Ranking a job only walks the postings of the job's own terms, so its cost depends on how many
+# resumes share a term with the job rather than on the size of the corpus. It also keeps the
+# resume document frequencies that the TF-IDF scorer works from. Features are computed and
+# persisted by feature_service; the index never sees raw text.
+#
+# With a corpus snapshot attached (snapshot_service), most resumes are served from its memory-mapped
+# arrays and only the ones written since it was built are held here as Python objects. Snapshot rows
+# superseded by a newer copy here, or deleted, are shadowed; document frequencies here are then a delta
+# on top of the snapshot's.
+class ResumeIndex:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._base: Optional[CorpusSnapshot] = None
+        self._shadowed: Set[int] = set()
+        self._removed: Set[int] = set()
+        self._doc_freqs: List[int] = []
+        self._idf: Optional[np.ndarray] = None
+        self._owners: Dict[int, int] = {}
+        self._term_freqs: Dict[int, Dict[int, int]] = {}
+        self._skills: Dict[int, FrozenSet[str]] = {}
+        self._token_postings: Dict[int, Dict[int, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self._skill_postings: Dict[int, Dict[str, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self._jobs: Dict[int, Features] = {}
+
+    def _grow(self, term_freqs: Iterable[int]) -> None:
+        width = max(term_freqs, default=-1) + 1
+        if len(self._doc_freqs) < width:
+            self._doc_freqs.extend([0] * (width - len(self._doc_freqs)))
+
+    def _shadow(self, resume_id: int) -> None:
+        if self._base is None or resume_id in self._shadowed:
+            return
+        row = self._base.row(resume_id)
+        if row < 0:
+            return
+        self._shadowed.add(resume_id)
+        term_ids = self._base.terms(row)[0].tolist()
+        self._grow(term_ids)
+        for term_id in term_ids:
+            self._doc_freqs[term_id] -= 1
+        self._idf = None
+
+    def attach(self, snapshot: Optional[CorpusSnapshot], resumes: Iterable[Tuple[int, int, Features]] = ()) -> None:
+        # Swaps in a snapshot generation together with the resumes written after it was built, which
+        # replace every resume held here. Deletions made here that it still contains stay hidden.
+        with self._lock:
+            removed = [rid for rid in self._removed if snapshot is not None and snapshot.row(rid) >= 0]
+            jobs = self._jobs
+            self.clear()
+            self._jobs = jobs
+            for features in jobs.values():
+                self._grow(features[0])
+            self._base = snapshot
+            for resume_id in removed:
+                self.remove_resume(resume_id)
+            for resume_id, user_id, features in resumes:
+                self.add_resume(resume_id, user_id, features)
+
+    @property
+    def snapshot(self) -> Optional[CorpusSnapshot]:
+        return self._base
+
+    def add_resume(self, resume_id: int, user_id: int, features: Features) -> None:
+        term_freqs, skill_set = features
+        with self._lock:
+            self._drop(resume_id)
+            self._removed.discard(resume_id)
+            self._owners[resume_id] = user_id
+            self._term_freqs[resume_id] = term_freqs
+            self._skills[resume_id] = skill_set
+            self._grow(term_freqs)
+            token_postings = self._token_postings[user_id]
+            for term_id in term_freqs:
+                token_postings[term_id].add(resume_id)
+                self._doc_freqs[term_id] += 1
+            skill_postings = self._skill_postings[user_id]
+            for skill in skill_set:
+                skill_postings[skill].add(resume_id)
+            self._idf = None
+
+    def remove_resume(self, resume_id: int) -> None:
+        with self._lock:
+            self._drop(resume_id)
+            if resume_id in self._shadowed:
+                self._removed.add(resume_id)
+
+    def _drop(self, resume_id: int) -> None:
+        with self._lock:
+            self._shadow(resume_id)
+            user_id = self._owners.pop(resume_id, None)
+            if user_id is None:
+                return
+            token_postings = self._token_postings[user_id]
+            for term_id in self._term_freqs.pop(resume_id, ()):
+                self._doc_freqs[term_id] -= 1
+                postings = token_postings.get(term_id)
+                if postings is not None:
+                    postings.discard(resume_id)
+                    if not postings:
+                        del token_postings[term_id]
+            skill_postings = self._skill_postings[user_id]
+            for skill in self._skills.pop(resume_id, ()):
+                postings = skill_postings.get(skill)
+                if postings is not None:
+                    postings.discard(resume_id)
+                    if not postings:
+                        del skill_postings[skill]
+            self._idf = None
+
+    def index_job(self, job_id: int, features: Features) -> None:
+        with self._lock:
+            self._jobs[job_id] = features
+            self._grow(features[0])
+
+    def remove_job(self, job_id: int) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def has_job(self, job_id: int) -> bool:
+        with self._lock:
+            return job_id in self._jobs
+
+    def locate(self, resume_ids: Sequence[int]) -> Tuple[Optional[CorpusSnapshot], np.ndarray, Dict[int, Features]]:
+        # The snapshot row of each resume served from the snapshot (-1 for the others), and the
+        # features of those held here. Ids in neither are unknown to the index.
+        with self._lock:
+            base = self._base
+            rows = base.locate(resume_ids) if base is not None else np.full(len(resume_ids), -1, dtype=np.int64)
+            held: Dict[int, Features] = {}
+            for i, resume_id in enumerate(resume_ids):
+                if resume_id in self._owners:
+                    held[resume_id] = self._term_freqs[resume_id], self._skills[resume_id]
+                    rows[i] = -1
+                elif resume_id in self._shadowed:
+                    rows[i] = -1
+            return base, rows, held
+
+    def job_features(self, job_id: int) -> Optional[Features]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _doc_count(self) -> int:
+        base_rows = self._base.rows - len(self._shadowed) if self._base is not None else 0
+        return base_rows + len(self._owners)
+
+    def idf(self, width: int = 0) -> np.ndarray:
+        # Covers every term id seen so far (job-only terms have df = 0), and at least `width` ids
+        with self._lock:
+            base_freqs = self._base.doc_freqs if self._base is not None else np.zeros(0, dtype=np.uint32)
+            width = max(width, len(self._doc_freqs), base_freqs.size)
+            if self._idf is None or self._idf.size < width:
+                doc_freqs = np.zeros(width, dtype=np.int64)
+                doc_freqs[: base_freqs.size] += base_freqs
+                doc_freqs[: len(self._doc_freqs)] += self._doc_freqs
+                self._idf = idf_vector(doc_freqs, self._doc_count())
+            return self._idf
+
+    def top_k(self, job_id: int, user_id: int, k: int) -> List[Tuple[int, float]]:
+        with self._lock:
+            features = self._jobs.get(job_id)
+            if features is None or k <= 0:
+                return []
+            job_terms, job_skills = features
+
+            token_hits: Dict[int, int] = defaultdict(int)
+            token_postings = self._token_postings.get(user_id, {})
+            for term_id in job_terms:
+                for resume_id in token_postings.get(term_id, ()):
+                    token_hits[resume_id] += 1
+
+            skill_hits: Dict[int, int] = defaultdict(int)
+            skill_postings = self._skill_postings.get(user_id, {})
+            for skill in job_skills:
+                for resume_id in skill_postings.get(skill, ()):
+                    skill_hits[resume_id] += 1
+
+            scored = []
+            for resume_id in token_hits.keys() | skill_hits.keys():
+                text_overlap = _overlap(token_hits.get(resume_id, 0), len(self._term_freqs[resume_id]), len(job_terms))
+                skill_overlap = _overlap(skill_hits.get(resume_id, 0), len(self._skills[resume_id]), len(job_skills))
+                scored.append((TEXT_WEIGHT * text_overlap + SKILL_WEIGHT * skill_overlap, resume_id))
+            if self._base is not None:
+                scored.extend(self._base_top_k(self._base, user_id, job_terms, job_skills, k))
+
+        best = heapq.nlargest(k, scored)
+        return [(resume_id, float(score)) for score, resume_id in best]
+
+    def _base_top_k(
+        self, base: CorpusSnapshot, user_id: int, job_terms: Dict[int, int], job_skills: FrozenSet[str], k: int
+    ) -> List[Tuple[float, int]]:
+        # The same overlap ranking over the owner's row range of the snapshot, from its postings arrays
+        lo, hi = base.user_rows(user_id)
+        if lo == hi:
+            return []
+        token_hits = base.term_hits(lo, hi, job_terms)
+        columns = [base.skill_columns[s] for s in job_skills if s in base.skill_columns]
+        skill_hits = base.skill_hits(lo, hi, columns)
+        candidates = np.flatnonzero((token_hits > 0) | (skill_hits > 0))
+        resume_ids = base.resume_ids[lo + candidates]
+        if self._shadowed:
+            keep = ~np.isin(resume_ids, np.fromiter(self._shadowed, dtype=np.int64, count=len(self._shadowed)))
+            candidates, resume_ids = candidates[keep], resume_ids[keep]
+        text = _overlaps(token_hits[candidates], base.term_sizes(lo, hi)[candidates], len(job_terms))
+        skills = _overlaps(skill_hits[candidates], base.skill_sizes[lo + candidates], len(job_skills))
+        scores = TEXT_WEIGHT * text + SKILL_WEIGHT * skills
+        # Best first by (score, resume id), as heapq.nlargest orders the merged tuples
+        best = np.lexsort((resume_ids, scores))[::-1][:k]
+        return [(float(scores[i]), int(resume_ids[i])) for i in best]
+
+    def stats(self) -> dict:
+        with self._lock:
+            base = self._base
+            return {
+                "snapshot_generation": base.generation if base is not None else None,
+                "snapshot_resumes": base.rows - len(self._shadowed) if base is not None else 0,
+                "snapshot_bytes": base.nbytes if base is not None else 0,
+                "in_process_resumes": len(self._owners),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._base = None
+            self._shadowed.clear()
+            self._removed.clear()
+            self._doc_freqs.clear()
+            self._idf = None
+            self._owners.clear()
+            self._term_freqs.clear()
+            self._skills.clear()
+            self._token_postings.clear()
+            self._skill_postings.clear()
+            self._jobs.clear()
+
+
+resume_index = ResumeIndex()
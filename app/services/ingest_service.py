@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import zipfile
+from contextlib import ExitStack
+from datetime import datetime
+from typing import BinaryIO, Callable, List, Sequence, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Blob, Resume
+from ..utils.blob_store import store
+from ..utils.file_storage import save_stream
+from . import blob_service, event_service, parse_service, score_service
+from .feature_service import save_resume_features
+from .index_service import resume_index
+
+
+settings = get_settings()
+
+RESUME_EXTENSIONS = {".pdf", ".docx", ".txt"}
+
+# (original filename, opener returning a readable binary stream)
+Source = Tuple[str, Callable[[], BinaryIO]]
+
+
+def _extension(name: str) -> str:
+    return os.path.splitext(name)[1].lower()
+
+
+def _zip_sources(upload: UploadFile, stack: ExitStack, skipped: List[str]) -> List[Source]:
+    # Reads only the central directory here; members are decompressed one at a time while saving
+    archive = stack.enter_context(zipfile.ZipFile(upload.file))
+    sources: List[Source] = []
+    for info in archive.infolist():
+        name = info.filename
+        base = os.path.basename(name)
+        if info.is_dir() or not base or base.startswith(".") or name.startswith("__MACOSX/"):
+            continue
+        if _extension(base) not in RESUME_EXTENSIONS:
+            skipped.append(f"{upload.filename}:{name} (unsupported type)")
+            continue
+        if info.file_size > settings.bulk_max_member_bytes:
+            skipped.append(f"{upload.filename}:{name} (too large)")
+            continue
+        sources.append((base, lambda info=info: archive.open(info)))
+    return sources
+
+
+def collect_sources(files: Sequence[UploadFile], stack: ExitStack) -> Tuple[List[Source], List[str]]:
+    sources: List[Source] = []
+    skipped: List[str] = []
+    for upload in files:
+        name = upload.filename or ""
+        if not name:
+            continue
+        if _extension(name) == ".zip":
+            try:
+                sources.extend(_zip_sources(upload, stack, skipped))
+            except zipfile.BadZipFile:
+                skipped.append(f"{name} (invalid zip archive)")
+        elif _extension(name) in RESUME_EXTENSIONS:
+            sources.append((name, lambda upload=upload: upload.file))
+        else:
+            skipped.append(f"{name} (unsupported type)")
+    return sources, skipped
+
+
+def ingest(db: Session, user_id: int, sources: Sequence[Source]) -> List[Tuple[int, str, str]]:
+    originals: List[str] = []
+    blobs: List[Blob] = []
+    written: List[str] = []
+    try:
+        for original, opener in sources:
+            with opener() as stream:
+                stored = save_stream(stream, original)
+            written.append(stored.name)
+            originals.append(original)
+            blobs.append(blob_service.acquire(db, stored))
+
+        # One multi-row INSERT for the resumes and one for their parse jobs, committed together.
+        # Blobs that were parsed before are filled from the cache and never queued.
+        now = datetime.utcnow()
+        texts = [blob_service.cached_text(blob) for blob in blobs]
+        rows = []
+        for blob, text in zip(blobs, texts):
+            row = {"user_id": user_id, "filename": blob.filename, "blob_sha256": blob.sha256, "parsed": False, "created_at": now}
+            if text is not None:
+                row.update(
+                    content_text=text,
+                    skills=blob.skills,
+                    parsed=True,
+                    parse_status=blob.parse_status or parse_service.PARSED,
+                    parse_detail=blob.parse_detail,
+                )
+            rows.append(row)
+        ids = db.scalars(insert(Resume).returning(Resume.id, sort_by_parameter_order=True), rows).all()
+
+        cached = []
+        pending = []
+        for rid, blob, text in zip(ids, blobs, texts):
+            if text is not None:
+                cached.append((rid, save_resume_features(db, rid, text, blob.skills)))
+                event_service.publish(db, user_id, [rid], blob.parse_status or parse_service.PARSED, blob.parse_detail)
+            else:
+                pending.append((rid, blob.filename))
+        parse_service.enqueue_many(db, pending)
+        score_service.enqueue_resumes(db, [rid for rid, _ in cached])
+        event_service.publish(db, user_id, [rid for rid, _ in pending], event_service.QUEUED)
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Only remove files no surviving blob points at; identical bytes may belong to other resumes
+        for key in written:
+            if db.scalar(select(Blob.sha256).where(Blob.filename == key)) is None:
+                store.delete(key)
+        raise
+    for rid, features in cached:
+        resume_index.add_resume(rid, user_id, features)
+    return [(rid, blob.filename, original) for rid, blob, original in zip(ids, blobs, originals)]
@@ -1,11 +1,128 @@
 from __future__ import annotations
 
-from typing import Tuple
+from collections import ChainMap
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from ..nlp import match_score
+import numpy as np
+from sqlalchemy.orm import Session, load_only
+
+from ..models import Resume
+from ..nlp import SKILL_WEIGHT, TEXT_WEIGHT, match_score
+from ..utils.metrics import scoring_seconds
+from .feature_service import load_job_features, load_resume_features, sync_index
+from .index_service import Features, resume_index
+from .snapshot_service import CorpusSnapshot
+from .tfidf_service import bitset_words, cosine_scores, jaccard_bitsets, skill_bitsets, term_arrays, tfidf_matrix
+
+# Top-K pulls this many overlap-ranked candidates per requested result and reranks them with TF-IDF
+RERANK_POOL_FACTOR = 5
+RERANK_POOL_MIN = 50
+
+_EMPTY: Features = ({}, frozenset())
 
 
 def score_resume_to_job(resume_text: str, resume_skills: list[str], jd_text: str, jd_skills: list[str]) -> float:
     return match_score(resume_text, resume_skills, jd_text, jd_skills)
 
 
+def _resumes(db: Session, resume_ids: Sequence[int]) -> Tuple[Optional[CorpusSnapshot], np.ndarray, Dict[int, Features]]:
+    # Snapshot rows for the resumes it serves (-1 elsewhere) and features for the rest, loaded from the
+    # feature store when the index does not have them yet
+    snapshot, rows, held = resume_index.locate(resume_ids)
+    missing = [rid for rid, row in zip(resume_ids, rows) if row < 0 and rid not in held]
+    if missing:
+        held.update(load_resume_features(db, missing))
+    return snapshot, rows, held
+
+
+def _job_features(db: Session, job_ids: Sequence[int]) -> List[Features]:
+    missing = [jid for jid in job_ids if not resume_index.has_job(jid)]
+    if missing:
+        for jid, features in load_job_features(db, missing).items():
+            resume_index.index_job(jid, features)
+    return [resume_index.job_features(jid) or _EMPTY for jid in job_ids]
+
+
+def score_many(db: Session, resume_ids: Sequence[int], job_ids: Sequence[int]) -> np.ndarray:
+    # N x M matrix of scores in [0, 1]: TF-IDF cosine over text blended with skill Jaccard.
+    # Reads only precomputed features; unknown or unparsed resumes and unknown jobs score 0.
+    with scoring_seconds.time("score_many"):
+        return _score_many(db, resume_ids, job_ids)
+
+
+def _skill_bits(
+    snapshot: Optional[CorpusSnapshot], rows: np.ndarray, held: List[Tuple[int, Features]], jobs: List[Features]
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Bitsets over the snapshot's skill columns, widened by any skill it has never seen. Snapshot rows are
+    # copied straight out of the mapping; only the resumes held in process and the jobs are built here.
+    base = snapshot.skill_columns if snapshot is not None else {}
+    extra: Dict[str, int] = {}
+    for _, skills in [features for _, features in held] + jobs:
+        for skill in skills:
+            if skill not in base and skill not in extra:
+                extra[skill] = len(base) + len(extra)
+    columns = ChainMap(extra, base)
+    words = bitset_words(len(base) + len(extra))
+    resume_bits = np.zeros((len(rows), words), dtype=np.uint64)
+    in_snapshot = np.flatnonzero(rows >= 0)
+    if in_snapshot.size:
+        resume_bits[in_snapshot, : snapshot.skill_bits.shape[1]] = snapshot.skill_bits[rows[in_snapshot]]
+    if held:
+        resume_bits[[i for i, _ in held]] = skill_bitsets([skills for _, (_, skills) in held], columns, words)
+    return resume_bits, skill_bitsets([skills for _, skills in jobs], columns, words)
+
+
+def _score_many(db: Session, resume_ids: Sequence[int], job_ids: Sequence[int]) -> np.ndarray:
+    sync_index(db)
+    snapshot, rows, features = _resumes(db, resume_ids)
+    jobs = _job_features(db, job_ids)
+    if not len(resume_ids) or not jobs:
+        return np.zeros((len(resume_ids), len(jobs)))
+
+    held = [(i, features.get(rid) or _EMPTY) for i, (rid, row) in enumerate(zip(resume_ids, rows)) if row < 0]
+    by_position = dict(held)
+    # Snapshot rows are views into the mapped file; nothing per resume is materialized as Python objects
+    resume_terms = [snapshot.terms(row) if row >= 0 else term_arrays(by_position[i][0]) for i, row in enumerate(rows)]
+    job_terms = [term_arrays(tf) for tf, _ in jobs]
+    width = max((int(ids.max()) + 1 for ids, _ in resume_terms + job_terms if ids.size), default=0)
+    idf = resume_index.idf(width)
+    text = cosine_scores(tfidf_matrix(resume_terms, idf), tfidf_matrix(job_terms, idf))
+    skills = jaccard_bitsets(*_skill_bits(snapshot, rows, held, jobs))
+    return TEXT_WEIGHT * text + SKILL_WEIGHT * skills
+
+
+def score_pair(db: Session, resume_id: int, job_id: int) -> float:
+    return float(score_many(db, [resume_id], [job_id])[0, 0])
+
+
+def top_resumes_for_job(db: Session, job_id: int, user_id: int, k: int) -> List[Tuple[Resume, float]]:
+    with scoring_seconds.time("top_k_live"):
+        return _top_resumes_for_job(db, job_id, user_id, k)
+
+
+def _top_resumes_for_job(db: Session, job_id: int, user_id: int, k: int) -> List[Tuple[Resume, float]]:
+    sync_index(db)
+    _job_features(db, [job_id])
+    candidates = resume_index.top_k(job_id, user_id, max(k * RERANK_POOL_FACTOR, RERANK_POOL_MIN))
+    if not candidates:
+        return []
+    candidate_ids = [resume_id for resume_id, _ in candidates]
+    # Catch-up only pulls written rows, so a resume deleted by another process stays in this index until
+    # the next snapshot generation. Candidates are checked against the database before the cut to k, so
+    # a deleted one never takes a slot, and dropped here once seen.
+    rows = (
+        db.query(Resume)
+        .options(load_only(Resume.id, Resume.filename, Resume.skills))
+        .filter(Resume.id.in_(candidate_ids))
+        .all()
+    )
+    by_id = {r.id: r for r in rows}
+    for resume_id in candidate_ids:
+        if resume_id not in by_id:
+            resume_index.remove_resume(resume_id)
+    candidate_ids = [resume_id for resume_id in candidate_ids if resume_id in by_id]
+    if not candidate_ids:
+        return []
+    scores = score_many(db, candidate_ids, [job_id])[:, 0]
+    order = np.argsort(-scores, kind="stable")[:k]
+    return [(by_id[candidate_ids[i]], float(scores[i])) for i in order]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Blob, ParseJob, Resume
+from . import blob_service, event_service, score_service
+from .feature_service import save_resume_features
+from .index_service import Features, resume_index
+from .resume_service import FAILED as PARSE_FAILED, PARSED, ParseResult
+
+
+settings = get_settings()
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def queue_depth(db: Session) -> int:
+    return db.scalar(select(func.count(ParseJob.id)).where(ParseJob.status.in_([QUEUED, RUNNING]))) or 0
+
+
+def ensure_capacity(db: Session, incoming: int = 1) -> None:
+    if queue_depth(db) + incoming > settings.parse_queue_max:
+        raise QueueFullError()
+
+
+def enqueue(db: Session, resume_id: int, path: str) -> ParseJob:
+    job = ParseJob(resume_id=resume_id, path=path, status=QUEUED)
+    db.add(job)
+    return job
+
+
+def enqueue_many(db: Session, items: List[Tuple[int, str]]) -> None:
+    if items:
+        db.execute(insert(ParseJob), [{"resume_id": rid, "path": path, "status": QUEUED} for rid, path in items])
+
+
+def store_result(
+    db: Session, resume: Resume, text: str, skills: list[str], status: Optional[str] = PARSED, detail: Optional[str] = None
+) -> Features:
+    resume.content_text = text
+    resume.skills = skills
+    resume.parsed = True
+    resume.parse_status = status
+    resume.parse_detail = detail
+    resume.version = (resume.version or 1) + 1
+    db.add(resume)
+    features = save_resume_features(db, resume.id, text, skills)
+    score_service.enqueue_resumes(db, [resume.id])
+    event_service.publish(db, resume.user_id, [resume.id], status or PARSED, detail)
+    return features
+
+
+def schedule(db: Session, resume: Resume, blob: Blob) -> Tuple[Optional[ParseJob], Optional[Features]]:
+    # Identical bytes were parsed before: reuse the cached result and skip the parsers entirely.
+    # Returns the queued job, or the features to index once the caller has committed.
+    text = blob_service.cached_text(blob)
+    if text is not None:
+        return None, store_result(db, resume, text, blob.skills or [], blob.parse_status or PARSED, blob.parse_detail)
+    event_service.publish(db, resume.user_id, [resume.id], event_service.QUEUED)
+    return enqueue(db, resume.id, blob.filename), None
+
+
+def queue_position(db: Session, job_id: int) -> int:
+    ahead = db.scalar(select(func.count(ParseJob.id)).where(ParseJob.status == QUEUED, ParseJob.id < job_id)) or 0
+    return ahead + 1
+
+
+def claim(db: Session, limit: int) -> List[Tuple[int, int, str]]:
+    # Compare-and-set on status so several workers can drain the same table without double work
+    candidates = db.execute(
+        select(ParseJob.id, ParseJob.resume_id, ParseJob.path)
+        .where(ParseJob.status == QUEUED)
+        .order_by(ParseJob.id)
+        .limit(limit)
+    ).all()
+    claimed = []
+    for job_id, resume_id, path in candidates:
+        result = db.execute(
+            update(ParseJob)
+            .where(ParseJob.id == job_id, ParseJob.status == QUEUED)
+            .values(status=RUNNING, started_at=datetime.utcnow(), attempts=ParseJob.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed.append((job_id, resume_id, path))
+    event_service.publish_for_resumes(db, [resume_id for _, resume_id, _ in claimed], event_service.PARSING)
+    db.commit()
+    return claimed
+
+
+def complete(db: Session, job_id: int, resume_id: int, result: ParseResult) -> None:
+    if result.status == PARSE_FAILED:
+        # Budget overruns and broken files are deterministic; retrying would only burn the budget again
+        fail(db, job_id, result.detail or "Parse failed", final=True)
+        return
+    resume = db.get(Resume, resume_id)
+    features = None
+    if resume is not None:
+        features = store_result(db, resume, result.text, result.skills, result.status, result.detail)
+        blob_service.cache_parse_result(db, resume.blob_sha256, result.text, result.skills, result.status, result.detail)
+    db.execute(update(ParseJob).where(ParseJob.id == job_id).values(status=DONE, finished_at=datetime.utcnow()))
+    db.commit()
+    if resume is not None and features is not None:
+        resume_index.add_resume(resume.id, resume.user_id, features)
+
+
+def fail(db: Session, job_id: int, error: str, final: bool = False) -> None:
+    job = db.get(ParseJob, job_id)
+    if job is None:
+        return
+    job.last_error = error[:1024]
+    if final or job.attempts >= settings.parse_max_attempts:
+        job.status = FAILED
+        job.finished_at = datetime.utcnow()
+        db.execute(
+            update(Resume).where(Resume.id == job.resume_id).values(parse_status=PARSE_FAILED, parse_detail=error[:512])
+        )
+        event_service.publish_for_resumes(db, [job.resume_id], event_service.FAILED, error[:512])
+    else:
+        job.status = QUEUED
+        event_service.publish_for_resumes(db, [job.resume_id], event_service.QUEUED, f"retrying: {error}"[:512])
+    db.add(job)
+    db.commit()
+
+
+def requeue_stale(db: Session, older_than: Optional[timedelta] = None, running: Iterable[int] = ()) -> int:
+    # Jobs left running by a worker that died mid-parse: queued again while attempts remain, otherwise
+    # failed the way fail() does. `running` is the caller's own in-flight jobs, which are never stale.
+    now = datetime.utcnow()
+    cutoff = now - (older_than or timedelta(seconds=settings.parse_stale_after_seconds))
+    stale = (ParseJob.status == RUNNING, ParseJob.started_at < cutoff)
+    skip = set(running)
+    error = "Worker stopped while parsing"
+    requeued: List[int] = []
+    failed: List[int] = []
+    candidates = db.execute(select(ParseJob.id, ParseJob.resume_id, ParseJob.attempts).where(*stale)).all()
+    for job_id, resume_id, attempts in candidates:
+        if job_id in skip:
+            continue
+        exhausted = attempts >= settings.parse_max_attempts
+        # Compare-and-set, as in claim(): a job that finished in the meantime is left alone
+        values = dict(status=FAILED, finished_at=now, last_error=error) if exhausted else dict(status=QUEUED)
+        if db.execute(update(ParseJob).where(ParseJob.id == job_id, *stale).values(**values)).rowcount == 1:
+            (failed if exhausted else requeued).append(resume_id)
+    if failed:
+        db.execute(update(Resume).where(Resume.id.in_(failed)).values(parse_status=PARSE_FAILED, parse_detail=error))
+        event_service.publish_for_resumes(db, failed, event_service.FAILED, error)
+    event_service.publish_for_resumes(db, requeued, event_service.QUEUED, f"retrying: {error}")
+    db.commit()
+    return len(requeued)
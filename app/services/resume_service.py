@@ -1,47 +1,164 @@
 from __future__ import annotations
 
-import io
 import os
-from typing import Tuple
-
-from pdfminer.high_level import extract_text as pdf_extract_text
-from docx import Document
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple, Optional, Tuple
 
+from ..config import get_settings
 from ..nlp import extract_skills
+from ..utils.blob_store import store
+
+
+settings = get_settings()
+
+PARSED = "parsed"
+TRUNCATED = "truncated"
+FAILED = "failed"
+
+
+class ParseError(Exception):
+    pass
+
+
+class ParseResult(NamedTuple):
+    text: str
+    skills: list[str]
+    status: str
+    detail: Optional[str] = None
 
 
-def parse_pdf(path: str) -> str:
+def limit_memory(memory_mb: Optional[int] = None) -> None:
+    # Process-pool initializer: caps the parser process's address space so a hostile file raises
+    # MemoryError instead of exhausting the host. No-op where `resource` is unavailable (Windows).
+    memory_mb = settings.parse_memory_mb if memory_mb is None else memory_mb
+    if memory_mb <= 0:
+        return
     try:
-        return pdf_extract_text(path) or ""
-    except Exception:
-        return ""
+        import resource
+    except ImportError:
+        return
+    limit = memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+@contextmanager
+def time_limit(seconds: float) -> Iterator[None]:
+    # Hard wall-clock limit via SIGALRM where possible (POSIX, main thread); the page loops below also
+    # check the deadline, which is the only limit elsewhere
+    usable = seconds > 0 and hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    if not usable:
+        yield
+        return
 
+    def _expired(signum, frame):
+        raise ParseError(f"timed out after {seconds:g}s")
 
-def parse_docx(path: str) -> str:
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
     try:
-        doc = Document(path)
-        return "\n".join(p.text for p in doc.paragraphs)
-    except Exception:
-        return ""
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
 
 
-def parse_file_to_text(path: str) -> str:
+def _check_deadline(deadline: float, seconds: float) -> None:
+    if time.monotonic() > deadline:
+        raise ParseError(f"timed out after {seconds:g}s")
+
+
+def parse_pdf(path: str, max_pages: int, max_chars: int, deadline: float) -> Tuple[str, Optional[str]]:
+    # Lays out one page at a time and stops as soon as a budget is hit, instead of the whole document.
+    # pdfminer and python-docx are imported on first use: only parser processes ever need them.
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    parts = []
+    chars = 0
+    for page_no, page in enumerate(extract_pages(path, maxpages=max_pages + 1 if max_pages > 0 else 0)):
+        if max_pages > 0 and page_no >= max_pages:
+            return "".join(parts), f"stopped after {max_pages} pages"
+        for element in page:
+            if isinstance(element, LTTextContainer):
+                text = element.get_text()
+                parts.append(text)
+                chars += len(text)
+        if max_chars > 0 and chars >= max_chars:
+            return "".join(parts)[:max_chars], f"stopped at {max_chars} characters"
+        _check_deadline(deadline, settings.parse_timeout_seconds)
+    return "".join(parts), None
+
+
+def parse_docx(path: str, max_chars: int, deadline: float) -> Tuple[str, Optional[str]]:
+    from docx import Document
+
+    parts = []
+    chars = 0
+    for paragraph in Document(path).paragraphs:
+        parts.append(paragraph.text)
+        chars += len(paragraph.text) + 1
+        if max_chars > 0 and chars >= max_chars:
+            return "\n".join(parts)[:max_chars], f"stopped at {max_chars} characters"
+        _check_deadline(deadline, settings.parse_timeout_seconds)
+    return "\n".join(parts), None
+
+
+def parse_text(path: str, max_chars: int) -> Tuple[str, Optional[str]]:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read(max_chars + 1 if max_chars > 0 else -1)
+    if max_chars > 0 and len(text) > max_chars:
+        return text[:max_chars], f"stopped at {max_chars} characters"
+    return text, None
+
+
+def extract_text(path: str) -> Tuple[str, Optional[str]]:
+    # Returns (text, truncation note); raises ParseError/MemoryError/parser errors on failure
+    max_chars = settings.parse_max_chars
+    timeout = settings.parse_timeout_seconds
+    deadline = time.monotonic() + timeout if timeout > 0 else float("inf")
     ext = os.path.splitext(path)[1].lower()
-    if ext == ".pdf":
-        return parse_pdf(path)
-    if ext in {".docx"}:
-        return parse_docx(path)
-    # Fallback to reading as text
+    with time_limit(timeout):
+        if ext == ".pdf":
+            return parse_pdf(path, settings.parse_max_pages, max_chars, deadline)
+        if ext in {".docx"}:
+            return parse_docx(path, max_chars, deadline)
+        # Fallback to reading as text
+        return parse_text(path, max_chars)
+
+
+def parse_file_to_text(path: str) -> str:
     try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
+        return extract_text(path)[0]
     except Exception:
         return ""
 
 
-def extract_text_and_skills(path: str) -> Tuple[str, list[str]]:
-    text = parse_file_to_text(path)
+def extract_text_and_skills(path: str) -> ParseResult:
+    try:
+        text, truncated = extract_text(path)
+    except ParseError as exc:
+        return ParseResult("", [], FAILED, str(exc))
+    except MemoryError:
+        return ParseResult("", [], FAILED, f"memory limit exceeded ({settings.parse_memory_mb} MB)")
+    except Exception as exc:
+        return ParseResult("", [], FAILED, f"{type(exc).__name__}: {exc}"[:500])
     skills = extract_skills(text)
-    return text, skills
+    if truncated:
+        return ParseResult(text, skills, TRUNCATED, truncated)
+    return ParseResult(text, skills, PARSED)
 
 
+def parse_stored(key: str) -> ParseResult:
+    # Parser-process entry point: the file is read through the blob store, so a worker host needs no
+    # access to the disk that took the upload. Store errors other than a missing object are retried.
+    try:
+        with store.fetch(key) as path:
+            return extract_text_and_skills(path)
+    except FileNotFoundError:
+        return ParseResult("", [], FAILED, "stored file is missing")
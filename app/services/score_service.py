@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, event, func, or_, select, update
+from sqlalchemy.orm import Session, load_only
+
+from ..config import get_settings
+from ..database import insert_ignore
+from ..models import Job, MatchScore, Resume, ResumeFeatures, ScoreTask, ScorerVersion
+from ..utils import metrics
+from ..utils.match_cache import MatchCache, SQLiteCacheBackend
+from .feature_service import sync_index
+from .match_service import score_many, score_pair
+
+
+settings = get_settings()
+
+# Bump whenever match_service scoring changes. The new version is backfilled in the background and
+# only becomes readable once every job has been rescored, so results never mix two scorers.
+SCORER_VERSION = 1
+
+pair_cache = MatchCache(
+    settings.match_cache_max_bytes,
+    SQLiteCacheBackend(settings.match_cache_shared_path, settings.match_cache_shared_max_entries)
+    if settings.match_cache_shared_path
+    else None,
+    namespace=f"v{SCORER_VERSION}",
+)
+
+RESUME = "resume"
+JOB = "job"
+BUILDING = "building"
+ACTIVE = "active"
+RETIRED = "retired"
+
+
+class ClaimedTask(NamedTuple):
+    id: int
+    kind: str
+    target_id: int
+    enqueued_at: datetime
+
+
+def _enqueue(db: Session, kind: str, target_ids: Iterable[int]) -> None:
+    ids = sorted(set(target_ids))
+    if not ids:
+        return
+    now = datetime.utcnow()
+    db.execute(
+        insert_ignore(db, ScoreTask),
+        [{"kind": kind, "target_id": tid, "scorer_version": SCORER_VERSION, "enqueued_at": now} for tid in ids],
+    )
+    # A task that is already running finishes, sees the newer enqueued_at and goes round again
+    db.execute(
+        update(ScoreTask)
+        .where(ScoreTask.kind == kind, ScoreTask.target_id.in_(ids), ScoreTask.scorer_version == SCORER_VERSION)
+        .values(enqueued_at=now)
+    )
+
+
+def enqueue_resumes(db: Session, resume_ids: Iterable[int]) -> None:
+    _enqueue(db, RESUME, resume_ids)
+
+
+def enqueue_jobs(db: Session, job_ids: Iterable[int]) -> None:
+    ids = list(job_ids)
+    # Rows from other scorer versions describe the job as it was; drop them so reads fall back to live scoring
+    if ids:
+        db.execute(delete(MatchScore).where(MatchScore.job_id.in_(ids), MatchScore.scorer_version != SCORER_VERSION))
+    _enqueue(db, JOB, ids)
+
+
+def ensure_version(db: Session) -> None:
+    # First start of a new scorer: queue every job so the whole matrix is rebuilt under this version
+    if db.get(ScorerVersion, SCORER_VERSION) is not None:
+        return
+    db.execute(insert_ignore(db, ScorerVersion), [{"version": SCORER_VERSION, "state": BUILDING, "started_at": datetime.utcnow()}])
+    last_id = 0
+    while True:
+        ids = db.scalars(select(Job.id).where(Job.id > last_id).order_by(Job.id).limit(settings.score_batch_size)).all()
+        if not ids:
+            break
+        _enqueue(db, JOB, ids)
+        last_id = ids[-1]
+    db.commit()
+
+
+def activate_ready(db: Session) -> bool:
+    row = db.get(ScorerVersion, SCORER_VERSION)
+    if row is None or row.state != BUILDING:
+        return False
+    pending = db.scalar(
+        select(ScoreTask.id).where(ScoreTask.kind == JOB, ScoreTask.scorer_version == SCORER_VERSION).limit(1)
+    )
+    if pending is not None:
+        return False
+    row.state = ACTIVE
+    row.activated_at = datetime.utcnow()
+    db.execute(
+        update(ScorerVersion).where(ScorerVersion.version < SCORER_VERSION).values(state=RETIRED)
+    )
+    db.execute(delete(MatchScore).where(MatchScore.scorer_version < SCORER_VERSION))
+    db.execute(delete(ScoreTask).where(ScoreTask.scorer_version < SCORER_VERSION))
+    db.commit()
+    return True
+
+
+def queue_depth(db: Session) -> int:
+    return db.scalar(select(func.count(ScoreTask.id))) or 0
+
+
+def active_version(db: Session) -> Optional[int]:
+    return db.scalar(select(ScorerVersion.version).where(ScorerVersion.state == ACTIVE).order_by(ScorerVersion.version.desc()).limit(1))
+
+
+def claim(db: Session) -> Optional[ClaimedTask]:
+    # Compare-and-set on started_at, as with parse jobs; claims left behind by a dead worker expire
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.score_stale_after_seconds)
+    claimable = (ScoreTask.scorer_version == SCORER_VERSION, or_(ScoreTask.started_at.is_(None), ScoreTask.started_at < cutoff))
+    candidates = db.execute(
+        select(ScoreTask.id, ScoreTask.kind, ScoreTask.target_id, ScoreTask.enqueued_at)
+        .where(*claimable)
+        .order_by(ScoreTask.id)
+        .limit(5)
+    ).all()
+    for task_id, kind, target_id, enqueued_at in candidates:
+        result = db.execute(update(ScoreTask).where(ScoreTask.id == task_id, *claimable).values(started_at=datetime.utcnow()))
+        if result.rowcount == 1:
+            db.commit()
+            return ClaimedTask(task_id, kind, target_id, enqueued_at)
+    db.commit()
+    return None
+
+
+def finish(db: Session, task: ClaimedTask) -> None:
+    result = db.execute(delete(ScoreTask).where(ScoreTask.id == task.id, ScoreTask.enqueued_at == task.enqueued_at))
+    if result.rowcount == 0:
+        db.execute(update(ScoreTask).where(ScoreTask.id == task.id).values(started_at=None))
+    db.commit()
+
+
+def release(db: Session, task: ClaimedTask) -> None:
+    db.execute(update(ScoreTask).where(ScoreTask.id == task.id).values(started_at=None))
+    db.commit()
+
+
+def _store(db: Session, rows: List[dict]) -> None:
+    if rows:
+        # A resume task and a job task may both write the same pair; either value is current
+        db.execute(insert_ignore(db, MatchScore), rows)
+    db.commit()
+
+
+def recompute_for_resume(db: Session, resume_id: int) -> int:
+    owner = db.scalar(select(Resume.user_id).join(ResumeFeatures).where(Resume.id == resume_id))
+    if owner is None:
+        return 0
+    db.execute(delete(MatchScore).where(MatchScore.resume_id == resume_id, MatchScore.scorer_version == SCORER_VERSION))
+    now, written, last_id = datetime.utcnow(), 0, 0
+    while True:
+        job_ids = db.scalars(select(Job.id).where(Job.id > last_id).order_by(Job.id).limit(settings.score_batch_size)).all()
+        if not job_ids:
+            break
+        scores = score_many(db, [resume_id], job_ids)[0]
+        rows = [
+            {"job_id": jid, "resume_id": resume_id, "user_id": owner, "score": float(score),
+             "scorer_version": SCORER_VERSION, "computed_at": now}
+            for jid, score in zip(job_ids, scores)
+        ]
+        _store(db, rows)
+        written += len(rows)
+        last_id = job_ids[-1]
+    db.commit()
+    return written
+
+
+def recompute_for_job(db: Session, job_id: int) -> int:
+    if db.scalar(select(Job.id).where(Job.id == job_id)) is None:
+        return 0
+    db.execute(delete(MatchScore).where(MatchScore.job_id == job_id, MatchScore.scorer_version == SCORER_VERSION))
+    now, written, last_id = datetime.utcnow(), 0, 0
+    while True:
+        batch = db.execute(
+            select(Resume.id, Resume.user_id)
+            .join(ResumeFeatures)
+            .where(Resume.id > last_id)
+            .order_by(Resume.id)
+            .limit(settings.score_batch_size)
+        ).all()
+        if not batch:
+            break
+        resume_ids = [rid for rid, _ in batch]
+        scores = score_many(db, resume_ids, [job_id])[:, 0]
+        rows = [
+            {"job_id": job_id, "resume_id": rid, "user_id": uid, "score": float(score),
+             "scorer_version": SCORER_VERSION, "computed_at": now}
+            for (rid, uid), score in zip(batch, scores)
+        ]
+        _store(db, rows)
+        written += len(rows)
+        last_id = resume_ids[-1]
+    db.commit()
+    return written
+
+
+def run_task(db: Session, task: ClaimedTask) -> int:
+    # The features that enqueued this task committed with it, but the index may not hold them yet (the
+    # API indexes after its commit, other processes catch up on an interval). Scores stored from stale
+    # features would outlive the task, so catch up first.
+    sync_index(db, force=True)
+    with metrics.scoring_seconds.time(f"recompute_{task.kind}"):
+        if task.kind == RESUME:
+            return recompute_for_resume(db, task.target_id)
+        return recompute_for_job(db, task.target_id)
+
+
+def scores_pending(db: Session, job_id: int, resume_filter) -> bool:
+    # The job was edited, or one of the relevant resumes was parsed, and scoring has not caught up yet
+    job_task = select(ScoreTask.id).where(ScoreTask.kind == JOB, ScoreTask.target_id == job_id).limit(1)
+    if db.scalar(job_task) is not None:
+        return True
+    resume_task = (
+        select(ScoreTask.id)
+        .join(Resume, Resume.id == ScoreTask.target_id)
+        .where(ScoreTask.kind == RESUME, resume_filter)
+        .limit(1)
+    )
+    return db.scalar(resume_task) is not None
+
+
+def stored_score(db: Session, resume_id: int, job_id: int) -> Optional[float]:
+    # None means "not materialized (yet)"; callers score the pair live instead
+    version = active_version(db)
+    if version is None or scores_pending(db, job_id, Resume.id == resume_id):
+        return None
+    return db.scalar(
+        select(MatchScore.score).where(
+            MatchScore.job_id == job_id, MatchScore.resume_id == resume_id, MatchScore.scorer_version == version
+        )
+    )
+
+
+def pair_score(db: Session, resume_id: int, resume_version: int, job_id: int, job_version: int) -> float:
+    key = (resume_id, resume_version, job_id, job_version)
+    score = pair_cache.get(key)
+    if score is None:
+        score = stored_score(db, resume_id, job_id)
+        if score is None:
+            score = score_pair(db, resume_id, job_id)
+        pair_cache.put(key, score)
+    return score
+
+
+def top_from_scores(db: Session, job_id: int, user_id: int, k: int) -> Optional[List[Tuple[Resume, float]]]:
+    version = active_version(db)
+    if version is None or scores_pending(db, job_id, Resume.user_id == user_id):
+        return None
+    ranked = db.execute(
+        select(MatchScore.resume_id, MatchScore.score)
+        .where(
+            MatchScore.job_id == job_id,
+            MatchScore.user_id == user_id,
+            MatchScore.scorer_version == version,
+            # Like the live ranking, resumes with nothing in common with the job are not candidates
+            MatchScore.score > 0,
+        )
+        .order_by(MatchScore.score.desc(), MatchScore.resume_id)
+        .limit(k)
+    ).all()
+    if not ranked:
+        return None
+    rows = db.scalars(
+        select(Resume)
+        .options(load_only(Resume.id, Resume.filename, Resume.skills))
+        .where(Resume.id.in_([rid for rid, _ in ranked]))
+    ).all()
+    by_id = {r.id: r for r in rows}
+    return [(by_id[rid], score) for rid, score in ranked if rid in by_id]
+
+
+# SQLite does not enforce the ON DELETE CASCADE unless foreign keys are switched on, so deletes clean up explicitly
+@event.listens_for(Resume, "after_delete")
+def _drop_resume_scores(mapper, connection, target) -> None:
+    connection.execute(delete(MatchScore).where(MatchScore.resume_id == target.id))
+    connection.execute(delete(ScoreTask).where(ScoreTask.kind == RESUME, ScoreTask.target_id == target.id))
+
+
+@event.listens_for(Job, "after_delete")
+def _drop_job_scores(mapper, connection, target) -> None:
+    connection.execute(delete(MatchScore).where(MatchScore.job_id == target.id))
+    connection.execute(delete(ScoreTask).where(ScoreTask.kind == JOB, ScoreTask.target_id == target.id))
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, and_, column, delete, event, func, insert, literal_column, select, table
+from sqlalchemy.orm import Session
+
+from ..database import Base, engine
+from ..models import Job, JobFeatures, JobSkill, Resume, ResumeFeatures, ResumeSkill
+from ..nlp import canonical_skills
+from .index_service import normalize_skills
+
+
+# Full-text indexes live outside the ORM models. On SQLite they are external-content FTS5 tables over
+# resumes.content_text and jobs.title/description, kept in sync by triggers, so every write path
+# (ORM, bulk INSERT, deletes) updates them. On Postgres a generated tsvector column with a GIN index
+# does the same job.
+_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS resumes_fts USING fts5(content_text, content='resumes', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS resumes_fts_ai AFTER INSERT ON resumes BEGIN
+        INSERT INTO resumes_fts(rowid, content_text) VALUES (new.id, new.content_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS resumes_fts_ad AFTER DELETE ON resumes BEGIN
+        INSERT INTO resumes_fts(resumes_fts, rowid, content_text) VALUES ('delete', old.id, old.content_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS resumes_fts_au AFTER UPDATE OF content_text ON resumes BEGIN
+        INSERT INTO resumes_fts(resumes_fts, rowid, content_text) VALUES ('delete', old.id, old.content_text);
+        INSERT INTO resumes_fts(rowid, content_text) VALUES (new.id, new.content_text);
+    END""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(title, description, content='jobs', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS jobs_fts_au AFTER UPDATE OF title, description ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO jobs_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+_POSTGRES_DDL = [
+    """ALTER TABLE resumes ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(content_text, ''))) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_resumes_search_tsv ON resumes USING GIN (search_tsv)",
+    """ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_search_tsv ON jobs USING GIN (search_tsv)",
+]
+
+SKILL_MODES = ("any", "all")
+# A skill with fewer link rows than this is "rare": its owners are collected up front. Common skills are
+# checked per row instead, walking the listing index newest-first until the page is full.
+RARE_SKILL_ROWS = 5000
+_FTS_TOKEN = re.compile(r"\w+\*?")
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_indexes(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        existing = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE name IN ('resumes_fts', 'jobs_fts')"
+        ).scalars().all()
+        for statement in _SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        # Index rows that predate the FTS tables
+        for name in ("resumes_fts", "jobs_fts"):
+            if name not in existing:
+                connection.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+    elif connection.dialect.name == "postgresql":
+        for statement in _POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+
+
+class SearchFilters(NamedTuple):
+    skills: List[str]
+    skills_mode: str
+    q: Optional[str]
+    created_from: Optional[datetime]
+    created_to: Optional[datetime]
+
+
+def search_filters(
+    skills: Optional[str] = Query(None, description="Comma-separated skills; synonyms are accepted"),
+    skills_mode: str = Query("any", description="any: at least one skill, all: every skill"),
+    q: Optional[str] = Query(None, description="Full-text keywords; a trailing * matches prefixes"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> SearchFilters:
+    if skills_mode not in SKILL_MODES:
+        raise HTTPException(status_code=400, detail="skills_mode must be 'any' or 'all'")
+    wanted = sorted(normalize_skills(canonical_skills([s for s in (skills or "").split(",") if s.strip()])))
+    return SearchFilters(wanted, skills_mode, (q or "").strip() or None, created_from, created_to)
+
+
+def replace_skills(db: Session, model, owner_id: int, skills: Iterable[str]) -> None:
+    owner = model.resume_id if model is ResumeSkill else model.job_id
+    db.execute(delete(model).where(owner == owner_id))
+    rows = [{owner.key: owner_id, "skill": skill} for skill in sorted(set(skills)) if len(skill) <= 255]
+    if rows:
+        db.execute(insert(model), rows)
+
+
+def backfill_skills(db: Session) -> None:
+    # Databases created before the skill tables: seed them from the normalized skills on the feature rows
+    for features, link, owner in (
+        (ResumeFeatures, ResumeSkill, ResumeFeatures.resume_id),
+        (JobFeatures, JobSkill, JobFeatures.job_id),
+    ):
+        if db.scalar(select(func.count()).select_from(link)) or not db.scalar(select(func.count()).select_from(features)):
+            continue
+        for owner_id, skills in db.execute(select(owner, features.skills)).all():
+            replace_skills(db, link, owner_id, skills or [])
+    db.commit()
+
+
+def _fts_match(q: str) -> Optional[str]:
+    # Every keyword must appear; user input is quoted so FTS5 operators in it are inert
+    terms = []
+    for token in _FTS_TOKEN.findall(q):
+        word = token.rstrip("*")
+        if word:
+            terms.append(f'"{word}"*' if token.endswith("*") else f'"{word}"')
+    return " AND ".join(terms) or None
+
+
+def _text_filter(table_name: str, id_column, q: str):
+    if engine.dialect.name == "postgresql":
+        return literal_column(f"{table_name}.search_tsv").op("@@")(func.websearch_to_tsquery("english", q))
+    match = _fts_match(q)
+    if match is None:
+        return None
+    fts = table(f"{table_name}_fts", column("rowid"))
+    return id_column.in_(select(fts.c.rowid).where(literal_column(fts.name).op("MATCH")(match)))
+
+
+def _link_rows(db: Session, link_skill, skills: List[str]) -> int:
+    # Capped count, so probing a very common skill costs no more than probing a rare one
+    capped = select(link_skill).where(link_skill.in_(skills)).limit(RARE_SKILL_ROWS).subquery()
+    return db.scalar(select(func.count()).select_from(capped)) or 0
+
+
+def _skill_filter(db: Session, link_owner, link_skill, id_column, skills: List[str], mode: str):
+    def has(wanted: List[str]):
+        return select(link_owner).where(link_owner == id_column, link_skill.in_(wanted)).exists()
+
+    def owners(wanted: List[str]):
+        return id_column.in_(select(link_owner).where(link_skill.in_(wanted)))
+
+    if mode == "any" or len(skills) == 1:
+        return owners(skills) if _link_rows(db, link_skill, skills) < RARE_SKILL_ROWS else has(skills)
+    conditions = [has([skill]) for skill in skills]
+    rarest = min(skills, key=lambda skill: _link_rows(db, link_skill, [skill]))
+    if _link_rows(db, link_skill, [rarest]) < RARE_SKILL_ROWS:
+        conditions.append(owners([rarest]))
+    return and_(*conditions)
+
+
+def _apply(db: Session, query: Select, model, table_name: str, link_owner, link_skill, filters: Optional[SearchFilters]) -> Select:
+    if filters is None:
+        return query
+    if filters.skills:
+        query = query.where(_skill_filter(db, link_owner, link_skill, model.id, filters.skills, filters.skills_mode))
+    if filters.q:
+        condition = _text_filter(table_name, model.id, filters.q)
+        if condition is not None:
+            query = query.where(condition)
+    if filters.created_from is not None:
+        query = query.where(model.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        query = query.where(model.created_at < filters.created_to)
+    return query
+
+
+def filter_resumes(db: Session, query: Select, filters: Optional[SearchFilters]) -> Select:
+    return _apply(db, query, Resume, "resumes", ResumeSkill.resume_id, ResumeSkill.skill, filters)
+
+
+def filter_jobs(db: Session, query: Select, filters: Optional[SearchFilters]) -> Select:
+    return _apply(db, query, Job, "jobs", JobSkill.job_id, JobSkill.skill, filters)
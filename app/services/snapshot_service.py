@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Resume, ResumeFeatures
+from .index_service import normalize_skills
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# File layout: MAGIC, then little-endian arrays each aligned to 64 bytes, then a JSON header naming
+# their offsets, dtypes and lengths, then a fixed trailer (header offset, header length, MAGIC).
+MAGIC = b"ATSCORP1"
+FORMAT_VERSION = 1
+_ALIGN = 64
+_TRAILER = struct.Struct("<QQ8s")
+FILE_NAME = "resumes.snapshot"
+_LOCK_NAME = "build.lock"
+
+
+def snapshot_dir() -> str:
+    # Beside the blob shards, like the upload spool; every worker on the host maps the same file
+    return os.path.join(settings.storage_dir, ".corpus")
+
+
+def snapshot_path() -> str:
+    return os.path.join(snapshot_dir(), FILE_NAME)
+
+
+def _database_tag() -> str:
+    # A snapshot only describes the database it was built from; hashed so no credentials land on disk
+    return hashlib.blake2b(settings.database_url.encode(), digest_size=8).hexdigest()
+
+
+def _words(columns: int) -> int:
+    return max((columns + 63) // 64, 1)
+
+
+# Read-only view of one snapshot generation. Rows are resumes ordered by (user_id, resume_id), so one
+# owner's resumes are a contiguous range:
+#   term_indptr/term_ids/term_counts   CSR of each row's sorted term ids and their counts
+#   postings_indptr/postings           the transpose: rows containing each term id, ascending
+#   doc_freqs                          postings per term id
+#   skill_bits/skill_sizes             one bitset per row over the skill columns, and its popcount
+#   skill_indptr/skill_postings        rows having each skill column, ascending
+#   sorted_ids/sorted_rows             resume ids in ascending order and their rows, for lookups
+# Every array is a zero-copy view of the mapping, so its pages live in the page cache and are shared
+# by all processes that map the file instead of being copied into each one.
+class CorpusSnapshot:
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.nbytes = stat.st_size
+        if stat.st_size < len(MAGIC) + _TRAILER.size or self._mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a corpus snapshot")
+        offset, length, magic = _TRAILER.unpack_from(self._mmap, stat.st_size - _TRAILER.size)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is truncated")
+        header = json.loads(self._mmap[offset : offset + length])
+        if header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path} has format {header.get('format')}, expected {FORMAT_VERSION}")
+        self.generation: int = header["generation"]
+        self.database: str = header["database"]
+        self.built_at: float = header["built_at"]
+        self.watermark = datetime.fromisoformat(header["watermark"]) if header["watermark"] else datetime.min
+        # How many of its rows carry exactly the watermark timestamp (absent from the first files written)
+        self.watermark_rows: int = header.get("watermark_rows", 0)
+        self.rows: int = header["rows"]
+        self.skill_names = header["skills"]
+        self.skill_columns: Dict[str, int] = {skill: column for column, skill in enumerate(self.skill_names)}
+        arrays = {
+            name: np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=count, offset=start)
+            for name, (start, dtype, count) in header["arrays"].items()
+        }
+        self.resume_ids = arrays["resume_ids"]
+        self.user_ids = arrays["user_ids"]
+        self.term_indptr = arrays["term_indptr"]
+        self.term_ids = arrays["term_ids"]
+        self.term_counts = arrays["term_counts"]
+        self.postings_indptr = arrays["postings_indptr"]
+        self.postings = arrays["postings"]
+        self.doc_freqs = arrays["doc_freqs"]
+        self.skill_bits = arrays["skill_bits"].reshape(self.rows, _words(len(self.skill_names)))
+        self.skill_sizes = arrays["skill_sizes"]
+        self.skill_indptr = arrays["skill_indptr"]
+        self.skill_postings = arrays["skill_postings"]
+        self.sorted_ids = arrays["sorted_ids"]
+        self.sorted_rows = arrays["sorted_rows"]
+
+    def row(self, resume_id: int) -> int:
+        return int(self.locate([resume_id])[0])
+
+    def locate(self, resume_ids: Sequence[int]) -> np.ndarray:
+        # Row of each resume id, -1 for ids not in this generation
+        ids = np.asarray(resume_ids, dtype=np.int64)
+        if not self.rows:
+            return np.full(ids.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.sorted_ids, ids), self.rows - 1)
+        return np.where(self.sorted_ids[pos] == ids, self.sorted_rows[pos].astype(np.int64), -1)
+
+    def terms(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.term_indptr[row], self.term_indptr[row + 1]
+        return self.term_ids[start:end], self.term_counts[start:end]
+
+    def term_sizes(self, lo: int, hi: int) -> np.ndarray:
+        return np.diff(self.term_indptr[lo : hi + 1])
+
+    def user_rows(self, user_id: int) -> Tuple[int, int]:
+        lo, hi = np.searchsorted(self.user_ids, (user_id, user_id + 1))
+        return int(lo), int(hi)
+
+    def term_hits(self, lo: int, hi: int, term_ids: Iterable[int]) -> np.ndarray:
+        # For each row in [lo, hi), how many of `term_ids` it contains
+        return _hits(self.postings_indptr, self.postings, lo, hi, term_ids)
+
+    def skill_hits(self, lo: int, hi: int, columns: Iterable[int]) -> np.ndarray:
+        return _hits(self.skill_indptr, self.skill_postings, lo, hi, columns)
+
+
+def _hits(indptr: np.ndarray, postings: np.ndarray, lo: int, hi: int, keys: Iterable[int]) -> np.ndarray:
+    # Walks only the postings of `keys`, narrowed to the row range by binary search
+    segments = []
+    for key in keys:
+        if 0 <= key < indptr.size - 1:
+            rows = postings[indptr[key] : indptr[key + 1]]
+            start, end = np.searchsorted(rows, (lo, hi))
+            if end > start:
+                segments.append(rows[start:end])
+    if not segments:
+        return np.zeros(hi - lo, dtype=np.int64)
+    return np.bincount(np.concatenate(segments) - lo, minlength=hi - lo)
+
+
+def open_snapshot(path: Optional[str] = None) -> Optional[CorpusSnapshot]:
+    # The current generation, or None when snapshots are off, none was built yet, or it belongs to another database
+    if not settings.corpus_snapshot:
+        return None
+    path = path or snapshot_path()
+    try:
+        snapshot = CorpusSnapshot(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning("Ignoring corpus snapshot %s: %s", path, exc)
+        return None
+    if snapshot.database != _database_tag():
+        logger.warning("Ignoring corpus snapshot %s: built from another database", path)
+        return None
+    return snapshot
+
+
+def poll(current: Optional[CorpusSnapshot]) -> Optional[CorpusSnapshot]:
+    # A newer generation than `current` if one has been renamed into place since, else None. One stat call.
+    if not settings.corpus_snapshot:
+        return None
+    try:
+        stat = os.stat(snapshot_path())
+    except FileNotFoundError:
+        return None
+    if current is not None and current.identity == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+        return None
+    snapshot = open_snapshot()
+    if snapshot is None or (current is not None and snapshot.generation <= current.generation):
+        return None
+    return snapshot
+
+
+def _collect(db: Session) -> Tuple[Dict[str, np.ndarray], list, Optional[datetime], int]:
+    # One ordered pass over the feature rows; the scratch buffers are packed arrays, not Python objects per term
+    resume_ids, user_ids, lengths = array("q"), array("q"), array("q")
+    term_ids, term_counts = array("I"), array("I")
+    skill_cols, skill_sizes = array("I"), array("I")
+    columns: Dict[str, int] = {}
+    watermark: Optional[datetime] = None
+    at_watermark = 0
+    rows = db.execute(
+        select(
+            Resume.id,
+            Resume.user_id,
+            ResumeFeatures.term_ids,
+            ResumeFeatures.term_counts,
+            ResumeFeatures.skills,
+            ResumeFeatures.updated_at,
+        )
+        .join(ResumeFeatures, ResumeFeatures.resume_id == Resume.id)
+        .order_by(Resume.user_id, Resume.id)
+        .execution_options(yield_per=1000)
+    )
+    for resume_id, user_id, ids, counts, skills, updated_at in rows:
+        resume_ids.append(resume_id)
+        user_ids.append(user_id)
+        start = len(term_ids)
+        term_ids.frombytes(ids)
+        term_counts.frombytes(counts)
+        lengths.append(len(term_ids) - start)
+        # Resume skills come from the taxonomy, so the columns (and the bitsets) stay narrow
+        row_skills = sorted(normalize_skills(skills))
+        skill_sizes.append(len(row_skills))
+        skill_cols.extend(columns.setdefault(skill, len(columns)) for skill in row_skills)
+        if watermark is None or updated_at > watermark:
+            watermark, at_watermark = updated_at, 1
+        elif updated_at == watermark:
+            at_watermark += 1
+
+    n = len(resume_ids)
+    ids_arr = np.frombuffer(resume_ids, dtype=np.int64)
+    term_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.frombuffer(lengths, dtype=np.int64), out=term_indptr[1:])
+    tids = np.frombuffer(term_ids, dtype=np.uint32)
+    width = int(tids.max()) + 1 if tids.size else 0
+    doc_freqs = np.bincount(tids, minlength=width).astype(np.uint32)
+    postings_indptr = np.zeros(width + 1, dtype=np.int64)
+    np.cumsum(doc_freqs, out=postings_indptr[1:])
+    term_rows = np.repeat(np.arange(n, dtype=np.uint32), np.diff(term_indptr))
+
+    cols = np.frombuffer(skill_cols, dtype=np.uint32)
+    sizes = np.frombuffer(skill_sizes, dtype=np.uint32)
+    skill_rows = np.repeat(np.arange(n, dtype=np.uint32), sizes)
+    skill_bits = np.zeros((n, _words(len(columns))), dtype=np.uint64)
+    np.bitwise_or.at(skill_bits, (skill_rows, cols >> 6), np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64)))
+    skill_indptr = np.zeros(len(columns) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cols, minlength=len(columns)), out=skill_indptr[1:])
+
+    sorted_rows = np.argsort(ids_arr, kind="stable")
+    arrays = {
+        "resume_ids": ids_arr,
+        "user_ids": np.frombuffer(user_ids, dtype=np.int64),
+        "term_indptr": term_indptr,
+        "term_ids": tids,
+        "term_counts": np.frombuffer(term_counts, dtype=np.uint32),
+        # Stable sorts keep each posting list in ascending row order, which _hits relies on
+        "postings_indptr": postings_indptr,
+        "postings": term_rows[np.argsort(tids, kind="stable")],
+        "doc_freqs": doc_freqs,
+        "skill_bits": skill_bits.reshape(-1),
+        "skill_sizes": sizes,
+        "skill_indptr": skill_indptr,
+        "skill_postings": skill_rows[np.argsort(cols, kind="stable")],
+        "sorted_ids": ids_arr[sorted_rows],
+        "sorted_rows": sorted_rows.astype(np.uint32),
+    }
+    skill_names = sorted(columns, key=columns.__getitem__)
+    return arrays, skill_names, watermark, at_watermark
+
+
+def _pad(f) -> None:
+    f.write(b"\0" * (-f.tell() % _ALIGN))
+
+
+def _write(path: str, arrays: Dict[str, np.ndarray], header: dict) -> None:
+    # Written under a temporary name and renamed over the previous generation. Processes that mapped the
+    # old file keep reading it until they swap; nobody ever sees a partial file.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            table = {}
+            for name, values in arrays.items():
+                values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+                _pad(f)
+                table[name] = [f.tell(), values.dtype.str, int(values.size)]
+                f.write(values.data)
+            meta = json.dumps({**header, "arrays": table}).encode()
+            offset = f.tell()
+            f.write(meta)
+            f.write(_TRAILER.pack(offset, len(meta), MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(path), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+@contextmanager
+def _build_lock(directory: str) -> Iterator[bool]:
+    # Several processes may run the snapshot worker (one per API process in inprocess mode); one builds,
+    # the others skip. Without fcntl every process builds, which is wasteful but still atomic.
+    try:
+        import fcntl
+    except ImportError:
+        yield True
+        return
+    with open(os.path.join(directory, _LOCK_NAME), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def build(db: Session) -> Optional[CorpusSnapshot]:
+    # Writes the next generation from every resume with features; None if another process is building
+    directory = snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    with _build_lock(directory) as acquired:
+        if not acquired:
+            return None
+        started = time.perf_counter()
+        previous = open_snapshot()
+        arrays, skill_names, watermark, at_watermark = _collect(db)
+        header = {
+            "format": FORMAT_VERSION,
+            "generation": (previous.generation if previous is not None else 0) + 1,
+            "database": _database_tag(),
+            "built_at": time.time(),
+            "watermark": watermark.isoformat() if watermark else None,
+            "watermark_rows": at_watermark,
+            "rows": int(arrays["resume_ids"].size),
+            "skills": skill_names,
+        }
+        _write(snapshot_path(), arrays, header)
+    snapshot = open_snapshot()
+    if snapshot is not None:
+        logger.info(
+            "Built corpus snapshot generation %s: %s resumes, %.1f MiB in %.2fs",
+            snapshot.generation, snapshot.rows, snapshot.nbytes / 2**20, time.perf_counter() - started,
+        )
+    return snapshot
+
+
+def pending(db: Session, snapshot: Optional[CorpusSnapshot]) -> int:
+    # How far the snapshot has drifted: rows written after it was built plus its rows since deleted or
+    # rewritten (a rewritten resume counts on both sides). As in feature_service._changed_resumes (`>=`), a row
+    # stamped exactly at the watermark may postdate the build, so ties beyond the ones the snapshot holds are newer.
+    if snapshot is None:
+        return db.scalar(select(func.count()).select_from(ResumeFeatures).join(Resume, Resume.id == ResumeFeatures.resume_id)) or 0
+    after = case((ResumeFeatures.updated_at > snapshot.watermark, 1), else_=0)
+    at = case((ResumeFeatures.updated_at == snapshot.watermark, 1), else_=0)
+    total, newer, tied = db.execute(
+        select(func.count(), func.sum(after), func.sum(at))
+        .select_from(ResumeFeatures)
+        .join(Resume, Resume.id == ResumeFeatures.resume_id)
+    ).one()
+    newer = (newer or 0) + max((tied or 0) - snapshot.watermark_rows, 0)
+    return newer + snapshot.rows - (total - newer)
+
+
+def maybe_rebuild(db: Session) -> Optional[CorpusSnapshot]:
+    # Rebuilds once CORPUS_SNAPSHOT_MIN_CHANGES resumes are stale, or sooner than that when the current
+    # generation is older than CORPUS_SNAPSHOT_MAX_AGE_SECONDS and anything at all is stale
+    current = open_snapshot()
+    stale = pending(db, current)
+    if not stale:
+        return None
+    if current is not None and stale < settings.corpus_snapshot_min_changes:
+        if time.time() - current.built_at < settings.corpus_snapshot_max_age_seconds:
+            return None
+    return build(db)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+
+class Vocabulary:
+    # Process-local cache of the shared term -> id mapping; ids are owned by whoever persists them
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, term: str) -> Optional[int]:
+        return self._ids.get(term)
+
+    def update(self, ids: Mapping[str, int]) -> None:
+        with self._lock:
+            self._ids.update(ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+def idf_vector(doc_freqs: Sequence[int], doc_count: int) -> np.ndarray:
+    # Smoothed idf, as in scikit-learn: log((1 + n) / (1 + df)) + 1
+    df = np.asarray(doc_freqs, dtype=np.float64)
+    return np.log((1.0 + doc_count) / (1.0 + df)) + 1.0
+
+
+def term_arrays(term_freqs: Mapping[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    # (term ids, counts) of a feature dict, in the form snapshot rows already have
+    n = len(term_freqs)
+    return np.fromiter(term_freqs.keys(), dtype=np.int64, count=n), np.fromiter(term_freqs.values(), dtype=np.int64, count=n)
+
+
+def tfidf_matrix(rows: Sequence[Tuple[np.ndarray, np.ndarray]], idf: np.ndarray) -> sparse.csr_matrix:
+    # One CSR row per (term ids, counts) pair; idf must cover every term id that appears.
+    # scipy is imported on the first scoring call rather than at startup.
+    from scipy import sparse
+
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([ids.size for ids, _ in rows], out=indptr[1:])
+    indices = np.concatenate([ids for ids, _ in rows] or [np.zeros(0)], dtype=np.int64)
+    counts = np.concatenate([counts for _, counts in rows] or [np.zeros(0)], dtype=np.float64)
+    matrix = sparse.csr_matrix((counts * idf[indices], indices, indptr), shape=(len(rows), idf.size))
+    return _l2_normalize(matrix)
+
+
+def bitset_words(columns: int) -> int:
+    return max((columns + 63) // 64, 1)
+
+
+def skill_bitsets(skill_sets: Sequence[Iterable[str]], columns: Mapping[str, int], words: int) -> np.ndarray:
+    # One row of `words` uint64 per skill set; `columns` must map every skill to its bit
+    bits = np.zeros((len(skill_sets), words), dtype=np.uint64)
+    for row, skills in enumerate(skill_sets):
+        for skill in skills:
+            column = columns[skill]
+            bits[row, column >> 6] |= np.uint64(1 << (column & 63))
+    return bits
+
+
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    # Set bits per uint64 word; numpy >= 2.0 has this built in
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits)
+    return _BYTE_POPCOUNT[bits.view(np.uint8)].reshape(*bits.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+# Words of a & b materialized at once when intersecting bitsets; bounds the temporary to 32 MiB
+_BITSET_BLOCK_WORDS = 1 << 22
+
+
+def jaccard_bitsets(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Pairwise |A & B| / |A | B| of two sets of bitset rows of the same width
+    size_a = popcount(a).sum(axis=1, dtype=np.int64).reshape(-1, 1)
+    size_b = popcount(b).sum(axis=1, dtype=np.int64).reshape(1, -1)
+    inter = np.zeros((a.shape[0], b.shape[0]))
+    step = max(_BITSET_BLOCK_WORDS // max(b.size, 1), 1)
+    for start in range(0, a.shape[0], step):
+        block = a[start : start + step, None, :] & b[None, :, :]
+        inter[start : start + step] = popcount(block).sum(axis=2, dtype=np.int64)
+    union = size_a + size_b - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def cosine_scores(a: sparse.csr_matrix, b: sparse.csr_matrix) -> np.ndarray:
+    # Rows are already L2-normalized, so the sparse product is the cosine similarity
+    return (a @ b.T).toarray()
+
+
+def _l2_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    from scipy import sparse
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
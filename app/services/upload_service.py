@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterator, Optional, Set
+
+import anyio
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+
+from ..config import get_settings
+from ..models import UploadSession
+from ..utils.blob_store import store
+from ..utils.file_storage import CHUNK_SIZE, StoredFile, remove_file, spool_path, storage_path
+from .ingest_service import RESUME_EXTENSIONS
+
+
+settings = get_settings()
+
+PARTIAL_DIR = ".partial"
+# Declared Content-Types accepted per extension; browsers and curl fall back to octet-stream
+MIME_TYPES = {
+    ".pdf": {"application/pdf"},
+    ".docx": {"application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/zip"},
+    ".txt": {"text/plain"},
+}
+GENERIC_MIME_TYPES = {"", "application/octet-stream"}
+
+_writing: Set[str] = set()
+
+
+def extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in RESUME_EXTENSIONS:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type; expected one of {sorted(RESUME_EXTENSIONS)}")
+    return ext
+
+
+def check_declared(ext: str, content_type: Optional[str], size: Optional[int]) -> None:
+    # Everything knowable from the headers is rejected before a single body byte is read
+    mime = (content_type or "").split(";")[0].strip().lower()
+    if mime not in GENERIC_MIME_TYPES and mime not in MIME_TYPES[ext]:
+        raise HTTPException(status_code=415, detail=f"Content-Type {mime} does not match {ext}")
+    if size is not None and size > settings.upload_max_bytes:
+        raise _too_large(settings.upload_max_bytes)
+
+
+def check_head(ext: str, head: bytes) -> None:
+    # The first bytes must look like the claimed type, so a mislabelled file is refused early
+    if ext == ".pdf":
+        ok = head.startswith(b"%PDF-")
+    elif ext == ".docx":
+        ok = head.startswith(b"PK\x03\x04")
+    else:
+        ok = b"\x00" not in head
+    if not ok:
+        raise HTTPException(status_code=415, detail=f"File content does not look like {ext}")
+
+
+def content_length(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds {limit} bytes")
+
+
+async def _copy(chunks: AsyncIterator[bytes], target, ext: str, written: int, limit: int, digest=None) -> int:
+    # Writes go through anyio's file wrapper: each write is a short hop to a worker thread, so no
+    # thread is held for the length of the upload
+    head = b"" if written == 0 else None
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if head is not None:
+            head += chunk
+            if len(head) >= 8:
+                check_head(ext, head)
+                head = None
+        written += len(chunk)
+        if written > limit:
+            raise _too_large(limit)
+        if digest is not None:
+            digest.update(chunk)
+        await target.write(chunk)
+    if head:
+        check_head(ext, head)
+    return written
+
+
+async def receive(chunks: AsyncIterator[bytes], filename: str) -> StoredFile:
+    # One-shot streaming upload: hashed on the fly into a spool file, then moved into the blob store as
+    # <sha256><ext>, exactly like file_storage.save_stream
+    ext = extension(filename)
+    tmp_path = await anyio.to_thread.run_sync(spool_path, ext)
+    digest = hashlib.sha256()
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as target:
+            size = await _copy(chunks, target, ext, 0, settings.upload_max_bytes, digest)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty upload")
+        sha256 = digest.hexdigest()
+        name = f"{sha256}{ext}"
+        await anyio.to_thread.run_sync(store.put_file, name, tmp_path)
+    except BaseException:
+        await anyio.to_thread.run_sync(remove_file, tmp_path)
+        raise
+    return StoredFile(name, sha256, size)
+
+
+def partial_path(upload_id: str) -> str:
+    return storage_path(os.path.join(PARTIAL_DIR, upload_id))
+
+
+def create_session(db: Session, user_id: int, filename: str, size: int) -> UploadSession:
+    extension(filename)
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="size must be positive")
+    if size > settings.upload_max_bytes:
+        raise _too_large(settings.upload_max_bytes)
+    purge_expired(db)
+    session = UploadSession(id=uuid.uuid4().hex, user_id=user_id, filename=os.path.basename(filename), size=size)
+    os.makedirs(os.path.dirname(partial_path(session.id)), exist_ok=True)
+    open(partial_path(session.id), "wb").close()
+    db.add(session)
+    db.commit()
+    return session
+
+
+def get_session(db: Session, upload_id: str, user_id: int) -> UploadSession:
+    session = db.get(UploadSession, upload_id)
+    if session is None or session.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+def purge_expired(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.upload_session_ttl_seconds)
+    expired = db.scalars(select(UploadSession.id).where(UploadSession.updated_at < cutoff)).all()
+    for upload_id in expired:
+        db.delete(db.get(UploadSession, upload_id))
+        remove_file(partial_path(upload_id))
+    if expired:
+        db.commit()
+    return len(expired)
+
+
+def discard(db: Session, upload_id: str) -> None:
+    db.execute(delete(UploadSession).where(UploadSession.id == upload_id))
+    db.commit()
+    remove_file(partial_path(upload_id))
+
+
+@contextmanager
+def exclusive(upload_id: str) -> Iterator[None]:
+    # One writer per upload in this process, held from the offset check to the offset save, so two
+    # overlapping PATCHes are refused instead of interleaving bytes in the part file
+    if upload_id in _writing:
+        raise HTTPException(status_code=409, detail="Another request is writing this upload")
+    _writing.add(upload_id)
+    try:
+        yield
+    finally:
+        _writing.discard(upload_id)
+
+
+async def append(session: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    # Appends from `offset`, which must equal what the server already holds, and returns the new offset.
+    # A dropped connection keeps whatever arrived; a rejected chunk (too large, wrong type) is rolled back.
+    if offset != session.offset:
+        raise HTTPException(status_code=409, detail="Upload-Offset does not match", headers={"Upload-Offset": str(session.offset)})
+    ext = extension(session.filename)
+    async with await anyio.open_file(partial_path(session.id), "r+b") as target:
+        # Bytes past the recorded offset are from a request that died before its offset was saved
+        await target.truncate(offset)
+        await target.seek(offset)
+        try:
+            await _copy(chunks, target, ext, offset, session.size)
+        except ClientDisconnect:
+            pass
+        except BaseException:
+            await target.truncate(offset)
+            raise
+        await target.flush()
+        return await target.tell()
+
+
+def save_offset(db: Session, upload_id: str, expected: int, offset: int) -> bool:
+    # Compare-and-set: a second API process writing the same upload loses here
+    result = db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id, UploadSession.offset == expected)
+        .values(offset=offset, updated_at=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def finish(db: Session, upload_id: str, filename: str) -> StoredFile:
+    # The part file is hashed in one sequential pass (a hash state cannot be carried across requests) and
+    # copied into the blob store; the session row goes in the caller's transaction, with the resume it becomes.
+    # The part file itself stays until that transaction has committed (see finished), so a failed
+    # registration leaves the upload complete and an empty PATCH at the final offset retries it.
+    path = partial_path(upload_id)
+    ext = os.path.splitext(filename)[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as source:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    sha256 = digest.hexdigest()
+    name = f"{sha256}{ext}"
+    # put_file consumes its input, so it gets a hard link to the part file (a copy across devices)
+    staged = f"{path}.staged"
+    remove_file(staged)
+    try:
+        os.link(path, staged)
+    except OSError:
+        shutil.copyfile(path, staged)
+    store.put_file(name, staged)
+    db.execute(delete(UploadSession).where(UploadSession.id == upload_id))
+    return StoredFile(name, sha256, size)
+
+
+def finished(upload_id: str) -> None:
+    # The resume is committed: the part file is no longer needed for a retry
+    remove_file(partial_path(upload_id))
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from .config import get_settings
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "data", "skills.json")
+
+# Hyphens and whitespace separate tokens, so "scikit-learn" and "scikit learn" tokenize the same way
+SKILL_TOKEN_PATTERN = re.compile(r"[a-z0-9\+#\.]+")
+_END = ""
+
+
+def skill_tokens(text: Optional[str]) -> List[str]:
+    tokens = []
+    for token in SKILL_TOKEN_PATTERN.findall((text or "").lower()):
+        # Drop sentence punctuation ("SQL.") but keep inner dots ("node.js")
+        token = token.rstrip(".")
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def _synonyms(skill, value) -> List[str]:
+    # A bare string is one synonym; iterating it would register every character as a skill
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [str(s) for s in value]
+    raise ValueError(f"Synonyms of skill {skill!r} must be a list or a string")
+
+
+def load_taxonomy(path: str) -> Dict[str, List[str]]:
+    # JSON: {"kubernetes": ["k8s"], ...} or a list of names. CSV: canonical name, then any synonyms.
+    taxonomy: Dict[str, List[str]] = {}
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                cells = [c.strip() for c in row if c.strip()]
+                if cells and not cells[0].startswith("#"):
+                    taxonomy.setdefault(cells[0].lower(), []).extend(cells[1:])
+        return taxonomy
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return {str(k).lower(): _synonyms(k, v) for k, v in data.items()}
+    if isinstance(data, list):
+        return {str(k).lower(): [] for k in data}
+    raise ValueError("Skill taxonomy must be a JSON object or list")
+
+
+# Token-level trie over every canonical name and synonym. Extraction is one left-to-right pass that
+# takes the longest phrase starting at each token, so cost grows with the text, not the taxonomy.
+class SkillMatcher:
+    def __init__(self, taxonomy: Dict[str, Iterable[str]]) -> None:
+        self._root: dict = {}
+        self.skills = len(taxonomy)
+        self.terms = 0
+        for canonical, synonyms in taxonomy.items():
+            for term in [canonical, *synonyms]:
+                self._add(term, canonical)
+
+    def _add(self, term: str, canonical: str) -> None:
+        tokens = skill_tokens(term)
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _END not in node:
+            self.terms += 1
+        node[_END] = canonical
+
+    def extract(self, text: Optional[str]) -> List[str]:
+        tokens = skill_tokens(text)
+        found = set()
+        i, n = 0, len(tokens)
+        while i < n:
+            node = self._root.get(tokens[i])
+            match, end, j = None, i, i
+            while node is not None:
+                if _END in node:
+                    match, end = node[_END], j
+                j += 1
+                if j >= n:
+                    break
+                node = node.get(tokens[j])
+            if match is not None:
+                found.add(match)
+                i = end + 1
+            else:
+                i += 1
+        return sorted(found)
+
+    def canonical(self, term: str) -> str:
+        # Maps one user-supplied skill ("k8s") to its canonical name; unknown skills are just lowercased
+        node: Optional[dict] = self._root
+        for token in skill_tokens(term):
+            node = node.get(token) if node is not None else None
+        if node is not None and _END in node:
+            return node[_END]
+        return term.strip().lower()
+
+
+class SkillRegistry:
+    # Holds the active matcher. Reloads swap the reference atomically, and a changed file is picked up
+    # within `check_interval` seconds in every process (API workers and parser children alike).
+    def __init__(self, path: Optional[str] = None, check_interval: Optional[float] = None) -> None:
+        self.path = path or settings.skills_taxonomy_path or DEFAULT_TAXONOMY_PATH
+        self.check_interval = settings.skills_reload_seconds if check_interval is None else check_interval
+        self.loaded_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._matcher: Optional[SkillMatcher] = None
+        self._mtime = 0.0
+        self._checked = 0.0
+
+    def matcher(self) -> SkillMatcher:
+        now = time.monotonic()
+        if self._matcher is None or (self.check_interval > 0 and now - self._checked >= self.check_interval):
+            with self._lock:
+                if self._matcher is None or now - self._checked >= self.check_interval:
+                    self._checked = now
+                    try:
+                        mtime = os.path.getmtime(self.path)
+                    except OSError:
+                        mtime = self._mtime
+                    if self._matcher is None:
+                        self._load(mtime)
+                    elif mtime != self._mtime:
+                        try:
+                            self._load(mtime)
+                        except (OSError, ValueError) as exc:
+                            # Keep serving the current taxonomy; the file is retried once it changes again
+                            logger.warning("Skill taxonomy reload from %s failed: %s", self.path, exc)
+                            self._mtime = mtime
+        return self._matcher
+
+    def reload(self) -> SkillMatcher:
+        with self._lock:
+            self._checked = time.monotonic()
+            self._load(os.path.getmtime(self.path))
+            return self._matcher
+
+    def _load(self, mtime: float) -> None:
+        # Build fully before swapping so a bad file leaves the current matcher in place
+        matcher = SkillMatcher(load_taxonomy(self.path))
+        self._matcher = matcher
+        self._mtime = mtime
+        self.loaded_at = datetime.utcnow()
+
+
+skill_registry = SkillRegistry()
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import gzip
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import ContextManager, Iterator, Optional
+
+from ..config import get_settings
+
+
+settings = get_settings()
+
+# Compression codecs for text artifacts, by setting and by key suffix. The suffix is part of the key,
+# so changing TEXT_COMPRESSION never makes existing artifacts unreadable.
+CODEC_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+# Where uploaded files and their derived artifacts live, addressed by key (`<sha256><ext>` for uploads,
+# `text/<sha256>.txt[.gz|.zst]` for extracted text). Parsers read through `fetch`, so a worker only needs
+# access to the store, not to the disk of the API node that took the upload.
+class BlobStore:
+    name = ""
+
+    def put_file(self, key: str, path: str) -> None:
+        # Moves a finished local file into the store; `path` is consumed
+        raise NotImplementedError
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def get_bytes(self, key: str) -> bytes:
+        # Raises FileNotFoundError for a missing key
+        raise NotImplementedError
+
+    def fetch(self, key: str) -> ContextManager[str]:
+        # A local path holding the object for the duration of the block
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        # Missing keys are ignored
+        raise NotImplementedError
+
+
+# Objects live under nested directories named after the leading hex digits of the file name
+# (storage/ab/cd/abcd...pdf), so no directory grows past a few thousand entries. Files from before
+# sharding, directly under STORAGE_DIR, are still found.
+class LocalBlobStore(BlobStore):
+    name = "local"
+
+    def __init__(self, root: str, depth: int = 2) -> None:
+        self.root = root
+        self.depth = max(depth, 0)
+
+    def path(self, key: str) -> str:
+        folder, base = os.path.split(key)
+        shards = [base[i * 2 : i * 2 + 2] for i in range(self.depth) if len(base) >= i * 2 + 2]
+        return os.path.join(self.root, folder, *shards, base)
+
+    def _existing(self, key: str) -> str:
+        path = self.path(key)
+        if os.path.exists(path):
+            return path
+        # Parse jobs queued before the blob store carried absolute paths
+        legacy = key if os.path.isabs(key) else os.path.join(self.root, key)
+        if os.path.exists(legacy):
+            return legacy
+        raise FileNotFoundError(key)
+
+    def put_file(self, key: str, path: str) -> None:
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Written aside and renamed, so readers never see half an object
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+
+    def get_bytes(self, key: str) -> bytes:
+        with open(self._existing(key), "rb") as f:
+            return f.read()
+
+    @contextmanager
+    def fetch(self, key: str) -> Iterator[str]:
+        yield self._existing(key)
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self._existing(key))
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._existing(key)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete(self, key: str) -> None:
+        _remove(self.path(key))
+        if not os.path.isabs(key):
+            _remove(os.path.join(self.root, key))
+
+
+# Any S3-compatible service (AWS, MinIO, Ceph, or moto in tests via `client=`). boto3 is only needed
+# when this backend is selected.
+class S3BlobStore(BlobStore):
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = "", region: str = "", client=None) -> None:
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+            client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def put_file(self, key: str, path: str) -> None:
+        # upload_file switches to multipart uploads for large files on its own
+        self.client.upload_file(path, self.bucket, self._key(key))
+        _remove(path)
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def get_bytes(self, key: str) -> bytes:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except Exception as exc:
+            raise _not_found(exc, key)
+
+    @contextmanager
+    def fetch(self, key: str) -> Iterator[str]:
+        # Parsers need a seekable file (pdfminer, python-docx), so the object is downloaded to a temp file
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            try:
+                self.client.download_file(self.bucket, self._key(key), path)
+            except Exception as exc:
+                raise _not_found(exc, key)
+            yield path
+        finally:
+            _remove(path)
+
+    def size(self, key: str) -> int:
+        try:
+            return int(self.client.head_object(Bucket=self.bucket, Key=self._key(key))["ContentLength"])
+        except Exception as exc:
+            raise _not_found(exc, key)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.size(key)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+def _not_found(exc: Exception, key: str) -> Exception:
+    # botocore reports a missing object as a ClientError whose code is NoSuchKey (GET) or 404 (HEAD)
+    code = str((getattr(exc, "response", None) or {}).get("Error", {}).get("Code", ""))
+    if code in ("NoSuchKey", "404", "NotFound"):
+        return FileNotFoundError(key)
+    return exc
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def create_store() -> BlobStore:
+    if settings.storage_backend == "s3":
+        return S3BlobStore(settings.s3_bucket, settings.s3_prefix, settings.s3_endpoint_url, settings.s3_region)
+    if settings.storage_backend != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND {settings.storage_backend!r}")
+    return LocalBlobStore(settings.storage_dir, settings.storage_shard_depth)
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        # mtime=0 keeps the output a pure function of the input
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decompress(data: bytes, key: str) -> bytes:
+    if key.endswith(CODEC_SUFFIXES["gzip"]):
+        return gzip.decompress(data)
+    if key.endswith(CODEC_SUFFIXES["zstd"]):
+        return _zstd().ZstdDecompressor().decompress(data)
+    return data
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("TEXT_COMPRESSION=zstd requires zstandard (pip install zstandard)")
+    return zstandard
+
+
+def text_key(sha256: str, codec: Optional[str] = None) -> str:
+    codec = settings.text_compression if codec is None else codec
+    if codec not in CODEC_SUFFIXES:
+        raise RuntimeError(f"Unknown TEXT_COMPRESSION {codec!r}")
+    return f"text/{sha256}.txt{CODEC_SUFFIXES[codec]}"
+
+
+def put_text(target: BlobStore, sha256: str, text: str) -> str:
+    key = text_key(sha256)
+    target.put_bytes(key, compress(text.encode("utf-8"), settings.text_compression))
+    return key
+
+
+def get_text(source: BlobStore, key: str) -> str:
+    return decompress(source.get_bytes(key), key).decode("utf-8")
+
+
+def spool_dir() -> str:
+    # Uploads are written and hashed here before they move into the store. Inside STORAGE_DIR, so the
+    # local backend's move is a rename on the same filesystem.
+    path = os.path.join(settings.storage_dir, ".spool")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+store = create_store()
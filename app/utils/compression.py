@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Content types worth compressing. Event streams are deliberately absent: a compressor holds bytes
+# back, and every SSE event must reach the client as soon as it is written.
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+    "text/xml",
+}
+
+
+def _brotli():
+    # Optional: brotli or brotlicffi enables `br`, otherwise clients get gzip
+    for name in ("brotli", "brotlicffi"):
+        try:
+            return __import__(name)
+        except ImportError:
+            continue
+    return None
+
+
+class _Gzip:
+    name = "gzip"
+
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    name = "br"
+
+    def __init__(self, module, quality: int) -> None:
+        self._compressor = module.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def _accepted(header: str) -> dict:
+    # Accept-Encoding as {coding: q}
+    result = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[coding.strip().lower()] = q
+    return result
+
+
+# Replaces Starlette's GZipMiddleware, which compresses event streams (holding SSE events back) and
+# runs at level 9. Responses below `minimum_size` are sent as is; streamed bodies are flushed chunk by
+# chunk, so CSV/NDJSON exports still arrive progressively.
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli = _brotli()
+
+    def _choose(self, accept_encoding: str) -> Optional[str]:
+        accepted = _accepted(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        if self.brotli is not None and accepted.get("br", wildcard) > 0:
+            return "br"
+        if accepted.get("gzip", wildcard) > 0:
+            return "gzip"
+        return None
+
+    def _encoder(self, encoding: str):
+        return _Brotli(self.brotli, self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+    @staticmethod
+    def _compressible(status: int, headers: Headers) -> bool:
+        if status < 200 or status in (204, 206, 304) or "content-encoding" in headers or "content-range" in headers:
+            return False
+        return headers.get("content-type", "").split(";")[0].strip().lower() in COMPRESSIBLE_TYPES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether compression is worth it
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                initial, start = start, None
+                headers = MutableHeaders(raw=initial["headers"])
+                if not self._compressible(initial["status"], headers) or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(initial)
+                    await send(message)
+                    return
+                encoder = self._encoder(encoding)
+                data = encoder.compress(body, not more_body)
+                headers["Content-Encoding"] = encoder.name
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                if not more_body:
+                    headers["Content-Length"] = str(len(data))
+                # The bytes differ from the identity representation, so a strong validator becomes weak
+                tag = headers.get("etag")
+                if tag and not tag.startswith("W/"):
+                    headers["ETag"] = "W/" + tag
+                await send(initial)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+            await send({"type": "http.response.body", "body": encoder.compress(body, not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,26 +1,71 @@
+import hashlib
 import os
 import uuid
-from typing import Tuple
+from typing import BinaryIO, Iterable, NamedTuple
 
 from fastapi import UploadFile
 
 from ..config import get_settings
+from .blob_store import spool_dir, store
 
 
 settings = get_settings()
 
+CHUNK_SIZE = 1024 * 1024
 
-def save_upload(file: UploadFile) -> Tuple[str, str]:
-    os.makedirs(settings.storage_dir, exist_ok=True)
-    ext = os.path.splitext(file.filename or "")[1].lower()
-    unique_name = f"{uuid.uuid4().hex}{ext}"
-    dest_path = os.path.join(settings.storage_dir, unique_name)
-    with open(dest_path, "wb") as f:
-        while True:
-            chunk = file.file.read(1024 * 1024)
-            if not chunk:
-                break
-            f.write(chunk)
-    return unique_name, dest_path
 
+class StoredFile(NamedTuple):
+    # `name` is the blob store key, <sha256><ext>
+    name: str
+    sha256: str
+    size: int
 
+
+def storage_path(name: str) -> str:
+    # Local working area under STORAGE_DIR (spooled and partial uploads); stored files live in the blob store
+    return os.path.join(settings.storage_dir, name)
+
+
+def spool_path(ext: str) -> str:
+    return os.path.join(spool_dir(), f"{uuid.uuid4().hex}{ext}")
+
+
+def save_stream(source: BinaryIO, filename: str) -> StoredFile:
+    # Content-addressed: the file is hashed while it streams to a spool file, then moved into the blob store
+    # as <sha256><ext>. Re-uploading identical bytes lands on the same key.
+    ext = os.path.splitext(filename or "")[1].lower()
+    tmp_path = spool_path(ext)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        sha256 = digest.hexdigest()
+        name = f"{sha256}{ext}"
+        store.put_file(name, tmp_path)
+    except BaseException:
+        remove_file(tmp_path)
+        raise
+    return StoredFile(name, sha256, size)
+
+
+def save_upload(file: UploadFile) -> StoredFile:
+    return save_stream(file.file, file.filename or "")
+
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def delete_stored(keys: Iterable[str]) -> None:
+    for key in keys:
+        store.delete(key)
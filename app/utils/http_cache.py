@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.staticfiles import StaticFiles
+
+
+# Conditional GETs. ETags are weak and derived from version stamps (row counts, max ids, max
+# updated_at, row versions) that one indexed query reads, so a client revalidating an unchanged
+# resource costs that query and an empty 304: no rows are loaded and nothing is serialized.
+# Weak because compression may change the bytes of an equivalent response.
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag(*parts) -> str:
+    return 'W/"' + hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest() + '"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def matches(if_none_match: Optional[str], tag: str) -> bool:
+    # Weak comparison, as If-None-Match requires
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque(candidate) == _opaque(tag) for candidate in if_none_match.split(","))
+
+
+def _headers(tag: str) -> dict:
+    # Per user: private, and cached copies are keyed by the credentials that fetched them
+    return {"ETag": tag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+
+
+def not_modified(request: Request, tag: str) -> Optional[Response]:
+    # The 304 to return instead of the full response, when the client already holds this version
+    if matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=_headers(tag))
+    return None
+
+
+def set_etag(response: Response, tag: str) -> None:
+    response.headers.update(_headers(tag))
+
+
+# Build tools put a content hash in asset file names (Vite: everything under assets/; webpack-style
+# names like main.3f2a9c1b.js), so such a file never changes and may be cached for a year. Anything
+# else, index.html above all, is revalidated on every use against StaticFiles' ETag/Last-Modified.
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+_HASHED_NAME = re.compile(r"[.-][0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+
+def is_hashed_asset(relative_path: str) -> bool:
+    parts = relative_path.replace(os.sep, "/").split("/")
+    return parts[0] == "assets" or bool(_HASHED_NAME.search(parts[-1]))
+
+
+class CachedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if status_code == 200 and is_hashed_asset(os.path.relpath(full_path, self.directory)):
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = REVALIDATE
+        return response
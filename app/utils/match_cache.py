@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+# (resume_id, resume_version, job_id, job_version). Versions bump when a resume finishes parsing and when a
+# job is edited, so a changed row simply stops matching its old entries instead of being invalidated.
+PairKey = Tuple[int, int, int, int]
+
+# Rough per-entry footprint: key tuple and its ints, the float, and the OrderedDict link
+ENTRY_BYTES = sys.getsizeof((0, 0, 0, 0)) + 4 * sys.getsizeof(2**40) + sys.getsizeof(0.0) + 100
+
+
+# Optional second level shared by every worker process on a host. get() returns None for a miss.
+class SharedCacheBackend:
+    def get(self, key: str) -> Optional[float]:
+        raise NotImplementedError
+
+    def put(self, key: str, value: float) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+# A small SQLite file next to the app; WAL lets many processes read while one writes. Oldest entries
+# are trimmed every `trim_every` writes once the table passes max_entries.
+class SQLiteCacheBackend(SharedCacheBackend):
+    def __init__(self, path: str, max_entries: int = 1_000_000, trim_every: int = 1000) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.trim_every = max(trim_every, 1)
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS pair_scores (key TEXT PRIMARY KEY, score REAL NOT NULL, touched REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_pair_scores_touched ON pair_scores (touched)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[float]:
+        row = self._connection().execute("SELECT score FROM pair_scores WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: float) -> None:
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO pair_scores (key, score, touched) VALUES (?, ?, ?)", (key, value, time.time()))
+        conn.commit()
+        with self._lock:
+            self._writes += 1
+            trim = self._writes % self.trim_every == 0
+        if trim:
+            conn.execute(
+                "DELETE FROM pair_scores WHERE key IN "
+                "(SELECT key FROM pair_scores ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM pair_scores")
+        conn.commit()
+
+
+# Pair -> score with LRU eviction under a memory cap, in front of an optional shared backend.
+# Backend errors count as misses so a locked or missing file never fails a request.
+class MatchCache:
+    def __init__(self, max_bytes: int, shared: Optional[SharedCacheBackend] = None, namespace: str = "") -> None:
+        self.max_entries = max(max_bytes, 0) // ENTRY_BYTES
+        self.shared = shared
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[PairKey, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self.shared is not None
+
+    def _shared_key(self, key: PairKey) -> str:
+        return f"{self.namespace}:" + ":".join(map(str, key))
+
+    def get(self, key: PairKey) -> Optional[float]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.shared is not None:
+            try:
+                value = self.shared.get(self._shared_key(key))
+            except sqlite3.Error:
+                value = None
+                with self._lock:
+                    self.shared_errors += 1
+            if value is not None:
+                self._remember(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: PairKey, value: float) -> None:
+        self._remember(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.put(self._shared_key(key), value)
+            except sqlite3.Error:
+                with self._lock:
+                    self.shared_errors += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "shared": type(self.shared).__name__ if self.shared is not None else None,
+                "shared_hits": self.shared_hits,
+                "shared_errors": self.shared_errors,
+            }
+
+    def _remember(self, key: PairKey, value: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+
+# Listings are keyset-paginated on id (newest first). The cursor is the last id served, wrapped so
+# clients treat it as opaque; the next page's cursor comes back in this header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, _, value = raw.partition(":")
+        if prefix != "id":
+            raise ValueError(raw)
+        return int(value)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_limit(limit: int) -> int:
+    return max(min(limit, 100), 1)
+
+
+def set_next_cursor(response: Response, rows: list, limit: int) -> list:
+    # Callers fetch limit + 1 rows; the extra row only signals that another page exists
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    return rows
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, FrozenSet, Iterable, List, Optional
+from urllib.parse import parse_qs
+
+import anyio
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(APP_DIR)
+# Long-running threads that are never part of a request
+BACKGROUND_THREADS = frozenset({"parse-worker", "score-worker", "snapshot-worker", "profiler"})
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(PROJECT_ROOT):
+        return os.path.relpath(filename, PROJECT_ROOT)
+    index = filename.rfind("site-packages" + os.sep)
+    if index >= 0:
+        return filename[index + len("site-packages") + 1 :]
+    # Standard library: drop the lib/pythonX.Y prefix
+    index = filename.rfind(os.sep + "python")
+    if index >= 0 and os.sep in filename[index + 1 :]:
+        return filename[filename.index(os.sep, index + 1) + 1 :]
+    return os.path.basename(filename)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+# Samples thread stacks at a fixed interval while a request runs and folds them into the
+# "frame;frame;frame count" format that flamegraph.pl, speedscope and inferno read directly.
+# Only stacks that are executing app code are kept, so idle pool threads and an idle event loop drop out;
+# other requests running at the same moment are not separated, so profile on a quiet instance.
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, exclude_names: Iterable[str] = BACKGROUND_THREADS) -> None:
+        self.interval = max(interval, 0.001)
+        self.exclude_names: FrozenSet[str] = frozenset(exclude_names)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.duration = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            excluded = {t.ident for t in threading.enumerate() if t.name in self.exclude_names}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or ident in excluded:
+                    continue
+                stack: List[str] = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    in_app = in_app or code.co_filename.startswith(APP_DIR)
+                    stack.append(_frame_label(code))
+                    frame = frame.f_back
+                if in_app:
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+def wants_profile(scope: dict) -> bool:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile", [])
+    return bool(values) and values[-1] in ("1", "true")
+
+
+def _header(scope_or_message: dict, name: bytes) -> Optional[str]:
+    for key, value in scope_or_message.get("headers") or ():
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+# `?profile=1` on any route: the caller's bearer token is checked first, and only an admin (ADMIN_EMAILS)
+# gets the request run under the sampler with the response replaced by the folded stacks. Anyone else,
+# and any streamed response (no Content-Length: event streams, exports), passes through untouched.
+# Off unless PROFILE_ENABLED is set.
+class ProfilerMiddleware:
+    def __init__(
+        self,
+        app,
+        admin_emails: Iterable[str],
+        interval: float = 0.005,
+        resolve_principal: Optional[Callable[[Optional[str]], Any]] = None,
+    ) -> None:
+        self.app = app
+        self.admin_emails = frozenset(e.strip().lower() for e in admin_emails if e.strip())
+        self.interval = interval
+        self.resolve_principal = resolve_principal
+
+    async def _is_admin(self, scope: dict) -> bool:
+        authorization = _header(scope, b"authorization")
+        if not authorization or self.resolve_principal is None:
+            return False
+        principal = await anyio.to_thread.run_sync(self.resolve_principal, authorization)
+        return principal is not None and (principal.email or "").lower() in self.admin_emails
+
+    async def __call__(self, scope, receive, send) -> None:
+        profiled = scope["type"] == "http" and self.admin_emails and wants_profile(scope)
+        if not profiled or not await self._is_admin(scope):
+            await self.app(scope, receive, send)
+            return
+        messages = []
+        streaming = False
+        profiler = SamplingProfiler(self.interval)
+
+        async def capture(message) -> None:
+            nonlocal streaming
+            starting = message["type"] == "http.response.start"
+            if starting and not streaming and _header(message, b"content-length") is None:
+                # Streamed: buffering would hold an export in memory, or an event stream forever
+                streaming = True
+                profiler.stop()
+            if streaming:
+                await send(message)
+            else:
+                messages.append(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            if not streaming:
+                profiler.stop()
+        if streaming:
+            return
+
+        status = next((m["status"] for m in messages if m["type"] == "http.response.start"), 500)
+        body = profiler.folded().encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profile-samples", str(profiler.samples).encode()),
+                    (b"x-profile-duration-ms", f"{profiler.duration * 1000:.1f}".encode()),
+                    (b"x-profile-status", str(status).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
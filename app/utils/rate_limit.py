@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+# In-memory token buckets, one per key. Each key starts full (`burst` tokens) and refills at
+# `per_minute` tokens a minute. The least recently used keys are dropped past `max_keys`, which only
+# ever makes a client look fresher. Per-process, like the other caches here.
+class TokenBucketLimiter:
+    def __init__(self, burst: int, per_minute: float, max_keys: int = 100_000) -> None:
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.burst > 0 and self.rate > 0
+
+    def acquire(self, key: str) -> Tuple[bool, int]:
+        # Returns (allowed, seconds until the next token)
+        if not self.enabled:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - stamp) * self.rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else max(1, math.ceil((1.0 - tokens) / self.rate))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
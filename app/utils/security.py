@@ -1,55 +1,242 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Tuple
 
-from fastapi import Depends, HTTPException, status, Header
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from fastapi import Depends, HTTPException, Query, Request, status, Header
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
 from ..config import get_settings
-from ..database import get_db
+from ..database import SessionLocal, get_async_db, get_db
 from ..models import User
+from .principal_cache import Principal, PrincipalCache
+from .rate_limit import TokenBucketLimiter
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 settings = get_settings()
+principal_cache = PrincipalCache(settings.auth_cache_size, settings.auth_cache_ttl_seconds)
+
+# bcrypt gets its own small pool so a login storm queues here instead of occupying the threads that
+# serve every other route
+_hash_executor = ThreadPoolExecutor(max_workers=max(settings.password_hash_workers, 1), thread_name_prefix="bcrypt")
+_hash_capacity = max(settings.password_hash_workers, 1) + max(settings.password_hash_queue, 0)
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+login_ip_limiter = TokenBucketLimiter(settings.login_ip_burst, settings.login_ip_per_minute)
+login_account_limiter = TokenBucketLimiter(settings.login_account_burst, settings.login_account_per_minute)
+
+
+class HasherBusyError(Exception):
+    pass
+
+_CHANGED_USERS = "changed_user_ids"
+
+
+# Built on the first password operation, so passlib and bcrypt stay out of startup.
+# min_rounds == default: hashes below the configured cost report needs_update and are upgraded on login
+@lru_cache
+def pwd_context() -> CryptContext:
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=settings.bcrypt_rounds,
+        bcrypt__min_rounds=settings.bcrypt_rounds,
+    )
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    return pwd_context().verify(password, password_hash)
+
+
+def verify_and_rehash(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    # Returns (valid, replacement hash when the stored one uses an outdated cost factor)
+    context = pwd_context()
+    if not context.verify(password, password_hash):
+        return False, None
+    if context.needs_update(password_hash):
+        return True, context.hash(password)
+    return True, None
+
+
+async def _run_hasher(fn, *args):
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= _hash_capacity:
+            raise HasherBusyError()
+        _hash_pending += 1
+    try:
+        return await asyncio.wrap_future(_hash_executor.submit(fn, *args))
+    finally:
+        with _hash_lock:
+            _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hasher(hash_password, password)
+
+
+async def verify_and_rehash_async(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return await _run_hasher(verify_and_rehash, password, password_hash)
+
+
+def hasher_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Too many password operations in flight, retry shortly", headers={"Retry-After": "1"})
+
+
+def enforce_login_rate(request: Request, email: str) -> None:
+    # Both buckets are charged before any hashing, so throttled attempts cost no bcrypt time
+    client = request.client.host if request.client else "unknown"
+    retry_after = 0
+    for limiter, key in ((login_ip_limiter, client), (login_account_limiter, email.strip().lower())):
+        allowed, wait = limiter.acquire(key)
+        if not allowed:
+            retry_after = max(retry_after, wait)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
 
 
 def create_access_token(subject: str, expires_minutes: int) -> str:
+    # jose is imported on first use; requests served from principal_cache never load it
+    from jose import jwt
+
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
     to_encode = {"sub": subject, "exp": expire}
     return jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
 def decode_token(token: str) -> dict:
+    from jose import jwt
+
     return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
 
 
-def get_current_user(authorization: str = Header(None), db: Session = Depends(get_db)) -> User:
+def get_current_user(request: Request, authorization: str = Header(None), db: Session = Depends(get_db)) -> Principal:
+    # Resolved at most once per request, however many dependencies ask for it
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+    token = _extract_bearer_token(authorization)
+    principal = principal_cache.get(token)
+    if principal is None:
+        payload = _decode_claims(token)
+        principal = _remember(token, payload, db.get(User, _subject(payload)))
+    request.state.principal = principal
+    return principal
+
+
+def principal_from_header(authorization: Optional[str]) -> Optional[Principal]:
+    # For code outside the dependency system (ProfilerMiddleware): the caller behind a bearer token, or
+    # None instead of a 401. Blocking on a cache miss, so async callers run it on a worker thread.
     try:
         token = _extract_bearer_token(authorization)
-        payload = decode_token(token)
-        subject = payload.get("sub")
-        if subject is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        user_id = int(subject)
-    except (JWTError, ValueError):
+        principal = principal_cache.get(token)
+        if principal is None:
+            payload = _decode_claims(token)
+            with SessionLocal() as db:
+                principal = _remember(token, payload, db.get(User, _subject(payload)))
+        return principal
+    except HTTPException:
+        return None
+
+
+def require_admin(principal: Principal = Depends(get_current_user)) -> Principal:
+    # Operational endpoints are limited to ADMIN_EMAILS, the same list that gates `?profile=1`
+    if (principal.email or "").lower() not in {e.lower() for e in settings.admin_emails}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return principal
+
+
+def get_current_user_or_token(
+    request: Request,
+    authorization: str = Header(None),
+    access_token: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+) -> Principal:
+    # EventSource cannot set headers, so streaming endpoints also accept the bearer token as ?access_token=
+    if not authorization and access_token:
+        authorization = f"Bearer {access_token}"
+    return get_current_user(request, authorization, db)
+
+
+async def get_current_user_async(
+    request: Request, authorization: str = Header(None), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+    token = _extract_bearer_token(authorization)
+    principal = principal_cache.get(token)
+    if principal is None:
+        payload = _decode_claims(token)
+        principal = _remember(token, payload, await db.get(User, _subject(payload)))
+    request.state.principal = principal
+    return principal
+
+
+def _decode_claims(token: str) -> dict:
+    from jose import JWTError
+
+    try:
+        return decode_token(token)
+    except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.get(User, user_id)
+
+def _subject(payload: dict) -> int:
+    try:
+        return int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+
+def _remember(token: str, payload: dict, user: Optional[User]) -> Principal:
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    principal = Principal(id=user.id, email=user.email, full_name=user.full_name, created_at=user.created_at)
+    exp = payload.get("exp")
+    principal_cache.put(token, principal, float(exp) if exp is not None else None)
+    return principal
+
+
+# Users changed or deleted through the ORM leave the cache once the change commits (bulk UPDATE/DELETE
+# statements bypass these hooks and rely on the TTL)
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS, None)
 
 
 def _extract_bearer_token(authorization: Optional[str] = None) -> str:
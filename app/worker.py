@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from . import migrations
+from .config import get_settings
+from .database import SessionLocal, engine
+from .services import event_service, parse_service, score_service, snapshot_service
+from .services.resume_service import FAILED as PARSE_FAILED, limit_memory, parse_stored
+from .utils import metrics
+from .utils.blob_store import store
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class Inflight(NamedTuple):
+    job_id: int
+    resume_id: int
+    path: str
+    started: float
+
+
+def _file_labels(key: str) -> Tuple[str, str]:
+    file_type = os.path.splitext(key)[1].lstrip(".").lower() or "none"
+    try:
+        size = metrics.size_class(store.size(key)) if key else "unknown"
+    except Exception:
+        size = "unknown"
+    return file_type, size
+
+
+# Drains the parse_jobs table into a process pool so pdfminer/python-docx never run on API threads.
+# Results are written back from this (parent) process, which keeps DB sessions out of the children.
+class ParseWorker:
+    def __init__(self, workers: Optional[int] = None, poll_interval: Optional[float] = None) -> None:
+        self.workers = max(workers or settings.parse_workers, 1)
+        self.poll_interval = poll_interval or settings.parse_poll_interval
+        # Jobs abandoned by a dead worker are looked for a few times per stale timeout, busy or idle
+        self.stale_check_interval = max(settings.parse_stale_after_seconds / 4, self.poll_interval)
+        self._stale_checked = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="parse-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn keeps children from inheriting the parent's threads, locks and DB connections; each child
+        # caps its own address space so one hostile file cannot take the host down with it
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=limit_memory,
+            initargs=(settings.parse_memory_mb,),
+        )
+
+    def run(self) -> None:
+        pool = self._new_pool()
+        inflight: Dict[Future, Inflight] = {}
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._requeue_stale(inflight)
+                    broken = self._step(pool, inflight)
+                except Exception:
+                    logger.exception("Parse worker iteration failed")
+                    self._stop.wait(self.poll_interval)
+                    continue
+                if broken:
+                    # A child died (OOM, segfault); every in-flight future is lost with the pool
+                    for item in inflight.values():
+                        self._record_failure(item.job_id, "Parser process terminated", item.path)
+                    inflight.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _step(self, pool: ProcessPoolExecutor, inflight: Dict[Future, Inflight]) -> bool:
+        broken = False
+        free = self.workers - len(inflight)
+        if free > 0:
+            db = SessionLocal()
+            try:
+                claimed = parse_service.claim(db, free)
+            finally:
+                db.close()
+            for job_id, resume_id, path in claimed:
+                if not broken:
+                    try:
+                        # Only as many jobs as idle processes are submitted, so submit-to-done is parse time
+                        future = pool.submit(parse_stored, path)
+                        inflight[future] = Inflight(job_id, resume_id, path, time.perf_counter())
+                        continue
+                    except BrokenProcessPool:
+                        broken = True
+                self._record_failure(job_id, "Parser process terminated", path)
+        if broken:
+            return True
+        if not inflight:
+            self._maintain()
+            self._stop.wait(self.poll_interval)
+            return False
+        done, _ = wait(list(inflight), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+        for future in done:
+            broken = self._finish(future, inflight.pop(future)) or broken
+        return broken
+
+    def _finish(self, future: Future, item: Inflight) -> bool:
+        job_id, resume_id = item.job_id, item.resume_id
+        file_type, size = _file_labels(item.path)
+        metrics.parse_seconds.observe(time.perf_counter() - item.started, file_type, size)
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            self._record_failure(job_id, "Parser process terminated", item.path)
+            return True
+        except Exception as exc:
+            self._record_failure(job_id, f"{type(exc).__name__}: {exc}", item.path)
+            return False
+        metrics.parse_results.inc(file_type, "failed" if result.status == PARSE_FAILED else result.status)
+        db = SessionLocal()
+        try:
+            parse_service.complete(db, job_id, resume_id, result)
+        except Exception:
+            logger.exception("Failed to store parse result for resume %s", resume_id)
+            db.rollback()
+            parse_service.fail(db, job_id, "Failed to store parse result")
+        finally:
+            db.close()
+        return False
+
+    def _requeue_stale(self, inflight: Dict[Future, Inflight]) -> None:
+        now = time.monotonic()
+        if self._stale_checked and now - self._stale_checked < self.stale_check_interval:
+            return
+        self._stale_checked = now
+        db = SessionLocal()
+        try:
+            parse_service.requeue_stale(db, running=[item.job_id for item in inflight.values()])
+        finally:
+            db.close()
+
+    def _maintain(self) -> None:
+        # Idle housekeeping: trims old rows from parse_events (database events backend; rate limited there)
+        db = SessionLocal()
+        try:
+            event_service.broker.maintain(db)
+        except Exception:
+            logger.exception("Parse event cleanup failed")
+        finally:
+            db.close()
+
+    def _record_failure(self, job_id: int, error: str, path: str = "") -> None:
+        metrics.parse_results.inc(_file_labels(path)[0], "error")
+        db = SessionLocal()
+        try:
+            parse_service.fail(db, job_id, error)
+        finally:
+            db.close()
+
+
+# Drains score_tasks: rescoring a parsed resume against every job, or an edited job against every parsed
+# resume, and activates a new scorer version once its backfill has finished.
+class ScoreWorker:
+    def __init__(self, poll_interval: Optional[float] = None) -> None:
+        self.poll_interval = poll_interval or settings.score_poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="score-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self) -> None:
+        db = SessionLocal()
+        try:
+            score_service.ensure_version(db)
+        except Exception:
+            logger.exception("Failed to register scorer version %s", score_service.SCORER_VERSION)
+        finally:
+            db.close()
+        while not self._stop.is_set():
+            try:
+                busy = self._step()
+            except Exception:
+                logger.exception("Score worker iteration failed")
+                busy = False
+            if not busy:
+                self._stop.wait(self.poll_interval)
+
+    def _step(self) -> bool:
+        db = SessionLocal()
+        try:
+            task = score_service.claim(db)
+            if task is None:
+                score_service.activate_ready(db)
+                return False
+            try:
+                score_service.run_task(db, task)
+            except Exception:
+                logger.exception("Failed to score %s %s", task.kind, task.target_id)
+                db.rollback()
+                score_service.release(db, task)
+                return False
+            score_service.finish(db, task)
+            return True
+        finally:
+            db.close()
+
+
+# Rebuilds the corpus snapshot when enough resumes have changed since the current generation was built.
+# A build reads every feature row once, so it runs on its own thread rather than between parse jobs.
+class SnapshotWorker:
+    def __init__(self, poll_interval: Optional[float] = None) -> None:
+        self.poll_interval = poll_interval or settings.corpus_snapshot_poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None or not settings.corpus_snapshot:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="snapshot-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                snapshot_service.maybe_rebuild(db)
+            except Exception:
+                logger.exception("Corpus snapshot build failed")
+            finally:
+                db.close()
+            self._stop.wait(self.poll_interval)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    migrations.ensure(engine)
+    worker = ParseWorker()
+    scorer = ScoreWorker()
+    snapshots = SnapshotWorker()
+    signal.signal(signal.SIGTERM, lambda *_: (worker.stop(), scorer.stop(), snapshots.stop()))
+    scorer.start()
+    snapshots.start()
+    if settings.metrics_enabled and settings.metrics_port:
+        metrics.serve(settings.metrics_port)
+        logger.info("Serving metrics on port %s", settings.metrics_port)
+    logger.info("Parse worker started with %s processes", worker.workers)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scorer.stop(timeout=5)
+        snapshots.stop(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import httpx
+
+# The server is started from the project root so `app.main` resolves
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workdir: str, extra_env: dict) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "STORAGE_DIR": os.path.join(workdir, "storage"),
+            "PARSE_WORKER_MODE": "external",
+            # The burst should reach bcrypt, not the login throttle
+            "LOGIN_IP_BURST": "0",
+            "LOGIN_ACCOUNT_BURST": "0",
+        }
+    )
+    env.update(extra_env)
+    # A fresh database, migrated as a deploy would before starting the server
+    subprocess.run([sys.executable, "-m", "app.migrations"], cwd=PROJECT_ROOT, env=env, check=True, capture_output=True)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def hammer(base: str, seconds: float, threads: int, request) -> tuple[list, dict]:
+    latencies: list = []
+    statuses: dict = {}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def loop() -> None:
+        with httpx.Client(base_url=base, timeout=60) as client:
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                status = request(client).status_code
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+    workers = [threading.Thread(target=loop) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return latencies, statuses
+
+
+def summarize(latencies: list, statuses: dict, seconds: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def run(seconds: float, readers: int, logins: int, extra_env: dict) -> dict:
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    proc = start_server(port, workdir, extra_env)
+    try:
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        httpx.post(f"{base}/auth/signup", json={"email": email, "password": "secret12"}).raise_for_status()
+        token = httpx.post(f"{base}/auth/login", json={"email": email, "password": "secret12"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        read = lambda client: client.get("/jobs/", headers=headers)
+        login = lambda client: client.post("/auth/login", json={"email": email, "password": "secret12"})
+
+        baseline = summarize(*hammer(base, seconds, readers, read), seconds)
+
+        burst_result: dict = {}
+
+        def burst() -> None:
+            burst_result.update(summarize(*hammer(base, seconds, logins, login), seconds))
+
+        burster = threading.Thread(target=burst)
+        burster.start()
+        during = summarize(*hammer(base, seconds, readers, read), seconds)
+        burster.join()
+        return {
+            "seconds_per_phase": seconds,
+            "reader_threads": readers,
+            "login_threads": logins,
+            "env": extra_env,
+            "jobs_baseline": baseline,
+            "jobs_during_login_burst": during,
+            "logins": burst_result,
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p50/p99 of GET /jobs/ alone and during a login burst")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the server, repeatable")
+    args = parser.parse_args()
+    extra = dict(item.split("=", 1) for item in args.env)
+    print(json.dumps(run(args.seconds, args.readers, args.logins, extra), indent=2))
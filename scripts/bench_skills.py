@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import string
+import sys
+import time
+
+# Ensure project root is on sys.path so `app` is importable when running this script directly
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.taxonomy import SkillMatcher
+
+
+def make_taxonomy(size: int, rng: random.Random) -> dict:
+    taxonomy = {}
+    while len(taxonomy) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.choice([1, 1, 1, 2, 3]))]
+        taxonomy.setdefault(" ".join(words), [words[0][:3] + str(rng.randint(0, 99))])
+    return taxonomy
+
+
+def make_documents(taxonomy: dict, count: int, words: int, rng: random.Random) -> list[str]:
+    skills = list(taxonomy)
+    docs = []
+    for _ in range(count):
+        body = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(words)]
+        for _ in range(10):
+            body.insert(rng.randrange(len(body)), rng.choice(skills))
+        docs.append(" ".join(body))
+    return docs
+
+
+def regex_matcher(taxonomy: dict):
+    # The pre-taxonomy approach: one alternation over every term, longest first, plus a synonym lookup
+    canonical = {term.lower(): name for name, synonyms in taxonomy.items() for term in [name, *synonyms]}
+    alternation = "|".join(re.escape(t) for t in sorted(canonical, key=len, reverse=True))
+    pattern = re.compile(rf"\b({alternation})\b", re.I)
+    return lambda text: sorted({canonical[m.lower()] for m in pattern.findall(text)})
+
+
+def timed(fn, docs: list[str]) -> tuple[float, list]:
+    start = time.perf_counter()
+    results = [fn(d) for d in docs]
+    return time.perf_counter() - start, results
+
+
+def run(sizes: list[int], docs: int, words: int, seed: int) -> list[dict]:
+    results = []
+    for size in sizes:
+        rng = random.Random(seed)
+        taxonomy = make_taxonomy(size, rng)
+        corpus = make_documents(taxonomy, docs, words, rng)
+
+        start = time.perf_counter()
+        regex_extract = regex_matcher(taxonomy)
+        regex_build = time.perf_counter() - start
+        start = time.perf_counter()
+        matcher = SkillMatcher(taxonomy)
+        trie_build = time.perf_counter() - start
+
+        regex_time, regex_out = timed(regex_extract, corpus)
+        trie_time, trie_out = timed(matcher.extract, corpus)
+        agree = sum(1 for a, b in zip(regex_out, trie_out) if a == b) / float(len(corpus) or 1)
+        results.append(
+            {
+                "skills": size,
+                "documents": docs,
+                "words_per_document": words,
+                "regex_build_ms": round(regex_build * 1000, 2),
+                "trie_build_ms": round(trie_build * 1000, 2),
+                "regex_ms_per_doc": round(regex_time * 1000 / docs, 4),
+                "trie_ms_per_doc": round(trie_time * 1000 / docs, 4),
+                "speedup": round(regex_time / trie_time, 2) if trie_time else None,
+                "agreement": round(agree, 4),
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare regex alternation vs trie skill extraction")
+    parser.add_argument("--sizes", default="10,1000,10000", help="comma-separated taxonomy sizes")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--words", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(run([int(s) for s in args.sizes.split(",")], args.docs, args.words, args.seed), indent=2))
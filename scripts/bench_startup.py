@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+# Run from the project root so `app` resolves in the child interpreters
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+
+# Loaded on first use only; importing app.main must not pull any of them in
+LAZY_MODULES = ("pdfminer", "docx", "passlib", "bcrypt", "jose", "scipy", "sqlalchemy.dialects.postgresql")
+# Default budgets (median ms), with headroom for a shared CI runner; tests/test_startup.py enforces them
+IMPORT_BUDGET_MS = 2500.0
+READY_BUDGET_MS = 3000.0
+
+_SERVE = """
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    assert client.get("/health").status_code == 200
+    print("ready", flush=True)
+"""
+
+
+def child_env(workdir: str) -> dict:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+            "STORAGE_DIR": os.path.join(workdir, "storage"),
+            # A serving node: no parse or score worker threads to start
+            "PARSE_WORKER_MODE": "external",
+        }
+    )
+    return env
+
+
+def import_profile(env: dict) -> Tuple[float, Dict[str, float]]:
+    # `python -X importtime` writes "import time: self | cumulative | name" per module to stderr.
+    # Returns the cumulative ms of app.main and the cumulative ms of every module it loaded.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    modules: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative) / 1000
+    return modules.get("app.main", 0.0), modules
+
+
+def time_to_ready(env: dict) -> float:
+    # Wall clock from spawning the interpreter to the first successful request: imports, migration
+    # check, index warm-up and app startup included
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", _SERVE], cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    elapsed = time.perf_counter() - start
+    proc.wait(timeout=30)
+    if line.strip() != "ready":
+        raise RuntimeError("app did not start")
+    return elapsed * 1000
+
+
+def run(runs: int, top: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix="ats-startup-")
+    env = child_env(workdir)
+    # Migrations are a deploy step; measure the steady state of a node joining an up-to-date database
+    subprocess.run([sys.executable, "-m", "app.migrations"], cwd=PROJECT_ROOT, env=env, check=True, capture_output=True)
+    import_ms: List[float] = []
+    ready_ms: List[float] = []
+    modules: Dict[str, float] = {}
+    for _ in range(runs):
+        total, modules = import_profile(env)
+        import_ms.append(total)
+        ready_ms.append(time_to_ready(env))
+    heaviest = sorted(((ms, name) for name, ms in modules.items() if "." not in name), reverse=True)[:top]
+    return {
+        "runs": runs,
+        "import_app_main_ms": round(statistics.median(import_ms), 1),
+        "time_to_first_response_ms": round(statistics.median(ready_ms), 1),
+        "heaviest_packages_ms": {name: round(ms, 1) for ms, name in heaviest},
+        "eagerly_imported_lazy_modules": sorted(
+            name for name in modules if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+        ),
+    }
+
+
+def budget_failures(report: dict, import_budget_ms: float, ready_budget_ms: float) -> List[str]:
+    failures = []
+    if report["eagerly_imported_lazy_modules"]:
+        failures.append(f"imported at startup: {', '.join(report['eagerly_imported_lazy_modules'])}")
+    if import_budget_ms and report["import_app_main_ms"] > import_budget_ms:
+        failures.append(f"import app.main {report['import_app_main_ms']} ms exceeds {import_budget_ms:g} ms")
+    if ready_budget_ms and report["time_to_first_response_ms"] > ready_budget_ms:
+        failures.append(f"time to first response {report['time_to_first_response_ms']} ms exceeds {ready_budget_ms:g} ms")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start cost of the API: import time and time to first response")
+    parser.add_argument("--runs", type=int, default=5, help="median of this many fresh interpreters")
+    parser.add_argument("--top", type=int, default=10, help="heaviest top-level packages to list")
+    parser.add_argument(
+        "--import-budget-ms", type=float, default=IMPORT_BUDGET_MS, help="exit 1 if importing app.main exceeds this (0: off)"
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, default=READY_BUDGET_MS, help="exit 1 if time to first response exceeds this (0: off)"
+    )
+    args = parser.parse_args()
+    report = run(args.runs, args.top)
+    print(json.dumps(report, indent=2))
+    failures = budget_failures(report, args.import_budget_ms, args.budget_ms)
+    if failures:
+        print("FAIL: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import httpx
+
+# Ensure project root is on sys.path so `app` is importable when running this script directly
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from bench_login_burst import free_port, percentile, start_server
+from synthetic_corpus import FORMATS, CorpusGenerator, render
+
+# Metrics compared against a baseline: higher is better for rates, lower for everything timed or sized
+HIGHER_IS_BETTER = ("_per_s",)
+LOWER_IS_BETTER = ("_ms", "_s", "_mb")
+
+
+def latency(samples: List[float]) -> Dict[str, float]:
+    return {
+        "runs": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+    }
+
+
+def timed_each(fn: Callable, items: list) -> List[float]:
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def micro(workdir: str, seed: int, docs: int, files_per_format: int) -> dict:
+    from app.nlp import extract_skills, match_score
+    from app.services.resume_service import parse_file_to_text
+
+    generator = CorpusGenerator(seed)
+    resumes = list(generator.resumes(docs))
+    jobs = generator.jobs(max(docs // 10, 1))
+    extract_skills(resumes[0][0])  # build the skill matcher outside the measurement
+
+    pairs = [(text, skills, jobs[i % len(jobs)]) for i, (text, skills) in enumerate(resumes)]
+    results = {
+        "extract_skills": latency(timed_each(extract_skills, [text for text, _ in resumes])),
+        "match_score": latency(timed_each(lambda p: match_score(p[0], p[1], p[2].description, p[2].skills), pairs)),
+    }
+
+    corpus = os.path.join(workdir, "micro")
+    os.makedirs(corpus, exist_ok=True)
+    for fmt in FORMATS:
+        paths = []
+        for index in range(files_per_format):
+            path = os.path.join(corpus, f"resume_{index:04d}.{fmt}")
+            with open(path, "wb") as fh:
+                fh.write(render(resumes[index % len(resumes)][0], fmt))
+            paths.append(path)
+        results[f"parse_file_to_text_{fmt}"] = latency(timed_each(parse_file_to_text, paths))
+    return results
+
+
+def _server_env(workdir: str) -> dict:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "STORAGE_DIR": os.path.join(workdir, "storage"),
+            "PARSE_WORKER_MODE": "external",
+        }
+    )
+    return env
+
+
+def _pending_parses(workdir: str) -> int:
+    with sqlite3.connect(os.path.join(workdir, "bench.db"), timeout=30) as conn:
+        return conn.execute("SELECT count(*) FROM parse_jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+
+def macro_ingest(workdir: str, seed: int, uploads: int, bulk_batch: int) -> dict:
+    # Uploads go through a real server with the parse worker switched off, so upload throughput and
+    # queue drain time are measured separately
+    generator = CorpusGenerator(seed)
+    files = [
+        (f"resume_{i:06d}.{FORMATS[i % len(FORMATS)]}", render(text, FORMATS[i % len(FORMATS)]))
+        for i, (text, _) in enumerate(generator.resumes(uploads * 2))
+    ]
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    proc = start_server(port, workdir, {})
+    try:
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        httpx.post(f"{base}/auth/signup", json={"email": email, "password": "secret12"}).raise_for_status()
+        token = httpx.post(f"{base}/auth/login", json={"email": email, "password": "secret12"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        with httpx.Client(base_url=base, headers=headers, timeout=300) as client:
+            single = files[:uploads]
+            start = time.perf_counter()
+            samples = []
+            for name, body in single:
+                began = time.perf_counter()
+                client.post("/resumes/", files={"file": (name, body)}).raise_for_status()
+                samples.append(time.perf_counter() - began)
+            single_s = time.perf_counter() - start
+
+            bulk = files[uploads:]
+            start = time.perf_counter()
+            for offset in range(0, len(bulk), bulk_batch):
+                batch = bulk[offset : offset + bulk_batch]
+                client.post("/resumes/bulk", files=[("files", (name, body)) for name, body in batch]).raise_for_status()
+            bulk_s = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    queued = _pending_parses(workdir)
+    worker = subprocess.Popen([sys.executable, "-m", "app.worker"], cwd=PROJECT_ROOT, env=_server_env(workdir))
+    start = time.perf_counter()
+    try:
+        while _pending_parses(workdir):
+            time.sleep(0.1)
+        drain_s = time.perf_counter() - start
+    finally:
+        worker.terminate()
+        worker.wait(timeout=30)
+    with sqlite3.connect(os.path.join(workdir, "bench.db")) as conn:
+        failed = conn.execute("SELECT count(*) FROM parse_jobs WHERE status = 'failed'").fetchone()[0]
+
+    return {
+        "upload_single": dict(latency(samples), files=len(single), files_per_s=round(len(single) / single_s, 2)),
+        "upload_bulk": {"files": len(bulk), "batch": bulk_batch, "files_per_s": round(len(bulk) / bulk_s, 2)},
+        # Includes worker start-up (process pool spawn), as a deploy or restart would see it
+        "parse_drain": {"jobs": queued, "failed": failed, "drain_s": round(drain_s, 3), "parsed_per_s": round(queued / drain_s, 2)},
+    }
+
+
+def _seed_resumes(db, user_id: int, generator: CorpusGenerator, count: int, words: int) -> float:
+    from sqlalchemy import insert
+
+    from app.models import Resume
+    from app.services.feature_service import save_resume_features
+
+    start = time.perf_counter()
+    for offset in range(0, count, 1000):
+        batch = [generator.resume(words) for _ in range(min(1000, count - offset))]
+        rows = [
+            {"user_id": user_id, "filename": f"seed-{uuid.uuid4().hex}.txt", "content_text": text, "skills": skills,
+             "parsed": True, "parse_status": "parsed", "created_at": datetime.utcnow()}
+            for text, skills in batch
+        ]
+        ids = db.scalars(insert(Resume).returning(Resume.id, sort_by_parameter_order=True), rows).all()
+        for rid, (text, skills) in zip(ids, batch):
+            save_resume_features(db, rid, text, skills)
+        db.commit()
+    return time.perf_counter() - start
+
+
+def _warm_heap_mb(db) -> float:
+    # Python heap a process holds for the index after warm-up (mapped snapshot pages are shared, so not counted)
+    import tracemalloc
+
+    from app.services.feature_service import warm_index
+
+    tracemalloc.start()
+    try:
+        warm_index(db)
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return held / 2**20
+
+
+def macro_ranking(seed: int, scales: List[int], jobs: int, queries: int, k: int, words: int) -> dict:
+    # In-process against the database configured in main(): resumes are inserted directly (parsing is
+    # measured above), then live ranking and materialized-score reads are timed at each corpus size
+    from app.database import SessionLocal, engine
+    from app.migrations import upgrade
+    from app.models import Job, ScorerVersion, User
+    from app.services import score_service, snapshot_service
+    from app.services.feature_service import save_job_features
+    from app.services.match_service import top_resumes_for_job
+
+    upgrade(engine)
+    generator = CorpusGenerator(seed)
+    db = SessionLocal()
+    try:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+        db.add(user)
+        job_rows = [Job(title=j.title, description=j.description, skills=j.skills) for j in generator.jobs(jobs)]
+        db.add_all(job_rows)
+        db.flush()
+        for job in job_rows:
+            save_job_features(db, job.id, job.description, job.skills)
+        db.add(ScorerVersion(version=score_service.SCORER_VERSION, state=score_service.ACTIVE))
+        db.commit()
+        user_id, job_ids = user.id, [job.id for job in job_rows]
+
+        results = {}
+        seeded = 0
+        for scale in sorted(scales):
+            seed_s = _seed_resumes(db, user_id, generator, scale - seeded, words)
+            seeded = scale
+            start = time.perf_counter()
+            snapshot = snapshot_service.build(db)
+            snapshot_s = time.perf_counter() - start
+            heap_mb = _warm_heap_mb(db)
+            targets = [job_ids[i % len(job_ids)] for i in range(queries)]
+            top_resumes_for_job(db, targets[0], user_id, k)
+            live = timed_each(lambda jid: top_resumes_for_job(db, jid, user_id, k), targets)
+
+            start = time.perf_counter()
+            for jid in job_ids:
+                score_service.recompute_for_job(db, jid)
+            materialize_s = time.perf_counter() - start
+            stored = timed_each(lambda jid: score_service.top_from_scores(db, jid, user_id, k), targets)
+            results[str(scale)] = {
+                "resumes": scale,
+                "seed_s": round(seed_s, 3),
+                "snapshot_build_s": round(snapshot_s, 3),
+                "snapshot_file_mb": round(snapshot.nbytes / 2**20, 2),
+                "index_heap_mb": round(heap_mb, 2),
+                "rank_live": latency(live),
+                "rank_materialized": latency(stored),
+                "materialize_ms_per_job": round(materialize_s * 1000 / len(job_ids), 2),
+            }
+        return results
+    finally:
+        db.close()
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[dict]:
+    regressions = []
+    old = flatten({k: baseline.get(k, {}) for k in ("micro", "macro")})
+    for name, value in flatten({k: current.get(k, {}) for k in ("micro", "macro")}).items():
+        before = old.get(name)
+        if not before or name.endswith(".runs"):
+            continue
+        metric = name.rsplit(".", 1)[-1]
+        if metric.endswith(HIGHER_IS_BETTER):
+            change = (before - value) / before
+        elif metric.endswith(LOWER_IS_BETTER):
+            change = (value - before) / before
+        else:
+            continue
+        if change > tolerance:
+            regressions.append({"metric": name, "baseline": before, "current": value, "worse_by": round(change, 4)})
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parsing and matching benchmarks over a synthetic corpus, as JSON")
+    parser.add_argument("--suites", default="micro,ingest,ranking", help="comma-separated subset of micro,ingest,ranking")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--docs", type=int, default=500, help="micro: documents for extract_skills/match_score")
+    parser.add_argument("--files-per-format", type=int, default=20, help="micro: files parsed per format")
+    parser.add_argument("--uploads", type=int, default=200, help="ingest: single uploads, then as many again in bulk")
+    parser.add_argument("--bulk-batch", type=int, default=50)
+    parser.add_argument("--scales", default="1000,10000,100000", help="ranking: corpus sizes, grown in place")
+    parser.add_argument("--jobs", type=int, default=10, help="ranking: jobs ranked against the corpus")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--words", type=int, default=300, help="ranking: words per seeded resume")
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="earlier report; exit 1 if any metric is worse by more than --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    suites = {s.strip() for s in args.suites.split(",")}
+
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    # Settings are read on first import of `app`, so point the in-process suites at the scratch dir first
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'ranking.db')}"
+    os.environ["STORAGE_DIR"] = os.path.join(workdir, "storage-inprocess")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "micro": {},
+        "macro": {},
+    }
+    if "micro" in suites:
+        report["micro"] = micro(workdir, args.seed, args.docs, args.files_per_format)
+    if "ingest" in suites:
+        report["macro"]["ingest"] = macro_ingest(workdir, args.seed, args.uploads, args.bulk_batch)
+    if "ranking" in suites:
+        scales = [int(s) for s in args.scales.split(",") if s.strip()]
+        report["macro"]["ranking"] = macro_ranking(args.seed, scales, args.jobs, args.queries, args.k, args.words)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(report, json.load(fh), args.tolerance)
+        report["regressions"] = regressions
+        status = 1 if regressions else 0
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(output + "\n")
+    print(output)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
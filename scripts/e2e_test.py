@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+import json
 import os
 import sys
-import time
 import uuid
 
 # Ensure project root is on sys.path so `app` is importable when running this script directly
@@ -14,9 +14,13 @@ if PROJECT_ROOT not in sys.path:
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.migrations import upgrade
 
 
 def run_e2e() -> dict:
+    # Startup only checks the schema version; bring the configured database up to date first
+    upgrade()
+
     with TestClient(app) as client:
         # health
         r = client.get("/health")
@@ -56,23 +60,25 @@ def run_e2e() -> dict:
         assert r.status_code == 200, r.text
         resume_id = r.json()["id"]
 
-        # wait for parsing
-        parsed = False
-        for _ in range(100):
-            r = client.get("/resumes/", headers=headers)
-            assert r.status_code == 200
-            resumes = r.json()
-            target = next((x for x in resumes if x["id"] == resume_id), None)
-            if target and target["parsed"]:
-                parsed = True
-                break
-            time.sleep(0.1)
+        # wait for parsing: the event stream closes once the resume reaches a terminal status
+        r = client.get("/resumes/events", headers=headers, params={"resume_id": resume_id, "until_done": True})
+        assert r.status_code == 200, r.text
+        assert r.headers["content-type"].startswith("text/event-stream"), r.headers
+        statuses = [json.loads(line[6:])["status"] for line in r.text.splitlines() if line.startswith("data: ")]
+        assert statuses and statuses[-1] == "parsed", statuses
+        parsed = True
 
         # match
         r = client.get(f"/matching/resume/{resume_id}/job/{job_id}", headers=headers)
         assert r.status_code == 200, r.text
         score = r.json()["score"]
 
+        # top-K ranking for the job
+        r = client.get(f"/matching/job/{job_id}/top", headers=headers, params={"k": 5})
+        assert r.status_code == 200, r.text
+        top_ids = [x["resume_id"] for x in r.json()]
+        assert resume_id in top_ids, top_ids
+
         return {"token_len": len(token), "job_id": job_id, "resume_id": resume_id, "parsed": parsed, "score": score}
 
 
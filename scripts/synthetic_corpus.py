@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import zipfile
+from typing import Iterator, List, NamedTuple, Tuple
+
+# Ensure project root is on sys.path so `app` is importable when running this script directly
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+FORMATS = ("txt", "docx", "pdf")
+SECTIONS = ("Summary", "Experience", "Projects", "Education", "Skills")
+TITLES = ("Engineer", "Developer", "Data Scientist", "Analyst", "Architect", "SRE", "Consultant")
+LEVELS = ("Junior", "", "Senior", "Staff", "Lead", "Principal")
+
+
+class SyntheticJob(NamedTuple):
+    title: str
+    description: str
+    skills: List[str]
+
+
+def load_skills() -> List[str]:
+    with open(os.path.join(PROJECT_ROOT, "app", "data", "skills.json"), encoding="utf-8") as fh:
+        return sorted(json.load(fh))
+
+
+# Same seed, same corpus: every document is derived from one Random instance, so benchmark runs on
+# different commits see byte-identical inputs
+class CorpusGenerator:
+    def __init__(self, seed: int = 7, vocabulary: int = 5000) -> None:
+        self.rng = random.Random(seed)
+        self.skills = load_skills()
+        words = set()
+        while len(words) < vocabulary:
+            words.add("".join(self.rng.choices(string.ascii_lowercase, k=self.rng.randint(3, 10))))
+        self.words = sorted(words)
+        # Zipf-like frequencies, so a few filler words are very common and most are rare, as in real text
+        self.weights = [1.0 / (rank + 1) for rank in range(len(self.words))]
+
+    def _sentence(self, skills: List[str]) -> str:
+        body = self.rng.choices(self.words, weights=self.weights, k=self.rng.randint(8, 20))
+        if skills and self.rng.random() < 0.5:
+            body.insert(self.rng.randrange(len(body)), self.rng.choice(skills))
+        return " ".join(body).capitalize() + "."
+
+    def resume(self, words: int = 400) -> Tuple[str, List[str]]:
+        skills = self.rng.sample(self.skills, self.rng.randint(3, 10))
+        lines = [f"{self.rng.choice(LEVELS)} {self.rng.choice(TITLES)}".strip()]
+        budget = words
+        for section in SECTIONS:
+            lines.append("")
+            lines.append(section)
+            if section == "Skills":
+                lines.append(", ".join(skills))
+                continue
+            while budget > 0:
+                sentence = self._sentence(skills)
+                lines.append(sentence)
+                budget -= sentence.count(" ") + 1
+                if self.rng.random() < 0.3:
+                    break
+        return "\n".join(lines), sorted(skills)
+
+    def job(self, words: int = 120) -> SyntheticJob:
+        skills = self.rng.sample(self.skills, self.rng.randint(2, 6))
+        title = f"{self.rng.choice(LEVELS)} {self.rng.choice(TITLES)}".strip()
+        sentences = []
+        while sum(s.count(" ") + 1 for s in sentences) < words:
+            sentences.append(self._sentence(skills))
+        return SyntheticJob(title, " ".join(sentences) + " Required: " + ", ".join(skills) + ".", sorted(skills))
+
+    def resumes(self, count: int, words: int = 400) -> Iterator[Tuple[str, List[str]]]:
+        for _ in range(count):
+            yield self.resume(words)
+
+    def jobs(self, count: int, words: int = 120) -> List[SyntheticJob]:
+        return [self.job(words) for _ in range(count)]
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def pdf_bytes(text: str, lines_per_page: int = 50) -> bytes:
+    # Minimal uncompressed PDF (Helvetica, one text object per page); pdfminer lays it out like a real export
+    lines = text.splitlines() or [""]
+    pages = [lines[i : i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 790 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page) + " ET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1', 'replace'))} >>\nstream\n{stream}\nendstream")
+        content = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {content} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1", "replace")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def docx_bytes(text: str) -> bytes:
+    import io
+    from datetime import datetime
+
+    from docx import Document
+
+    document = Document()
+    # Fixed metadata so identical text renders to identical bytes
+    document.core_properties.created = document.core_properties.modified = datetime(2024, 1, 1)
+    document.core_properties.last_printed = datetime(2024, 1, 1)
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    # python-docx stamps every ZIP member with the current time; repack with a fixed one
+    packed = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as source, zipfile.ZipFile(packed, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            target.writestr(zipfile.ZipInfo(info.filename, date_time=(2024, 1, 1, 0, 0, 0)), source.read(info), zipfile.ZIP_DEFLATED)
+    return packed.getvalue()
+
+
+def render(text: str, fmt: str) -> bytes:
+    if fmt == "pdf":
+        return pdf_bytes(text)
+    if fmt == "docx":
+        return docx_bytes(text)
+    return text.encode("utf-8")
+
+
+def write_corpus(directory: str, count: int, formats: List[str], seed: int, words: int) -> List[str]:
+    os.makedirs(directory, exist_ok=True)
+    generator = CorpusGenerator(seed)
+    paths = []
+    for index, (text, _) in enumerate(generator.resumes(count, words)):
+        fmt = formats[index % len(formats)]
+        path = os.path.join(directory, f"resume_{index:06d}.{fmt}")
+        with open(path, "wb") as fh:
+            fh.write(render(text, fmt))
+        paths.append(path)
+    with open(os.path.join(directory, "jobs.json"), "w", encoding="utf-8") as fh:
+        json.dump([job._asdict() for job in generator.jobs(max(count // 10, 1))], fh, indent=2)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic resume corpus plus jobs.json")
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--formats", default="txt,docx,pdf", help="comma-separated, assigned round-robin")
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    formats = [f for f in args.formats.split(",") if f in FORMATS]
+    written = write_corpus(args.directory, args.count, formats or ["txt"], args.seed, args.words)
+    print(json.dumps({"directory": args.directory, "resumes": len(written)}))
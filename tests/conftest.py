@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import uuid
+
+# Settings are read once at import, so the test environment is fixed before `app` is first imported
+_TMP = tempfile.mkdtemp(prefix="ats-tests-")
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{os.path.join(_TMP, 'ats.db')}",
+        "STORAGE_DIR": os.path.join(_TMP, "storage"),
+        "AUTO_MIGRATE": "true",
+        "ADMIN_EMAILS": "admin@example.com",
+        "BCRYPT_ROUNDS": "4",
+        "LOGIN_IP_BURST": "0",
+        "LOGIN_ACCOUNT_BURST": "0",
+        "CORPUS_SNAPSHOT": "false",
+    }
+)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+def _signup(client, email: str) -> dict:
+    r = client.post("/auth/signup", json={"email": email, "password": "secret12"})
+    assert r.status_code in (200, 400), r.text
+    r = client.post("/auth/login", json={"email": email, "password": "secret12"})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture
+def headers(client) -> dict:
+    return _signup(client, f"user_{uuid.uuid4().hex[:8]}@example.com")
+
+
+@pytest.fixture
+def admin_headers(client) -> dict:
+    return _signup(client, "admin@example.com")
+
+
+def load_script(name: str):
+    # scripts/ is not a package; load a helper module from it by path
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(name, os.path.join(PROJECT_ROOT, "scripts", f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import threading
+
+import anyio
+from sqlalchemy import func, select
+
+from app.database import SessionLocal, run_in_session
+from app.models import Job, JobFeatures
+from app.services.feature_service import prepare_features, save_job_features
+
+
+def test_run_in_session_leaves_the_event_loop(client):
+    def probe(db, value):
+        assert db.scalar(select(1)) == 1
+        return threading.get_ident(), value
+
+    async def main():
+        return threading.get_ident(), await run_in_session(probe, 42)
+
+    loop_thread, (worker_thread, value) = anyio.run(main)
+    assert value == 42
+    assert worker_thread != loop_thread
+
+
+def test_prepared_features_match_inline_extraction(client):
+    description = "Senior Python engineer: Kubernetes (k8s), SQL and AWS."
+    with SessionLocal() as db:
+        job = Job(title="t", description=description, skills=["K8s", "python"])
+        db.add(job)
+        db.flush()
+        inline = save_job_features(db, job.id, description, job.skills)
+        db.flush()
+        prepared = save_job_features(db, job.id, description, job.skills, prepare_features(description, job.skills))
+        assert inline == prepared
+        assert prepared[1] == frozenset({"kubernetes", "python"})
+        db.flush()
+        assert db.scalar(select(func.count()).select_from(JobFeatures).where(JobFeatures.job_id == job.id)) == 1
+        db.rollback()
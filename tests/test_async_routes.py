@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+# DB_ASYNC is read once, when app.main mounts its routers, so the async app runs in a child process
+# with its own database. Run directly, this module is that child.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def _flow() -> None:
+    sys.path.insert(0, PROJECT_ROOT)
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.routers.aio import jobs as aio_jobs
+    from app.utils.pagination import NEXT_CURSOR_HEADER
+
+    assert any(getattr(route, "endpoint", None) is aio_jobs.list_jobs for route in app.routes)
+    with TestClient(app) as client:
+        assert client.post("/auth/signup", json={"email": "async@example.com", "password": "secret12"}).status_code == 200
+        r = client.post("/auth/login", json={"email": "async@example.com", "password": "secret12"})
+        assert r.status_code == 200, r.text
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        job_ids = []
+        for title in ("Data Scientist", "Backend Engineer", "Platform Engineer"):
+            r = client.post("/jobs/", json={"title": title, "description": f"{title}: Python SQL", "skills": ["python"]}, headers=headers)
+            assert r.status_code == 200, r.text
+            job_ids.append(r.json()["id"])
+
+        resume_ids = []
+        for name, text in (("a.txt", b"Python and SQL engineer, FastAPI."), ("b.txt", b"Java developer with Spring.")):
+            r = client.post("/resumes/", files={"file": (name, text, "text/plain")}, headers=headers)
+            assert r.status_code == 200, r.text
+            resume_ids.append(r.json()["id"])
+        r = client.get("/resumes/events", params={"resume_id": resume_ids, "until_done": True}, headers=headers)
+        statuses = {}
+        for line in r.text.splitlines():
+            if line.startswith("data: "):
+                event = json.loads(line[6:])
+                statuses[event["resume_id"]] = event["status"]
+        assert statuses == {rid: "parsed" for rid in resume_ids}, statuses
+
+        first = client.get("/jobs/", params={"limit": 2}, headers=headers)
+        assert [job["id"] for job in first.json()] == job_ids[:0:-1]
+        second = client.get("/jobs/", params={"limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]}, headers=headers)
+        assert [job["id"] for job in second.json()] == job_ids[:1]
+        cached = client.get("/jobs/", params={"limit": 2}, headers={**headers, "If-None-Match": first.headers["ETag"]})
+        assert cached.status_code == 304
+
+        r = client.get("/resumes/", params={"skills": "python"}, headers=headers)
+        assert [row["id"] for row in r.json()] == resume_ids[:1]
+
+        r = client.get(f"/matching/job/{job_ids[0]}/top", params={"k": 5}, headers=headers)
+        assert r.status_code == 200, r.text
+        ranked = r.json()
+        assert [row["resume_id"] for row in ranked][0] == resume_ids[0]
+        r = client.get(f"/matching/resume/{resume_ids[0]}/job/{job_ids[0]}", headers=headers)
+        assert r.json()["score"] == ranked[0]["score"]
+        assert client.get(f"/resumes/{resume_ids[0]}/duplicates", headers=headers).json() == []
+
+
+def test_async_routes_end_to_end(tmp_path):
+    env = {
+        **os.environ,
+        "DB_ASYNC": "true",
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'async.db'}",
+        "STORAGE_DIR": str(tmp_path / "storage"),
+        "AUTO_MIGRATE": "true",
+        "BCRYPT_ROUNDS": "4",
+        "CORPUS_SNAPSHOT": "false",
+    }
+    result = subprocess.run([sys.executable, __file__], env=env, cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr[-4000:]
+
+
+if __name__ == "__main__":
+    _flow()
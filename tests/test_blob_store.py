@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+import pytest
+
+from app.utils import blob_store
+from app.utils.blob_store import LocalBlobStore, S3BlobStore
+
+
+BUCKET = "ats-test"
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    moto = pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SECURITY_TOKEN", "AWS_SESSION_TOKEN"):
+        monkeypatch.setenv(name, "testing")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture(params=["local", "s3"])
+def store(request, tmp_path):
+    if request.param == "local":
+        return LocalBlobStore(str(tmp_path / "blobs"), depth=2)
+    return S3BlobStore(BUCKET, prefix="/tenant/", client=request.getfixturevalue("s3_client"))
+
+
+def _source(tmp_path, data: bytes) -> str:
+    path = tmp_path / "upload.part"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_put_file_consumes_its_source(store, tmp_path):
+    source = _source(tmp_path, b"%PDF resume")
+    store.put_file("ab" * 32 + ".pdf", source)
+    assert not os.path.exists(source)
+    assert store.get_bytes("ab" * 32 + ".pdf") == b"%PDF resume"
+    assert store.size("ab" * 32 + ".pdf") == 11
+
+
+def test_missing_keys_raise_file_not_found(store):
+    assert not store.exists("missing.txt")
+    with pytest.raises(FileNotFoundError):
+        store.get_bytes("missing.txt")
+    with pytest.raises(FileNotFoundError):
+        store.size("missing.txt")
+    with pytest.raises(FileNotFoundError):
+        with store.fetch("missing.txt"):
+            pass
+    store.delete("missing.txt")
+
+
+def test_fetch_yields_a_local_copy(store):
+    store.put_bytes("text/cd.txt", b"hello")
+    with store.fetch("text/cd.txt") as path:
+        with open(path, "rb") as f:
+            assert f.read() == b"hello"
+    store.delete("text/cd.txt")
+    assert not store.exists("text/cd.txt")
+
+
+def test_text_artifacts_round_trip_compressed(store, monkeypatch):
+    monkeypatch.setattr(blob_store.settings, "text_compression", "gzip")
+    key = blob_store.put_text(store, "ef" * 32, "Python " * 100)
+    assert key.endswith(".txt.gz") and store.size(key) < 700
+    assert blob_store.get_text(store, key) == "Python " * 100
+
+
+def test_s3_keys_carry_the_prefix(s3_client):
+    store = S3BlobStore(BUCKET, prefix="/tenant/", client=s3_client)
+    store.put_bytes("text/ab.txt", b"x")
+    assert [o["Key"] for o in s3_client.list_objects_v2(Bucket=BUCKET)["Contents"]] == ["tenant/text/ab.txt"]
+    assert S3BlobStore(BUCKET, prefix="/", client=s3_client)._key("a") == "a"
+
+
+def test_s3_fetch_removes_its_temp_file(s3_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    store = S3BlobStore(BUCKET, client=s3_client)
+    store.put_bytes("resume.docx", b"docx bytes")
+    with store.fetch("resume.docx") as path:
+        assert path.endswith(".docx") and os.path.exists(path)
+    assert not os.path.exists(path)
+    # Also when the download fails
+    with pytest.raises(FileNotFoundError):
+        with store.fetch("gone.docx"):
+            pass
+    assert os.listdir(tmp_path) == []
+
+
+def test_s3_other_errors_are_not_reported_as_missing(s3_client):
+    store = S3BlobStore("no-such-bucket", client=s3_client)
+    with pytest.raises(Exception) as excinfo:
+        store.get_bytes("a.txt")
+    assert not isinstance(excinfo.value, FileNotFoundError)
+
+
+def test_local_store_shards_and_finds_legacy_files(tmp_path):
+    store = LocalBlobStore(str(tmp_path), depth=2)
+    assert store.path("abcdef.pdf") == os.path.join(str(tmp_path), "ab", "cd", "abcdef.pdf")
+    (tmp_path / "legacy.pdf").write_bytes(b"old")
+    assert store.get_bytes("legacy.pdf") == b"old"
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Insert
+
+from app import migrations
+from app.models import Blob
+from app.services import blob_service
+from app.utils.file_storage import StoredFile
+
+
+STORED = StoredFile(name="ab" * 32 + ".txt", sha256="ab" * 32, size=3)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blobs.db'}")
+    migrations.upgrade(engine)
+    return engine
+
+
+def _refs(engine) -> int:
+    with Session(engine) as db:
+        blob = db.get(Blob, STORED.sha256)
+        return -1 if blob is None else blob.ref_count
+
+
+def test_last_release_returns_the_keys(engine):
+    with Session(engine) as db:
+        blob_service.acquire(db, STORED)
+        blob_service.acquire(db, STORED)
+        db.commit()
+        assert _refs(engine) == 2
+        assert blob_service.release(db, STORED.sha256) == []
+        assert blob_service.release(db, STORED.sha256) == [STORED.name]
+        db.commit()
+    assert _refs(engine) == -1
+
+
+def test_release_keeps_files_when_a_reference_arrives_before_the_delete(engine, monkeypatch):
+    with Session(engine) as db:
+        blob_service.acquire(db, STORED)
+        db.commit()
+        real_get = db.get
+
+        def get_then_acquire(*args, **kwargs):
+            # Another upload of the same bytes takes a reference after the count was read
+            found = real_get(*args, **kwargs)
+            db.connection().exec_driver_sql("UPDATE blobs SET ref_count = ref_count + 1")
+            return found
+
+        monkeypatch.setattr(db, "get", get_then_acquire)
+        assert blob_service.release(db, STORED.sha256) == []
+        db.commit()
+    assert _refs(engine) == 1
+
+
+def test_acquire_reinserts_a_row_deleted_under_it(engine):
+    with Session(engine) as db:
+        blob_service.acquire(db, STORED)
+        db.commit()
+    state = {"deleted": False}
+
+    @event.listens_for(engine, "after_execute")
+    def delete_after_insert(conn, clauseelement, *args):
+        # The last reference is released right after this upload's insert found the row present
+        if isinstance(clauseelement, Insert) and clauseelement.table.name == "blobs" and not state["deleted"]:
+            state["deleted"] = True
+            conn.exec_driver_sql("DELETE FROM blobs")
+
+    with Session(engine) as db:
+        blob = blob_service.acquire(db, STORED)
+        db.commit()
+        assert blob.ref_count == 1
+    assert state["deleted"] and _refs(engine) == 1
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import migrations
+from app.models import Resume, ResumeFeatures, User
+from app.services import dedup_service
+from app.services.feature_service import pack_ids
+
+
+def _text(seed: int, words: int = 300) -> str:
+    rng = random.Random(seed)
+    return " ".join("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(7)) for _ in range(words))
+
+
+def _edited(text: str, every: int) -> str:
+    # Rewrites one word in `every`, leaving most five-word shingles intact
+    return " ".join("changed" if i % every == 0 else word for i, word in enumerate(text.split()))
+
+
+BASE = _text(1)
+NEAR = _edited(BASE, 60)
+OTHER = _text(2)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'dedup.db'}")
+    migrations.upgrade(engine)
+    with Session(engine) as session:
+        for user_id in (1, 2):
+            session.add(User(id=user_id, email=f"{user_id}@example.com", password_hash="x"))
+        session.commit()
+        yield session
+
+
+def _add(db, resume_id: int, user_id: int, text: str) -> None:
+    sig = dedup_service.signature(text)
+    db.add(Resume(id=resume_id, user_id=user_id, filename=f"{resume_id}.txt", content_text=text, parsed=True))
+    db.flush()
+    db.add(ResumeFeatures(resume_id=resume_id, term_ids=pack_ids([]), term_counts=pack_ids([]), minhash=dedup_service.pack(sig)))
+    dedup_service.replace_bands(db, resume_id, sig)
+    db.commit()
+
+
+def _jaccard(a: str, b: str) -> float:
+    x, y = set(dedup_service.shingle_hashes(a)), set(dedup_service.shingle_hashes(b))
+    return len(x & y) / len(x | y)
+
+
+def test_signature_estimates_jaccard():
+    a, b = dedup_service.signature(BASE), dedup_service.signature(NEAR)
+    assert abs(dedup_service.similarity(a, b) - _jaccard(BASE, NEAR)) < 0.1
+    assert dedup_service.similarity(a, dedup_service.signature(OTHER)) < 0.1
+    # Deterministic across calls (and processes): signatures are stored
+    assert (dedup_service.signature(BASE) == a).all()
+    assert dedup_service.signature("") is None and dedup_service.signature("a b") is not None
+
+
+def test_pack_round_trip():
+    sig = dedup_service.signature(BASE)
+    assert (dedup_service.unpack(dedup_service.pack(sig)) == sig).all()
+    assert dedup_service.unpack(b"short") is None and dedup_service.pack(None) is None
+
+
+def test_duplicates_of_finds_near_copies_of_the_same_owner(db):
+    _add(db, 1, 1, BASE)
+    _add(db, 2, 1, NEAR)
+    _add(db, 3, 1, OTHER)
+    _add(db, 4, 2, BASE)
+    found = dedup_service.duplicates_of(db, 1, 1, threshold=0.7)
+    assert [rid for rid, _ in found] == [2]
+    assert found[0][1] >= 0.7
+    assert dedup_service.duplicates_of(db, 3, 1, threshold=0.7) == []
+
+
+def test_clusters_group_near_copies_per_owner(db):
+    _add(db, 1, 1, BASE)
+    _add(db, 2, 1, NEAR)
+    _add(db, 3, 1, _edited(NEAR, 61))
+    _add(db, 4, 1, OTHER)
+    _add(db, 5, 1, _edited(OTHER, 50))
+    _add(db, 6, 1, _text(3))
+    assert dedup_service.clusters(db, 1, threshold=0.7) == [[1, 2, 3], [4, 5]]
+    assert dedup_service.clusters(db, 2, threshold=0.7) == []
+
+
+def test_collapse_folds_copies_into_the_best_ranked(db):
+    _add(db, 1, 1, BASE)
+    _add(db, 2, 1, NEAR)
+    _add(db, 3, 1, OTHER)
+    ranked = [(2, 0.9), (3, 0.8), (1, 0.7)]
+    assert dedup_service.collapse(db, ranked, k=2, threshold=0.7) == [(2, 0.9, [1]), (3, 0.8, [])]
+    assert dedup_service.collapse(db, ranked, k=1, threshold=0.7) == [(2, 0.9, [1])]
+
+
+def test_backfill_signs_rows_written_before_signatures(db):
+    _add(db, 1, 1, BASE)
+    db.add(Resume(id=2, user_id=1, filename="2.txt", content_text=NEAR, parsed=True))
+    db.flush()
+    db.add(ResumeFeatures(resume_id=2, term_ids=pack_ids([]), term_counts=pack_ids([])))
+    db.commit()
+    assert dedup_service.duplicates_of(db, 1, 1, threshold=0.7) == []
+    dedup_service.backfill(db)
+    assert [rid for rid, _ in dedup_service.duplicates_of(db, 1, 1, threshold=0.7)] == [2]
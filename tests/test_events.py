@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app import migrations
+from app.models import ParseEvent
+from app.services import event_service
+from app.services.event_service import Event, Hub, Tail
+
+
+def _parse(body: str) -> list[dict]:
+    return [
+        json.loads(line[len("data: ") :])
+        for block in body.split("\n\n")
+        for line in block.splitlines()
+        if line.startswith("data: ") and "event: parse" in block
+    ]
+
+
+def test_event_encoding():
+    assert Event(7, 1, 3, "parsed").encode() == 'id: 7\nevent: parse\ndata: {"resume_id":3,"status":"parsed","detail":null}\n\n'
+    # Snapshot events describe current state and carry no id to resume from
+    assert not Event(0, 1, 3, "queued").encode().startswith("id:")
+
+
+def test_hub_delivers_only_to_the_owner():
+    async def run():
+        hub = Hub()
+        mine, theirs = hub.subscribe(1), hub.subscribe(2)
+        hub.deliver([Event(1, 1, 10, "parsing")])
+        item = await asyncio.wait_for(mine.queue.get(), timeout=1)
+        await asyncio.sleep(0)
+        assert theirs.queue.empty()
+        hub.unsubscribe(mine)
+        hub.unsubscribe(theirs)
+        return item, hub.count()
+
+    item, remaining = asyncio.run(run())
+    assert item.resume_id == 10 and remaining == 0
+
+
+def test_slow_subscriber_overflows_instead_of_blocking(monkeypatch):
+    monkeypatch.setattr(event_service, "SUBSCRIBER_QUEUE_MAX", 2)
+
+    async def run():
+        hub = Hub()
+        subscription = hub.subscribe(1)
+        hub.deliver([Event(i, 1, i, "queued") for i in range(1, 4)])
+        await asyncio.sleep(0)
+        hub.unsubscribe(subscription)
+        return subscription.overflowed
+
+    assert asyncio.run(run())
+
+
+def test_stream_follows_a_resume_until_parsed(client, headers):
+    upload = client.post("/resumes/", files={"file": ("cv.txt", b"Python and SQL engineer. " * 20)}, headers=headers)
+    assert upload.status_code == 200, upload.text
+    resume_id = upload.json()["id"]
+    token = headers["Authorization"].split()[1]
+    # EventSource cannot send headers, so the token rides in the query string
+    r = client.get("/resumes/events", params={"resume_id": resume_id, "until_done": True, "access_token": token})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert "Content-Encoding" not in r.headers
+    assert r.text.startswith("retry: 3000\n\n")
+    statuses = [e["status"] for e in _parse(r.text) if e["resume_id"] == resume_id]
+    assert statuses[-1] in event_service.TERMINAL
+    assert all(status not in event_service.TERMINAL for status in statuses[:-1])
+
+
+def test_stream_requires_credentials(client):
+    assert client.get("/resumes/events").status_code == 401
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    migrations.upgrade(engine)
+    return engine
+
+
+def _commit_event(engine, event_id: int, status: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            insert(ParseEvent).values(id=event_id, user_id=1, resume_id=event_id, status=status, created_at=datetime.utcnow())
+        )
+
+
+def test_tail_delivers_ids_committed_out_of_order(engine):
+    # Two publishers took ids 1 and 2; the one holding 2 commits first
+    tail = Tail(0)
+    _commit_event(engine, 2, "queued")
+    with Session(engine) as db:
+        assert [e.id for e in tail.read(db)] == [2]
+    _commit_event(engine, 1, "parsed")
+    _commit_event(engine, 3, "queued")
+    with Session(engine) as db:
+        assert [(e.id, e.status) for e in tail.read(db)] == [(1, "parsed"), (3, "queued")]
+        assert tail.read(db) == [] and not tail.gaps
+
+
+def test_tail_gives_up_on_ids_that_never_commit(engine, monkeypatch):
+    monkeypatch.setattr(event_service, "GAP_WINDOW_SECONDS", 0)
+    tail = Tail(0)
+    _commit_event(engine, 5, "queued")
+    with Session(engine) as db:
+        assert [e.id for e in tail.read(db)] == [5]
+        assert sorted(tail.gaps) == [1, 2, 3, 4]
+        tail.read(db)
+    assert not tail.gaps
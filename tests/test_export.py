@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import csv
+import io
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import migrations
+from app.models import Job, Resume, ScorerVersion, ScoreTask, User
+from app.services import export_service, score_service
+
+
+@pytest.fixture
+def db(tmp_path):
+    # A private database: the app's in-process score worker would drain these tasks under the test
+    engine = create_engine(f"sqlite:///{tmp_path / 'export.db'}")
+    migrations.upgrade(engine)
+    with Session(engine) as session:
+        session.add(ScorerVersion(version=score_service.SCORER_VERSION, state=score_service.ACTIVE))
+        for user_id in (1, 2):
+            session.add(User(id=user_id, email=f"{user_id}@example.com", password_hash="x"))
+            session.add(Resume(id=user_id, user_id=user_id, filename=f"{user_id}.txt", parsed=True))
+        session.add(Job(id=1, title="t", description="python"))
+        session.commit()
+        yield session
+
+
+def _task(db, kind, target_id):
+    db.add(ScoreTask(kind=kind, target_id=target_id, scorer_version=score_service.SCORER_VERSION))
+    db.commit()
+
+
+def _assert_retry(db, user_id):
+    with pytest.raises(HTTPException) as exc:
+        export_service.export_version(db, 1, user_id)
+    assert exc.value.status_code == 503 and exc.value.headers["Retry-After"]
+
+
+def test_export_waits_for_job_rescore(db):
+    assert export_service.export_version(db, 1, 1) == score_service.SCORER_VERSION
+    _task(db, score_service.JOB, 1)
+    _assert_retry(db, 1)
+
+
+def test_export_waits_for_the_callers_resumes_only(db):
+    _task(db, score_service.RESUME, 1)
+    _assert_retry(db, 1)
+    # Another user's pending resume does not hold this user's export back
+    assert export_service.export_version(db, 1, 2) == score_service.SCORER_VERSION
+
+
+def test_export_streams_ranked_csv(client, headers):
+    job = client.post(
+        "/jobs/", json={"title": "Data", "description": "python kubernetes terraform", "skills": ["python"]}, headers=headers
+    ).json()
+    uploaded = []
+    for text in (b"python kubernetes terraform python", b"python and cooking"):
+        r = client.post("/resumes/", files={"file": ("r.txt", text, "text/plain")}, headers=headers)
+        uploaded.append(r.json()["id"])
+    for _ in range(200):
+        r = client.get(f"/matching/job/{job['id']}/export", headers=headers)
+        rows = list(csv.DictReader(io.StringIO(r.text))) if r.status_code == 200 else []
+        if len(rows) == 2:
+            break
+        assert r.status_code in (200, 503)
+        time.sleep(0.05)
+    assert r.headers["content-type"].startswith("text/csv")
+    # Stored scores carry the corpus statistics of when they were computed, so only the order is checked
+    assert sorted(int(row["resume_id"]) for row in rows) == sorted(uploaded)
+    assert [row["rank"] for row in rows] == ["1", "2"]
+    assert float(rows[0]["score"]) >= float(rows[1]["score"]) > 0
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import gzip
+import uuid
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.utils.compression import CompressionMiddleware
+from app.utils.http_cache import is_hashed_asset, matches
+
+
+def test_if_none_match_uses_weak_comparison():
+    assert matches('"abc"', 'W/"abc"')
+    assert matches('W/"x", W/"abc"', 'W/"abc"')
+    assert matches("*", 'W/"abc"')
+    assert not matches('W/"abd"', 'W/"abc"') and not matches(None, 'W/"abc"')
+
+
+def test_listing_revalidates_until_it_changes(client, headers):
+    params = {"q": f"kw{uuid.uuid4().hex[:10]}"}
+    first = client.get("/jobs/", params=params, headers=headers)
+    tag = first.headers["ETag"]
+    assert tag.startswith("W/") and first.headers["Cache-Control"] == "private, no-cache"
+
+    cached = client.get("/jobs/", params=params, headers={**headers, "If-None-Match": tag})
+    assert cached.status_code == 304 and cached.content == b"" and cached.headers["ETag"] == tag
+
+    client.post("/jobs/", json={"title": "new", "description": "python"}, headers=headers)
+    changed = client.get("/jobs/", params=params, headers={**headers, "If-None-Match": tag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != tag
+
+
+def test_resume_listing_tag_is_per_user(client, headers, admin_headers):
+    mine = client.get("/resumes/", headers=headers).headers["ETag"]
+    theirs = client.get("/resumes/", headers=admin_headers)
+    assert theirs.headers["ETag"] != mine
+    assert client.get("/resumes/", headers={**admin_headers, "If-None-Match": mine}).status_code == 200
+
+
+def test_hashed_assets_are_immutable():
+    assert is_hashed_asset("assets/index.js")
+    assert is_hashed_asset("js/main.3f2a9c1b.js")
+    assert not is_hashed_asset("index.html") and not is_hashed_asset("app.js")
+
+
+BIG = {"items": ["python developer"] * 200}
+
+
+async def _events(request):
+    async def body():
+        yield b"data: one\n\n" * 200
+        yield b"data: two\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream")
+
+
+async def _csv(request):
+    async def body():
+        for i in range(50):
+            yield f"{i},python developer\n".encode() * 10
+
+    return StreamingResponse(body(), media_type="text/csv")
+
+
+@pytest.fixture
+def app_client():
+    app = Starlette(
+        routes=[
+            Route("/big", lambda request: JSONResponse(BIG, headers={"ETag": '"v1"'})),
+            Route("/small", lambda request: PlainTextResponse("ok")),
+            Route("/events", _events),
+            Route("/csv", _csv),
+        ]
+    )
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+    return TestClient(app)
+
+
+def test_large_json_is_gzipped(app_client):
+    r = app_client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    # The compressed bytes are no longer the identity representation
+    assert r.headers["ETag"] == 'W/"v1"'
+    assert int(r.headers["Content-Length"]) < len(str(BIG))
+    assert r.json() == BIG
+
+
+def test_small_and_unaccepted_responses_pass_through(app_client):
+    assert "Content-Encoding" not in app_client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    r = app_client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in r.headers and r.json() == BIG
+
+
+def test_event_streams_are_never_compressed(app_client):
+    r = app_client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in r.headers
+    assert r.text.endswith("data: two\n\n")
+
+
+def test_streamed_csv_is_compressed_chunk_by_chunk(app_client):
+    r = app_client.get("/csv", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip" and "Content-Length" not in r.headers
+    assert r.text.count("python developer") == 500
+
+
+def test_gzip_stream_is_valid_without_client_decoding():
+    app = Starlette(routes=[Route("/csv", _csv)])
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+    with TestClient(app) as c, c.stream("GET", "/csv", headers={"Accept-Encoding": "gzip"}) as r:
+        raw = b"".join(r.iter_raw())
+    assert gzip.decompress(raw).count(b"python developer") == 500
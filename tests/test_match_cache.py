@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import sqlite3
+
+from app.database import SessionLocal
+from app.models import Job, Resume
+from app.services.score_service import pair_cache
+from app.utils.match_cache import ENTRY_BYTES, MatchCache, SharedCacheBackend, SQLiteCacheBackend
+
+
+def test_memory_cap_evicts_least_recently_used():
+    cache = MatchCache(ENTRY_BYTES * 2)
+    cache.put((1, 1, 1, 1), 0.1)
+    cache.put((2, 1, 1, 1), 0.2)
+    assert cache.get((1, 1, 1, 1)) == 0.1
+    cache.put((3, 1, 1, 1), 0.3)
+    assert cache.get((2, 1, 1, 1)) is None
+    assert cache.get((1, 1, 1, 1)) == 0.1 and cache.get((3, 1, 1, 1)) == 0.3
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 3, 1, 1)
+    assert stats["hit_rate"] == 0.75
+
+
+def test_zero_bytes_without_backend_disables_the_cache():
+    cache = MatchCache(0)
+    cache.put((1, 1, 1, 1), 0.5)
+    assert not cache.enabled and cache.get((1, 1, 1, 1)) is None
+
+
+def test_instances_share_entries_through_sqlite(tmp_path):
+    # Two processes on one host: separate caches and connections over the same file
+    path = str(tmp_path / "cache" / "pairs.sqlite")
+    writer = MatchCache(ENTRY_BYTES * 10, SQLiteCacheBackend(path), namespace="v1")
+    reader = MatchCache(ENTRY_BYTES * 10, SQLiteCacheBackend(path), namespace="v1")
+    other_scorer = MatchCache(0, SQLiteCacheBackend(path), namespace="v2")
+    writer.put((1, 2, 3, 4), 0.42)
+    assert reader.get((1, 2, 3, 4)) == 0.42
+    assert reader.stats()["shared_hits"] == 1
+    # Promoted into the reader's memory level
+    assert reader.get((1, 2, 3, 4)) == 0.42 and reader.stats()["shared_hits"] == 1
+    assert other_scorer.get((1, 2, 3, 4)) is None
+
+
+def test_sqlite_backend_trims_oldest_entries(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "pairs.sqlite"), max_entries=3, trim_every=1)
+    for i in range(5):
+        backend.put(f"k{i}", float(i))
+    assert [backend.get(f"k{i}") for i in range(5)] == [None, None, 2.0, 3.0, 4.0]
+
+
+def test_backend_errors_count_as_misses():
+    class Locked(SharedCacheBackend):
+        def get(self, key):
+            raise sqlite3.OperationalError("database is locked")
+
+        def put(self, key, value):
+            raise sqlite3.OperationalError("database is locked")
+
+    cache = MatchCache(0, Locked())
+    cache.put((1, 1, 1, 1), 0.5)
+    assert cache.get((1, 1, 1, 1)) is None
+    assert cache.stats()["shared_errors"] == 2 and cache.misses == 1
+
+
+def test_version_bumps_miss_the_cache(client, headers):
+    r = client.post("/jobs/", json={"title": "t", "description": "Python SQL engineer"}, headers=headers)
+    job = r.json()
+    r = client.post("/resumes/", files={"file": ("cv.txt", b"Python and SQL engineer.")}, headers=headers)
+    resume_id = r.json()["id"]
+    client.get("/resumes/events", params={"resume_id": resume_id, "until_done": True}, headers=headers)
+    with SessionLocal() as db:
+        # Parse completion bumped the resume's version, so entries for the unparsed text are unreachable
+        assert db.get(Resume, resume_id).version == 2
+
+        job_version = db.get(Job, job["id"]).version
+
+    first = client.get(f"/matching/resume/{resume_id}/job/{job['id']}", headers=headers).json()["score"]
+    assert first > 0
+    key = (resume_id, 2, job["id"], job_version)
+    hits = pair_cache.hits
+    assert client.get(f"/matching/resume/{resume_id}/job/{job['id']}", headers=headers).json()["score"] == first
+    assert pair_cache.hits == hits + 1 and pair_cache.get(key) is not None
+
+    client.put(f"/jobs/{job['id']}", json={"title": "t", "description": "Pastry chef"}, headers=headers)
+    misses = pair_cache.misses
+    assert client.get(f"/matching/resume/{resume_id}/job/{job['id']}", headers=headers).json()["score"] == 0
+    assert pair_cache.misses == misses + 1
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, insert, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from app import migrations
+from app.database import Base
+
+
+def _engine(tmp_path, name="db.sqlite"):
+    return create_engine(f"sqlite:///{tmp_path / name}")
+
+
+def test_fresh_database_matches_models(tmp_path):
+    engine = _engine(tmp_path)
+    assert migrations.upgrade(engine) == [m.version for m in migrations.MIGRATIONS]
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        assert {c.name for c in table.columns} <= columns, table.name
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        assert {i.name for i in table.indexes} <= indexes, table.name
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.LATEST
+
+
+def test_upgrade_is_idempotent(tmp_path):
+    engine = _engine(tmp_path)
+    migrations.upgrade(engine)
+    assert migrations.upgrade(engine) == []
+
+
+def test_initial_schema_is_frozen(tmp_path):
+    # Version 1 creates the original tables, not the current models: later columns come from later migrations
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        migrations._initial_schema(conn)
+    columns = {c["name"] for c in inspect(engine).get_columns("resumes")}
+    assert "blob_sha256" in columns and "updated_at" not in columns
+
+
+def test_adopts_database_created_before_migrations(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, description TEXT NOT NULL,"
+            " skills JSON, created_at DATETIME NOT NULL)"
+        )
+        conn.exec_driver_sql("INSERT INTO jobs (title, description, created_at) VALUES ('a', 'python', '2024-01-01')")
+    migrations.upgrade(engine)
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT version, updated_at FROM jobs")).one()
+    assert row.version == 1 and str(row.updated_at).startswith("2024-01-01")
+
+
+def test_concurrently_recorded_version_is_skipped(tmp_path, monkeypatch):
+    # The loser of a race (no advisory lock off Postgres) re-applies, then collides on the version row
+    engine = _engine(tmp_path)
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(migrations.schema_migrations.delete().where(migrations.schema_migrations.c.version == migrations.LATEST))
+
+    def racing_apply(conn):
+        # Another process commits the same version while this one is applying it
+        with engine.begin() as other:
+            other.execute(
+                insert(migrations.schema_migrations).values(
+                    version=migrations.LATEST, name="other", applied_at=migrations.datetime.utcnow()
+                )
+            )
+
+    latest = migrations.MIGRATIONS[-1]
+    monkeypatch.setattr(migrations, "MIGRATIONS", [*migrations.MIGRATIONS[:-1], latest._replace(apply=racing_apply)])
+    assert migrations.upgrade(engine) == []
+
+
+def test_unrelated_integrity_error_propagates(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(migrations.schema_migrations.delete().where(migrations.schema_migrations.c.version == migrations.LATEST))
+
+    def broken_apply(conn):
+        conn.exec_driver_sql("INSERT INTO users (id, email, password_hash, created_at) VALUES (1, 'a', 'x', '2024-01-01')")
+        conn.exec_driver_sql("INSERT INTO users (id, email, password_hash, created_at) VALUES (1, 'b', 'x', '2024-01-01')")
+
+    latest = migrations.MIGRATIONS[-1]
+    monkeypatch.setattr(migrations, "MIGRATIONS", [*migrations.MIGRATIONS[:-1], latest._replace(apply=broken_apply)])
+    with pytest.raises(IntegrityError):
+        migrations.upgrade(engine)
+
+
+def test_outdated_database_refuses_to_start(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    monkeypatch.setattr(migrations.settings, "auto_migrate", False)
+    with pytest.raises(RuntimeError, match="python -m app.migrations"):
+        migrations.ensure(engine)
+    monkeypatch.setattr(migrations.settings, "auto_migrate", True)
+    migrations.ensure(engine)
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.LATEST
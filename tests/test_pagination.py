@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import uuid
+
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+def _create_jobs(client, headers, count: int) -> tuple[str, list[int]]:
+    # A token no other test's jobs contain, so the listing only sees these
+    token = f"kw{uuid.uuid4().hex[:10]}"
+    ids = []
+    for i in range(count):
+        r = client.post("/jobs/", json={"title": f"job {i}", "description": f"{token} python"}, headers=headers)
+        assert r.status_code == 200, r.text
+        ids.append(r.json()["id"])
+    return token, ids
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(None) is None and decode_cursor("") is None
+
+
+def test_pages_follow_the_cursor_newest_first(client, headers):
+    token, ids = _create_jobs(client, headers, 5)
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"q": token, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/jobs/", params=params, headers=headers)
+        assert r.status_code == 200, r.text
+        seen += [job["id"] for job in r.json()]
+        pages += 1
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert seen == sorted(ids, reverse=True)
+    assert pages == 3
+
+
+def test_cursor_is_stable_across_inserts(client, headers):
+    token, ids = _create_jobs(client, headers, 3)
+    first = client.get("/jobs/", params={"q": token, "limit": 2}, headers=headers)
+    # A job created between pages lands before the cursor and does not shift the next page
+    client.post("/jobs/", json={"title": "late", "description": f"{token} python"}, headers=headers)
+    second = client.get(
+        "/jobs/", params={"q": token, "limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]}, headers=headers
+    )
+    assert [job["id"] for job in second.json()] == [ids[0]]
+    assert NEXT_CURSOR_HEADER not in second.headers
+
+
+def test_skip_still_pages_by_offset(client, headers):
+    token, ids = _create_jobs(client, headers, 3)
+    r = client.get("/jobs/", params={"q": token, "limit": 1, "skip": 1}, headers=headers)
+    assert [job["id"] for job in r.json()] == [ids[1]]
+
+
+def test_invalid_cursor_is_rejected(client, headers):
+    assert client.get("/jobs/", params={"cursor": "not-a-cursor!"}, headers=headers).status_code == 400
+    bogus = encode_cursor(1).replace("aWQ", "eHg")  # "xx:1" instead of "id:1"
+    assert client.get("/resumes/", params={"cursor": bogus}, headers=headers).status_code == 400
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.services.resume_service import parse_docx, parse_pdf, parse_text
+
+from conftest import load_script
+
+
+corpus = load_script("synthetic_corpus")
+TEXT = "\n".join(f"line {i} python sql kubernetes" for i in range(200))
+NO_DEADLINE = float("inf")
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = {}
+    for fmt in ("txt", "docx", "pdf"):
+        path = tmp_path / f"resume.{fmt}"
+        path.write_bytes(corpus.render(TEXT, fmt))
+        paths[fmt] = str(path)
+    return paths
+
+
+def _parse(files, fmt, max_chars, max_pages=0):
+    if fmt == "pdf":
+        return parse_pdf(files[fmt], max_pages, max_chars, NO_DEADLINE)
+    if fmt == "docx":
+        return parse_docx(files[fmt], max_chars, NO_DEADLINE)
+    return parse_text(files[fmt], max_chars)
+
+
+@pytest.mark.parametrize("fmt", ["txt", "docx", "pdf"])
+def test_character_budget_truncates(files, fmt):
+    text, note = _parse(files, fmt, max_chars=100)
+    assert len(text) == 100
+    assert note == "stopped at 100 characters"
+
+
+@pytest.mark.parametrize("fmt", ["txt", "docx", "pdf"])
+def test_zero_character_budget_is_unlimited(files, fmt):
+    text, note = _parse(files, fmt, max_chars=0)
+    assert note is None
+    assert "line 199 python" in text
+
+
+def test_page_budget(files):
+    text, note = _parse(files, "pdf", max_chars=0, max_pages=1)
+    assert note == "stopped after 1 pages"
+    assert "line 0 python" in text and "line 199" not in text
+
+
+def test_expired_deadline_fails(files):
+    from app.services.resume_service import ParseError
+
+    with pytest.raises(ParseError):
+        parse_docx(files["docx"], 0, time.monotonic() - 1)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import ParseJob, Resume, User
+from app.services import event_service, parse_service
+
+
+settings = get_settings()
+
+
+@pytest.fixture
+def db(client):
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def published(monkeypatch):
+    calls = []
+
+    def record(db, resume_ids, status, detail=None):
+        calls.extend((rid, status) for rid in resume_ids)
+
+    monkeypatch.setattr(event_service, "publish_for_resumes", record)
+    return calls
+
+
+def _running_job(db, attempts: int, age: timedelta) -> ParseJob:
+    user = User(email=f"q_{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    resume = Resume(user_id=user.id, filename="r.txt", parsed=False)
+    db.add(resume)
+    db.flush()
+    job = ParseJob(resume_id=resume.id, path="r.txt", status=parse_service.RUNNING, attempts=attempts)
+    job.started_at = datetime.utcnow() - age
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_stale_job_with_attempts_left_is_requeued(db, published):
+    job = _running_job(db, attempts=1, age=timedelta(hours=1))
+    assert parse_service.requeue_stale(db) >= 1
+    db.refresh(job)
+    assert job.status == parse_service.QUEUED
+    assert (job.resume_id, event_service.QUEUED) in published
+
+
+def test_exhausted_stale_job_fails_the_resume(db, published):
+    job = _running_job(db, attempts=settings.parse_max_attempts, age=timedelta(hours=1))
+    parse_service.requeue_stale(db)
+    db.refresh(job)
+    resume = db.get(Resume, job.resume_id)
+    db.refresh(resume)
+    assert job.status == parse_service.FAILED
+    assert resume.parse_status == "failed" and resume.parse_detail == "Worker stopped while parsing"
+    assert (job.resume_id, event_service.FAILED) in published
+
+
+def test_recent_and_own_jobs_are_left_running(db, published):
+    recent = _running_job(db, attempts=1, age=timedelta(seconds=1))
+    mine = _running_job(db, attempts=1, age=timedelta(hours=1))
+    parse_service.requeue_stale(db, running=[mine.id])
+    db.refresh(recent)
+    db.refresh(mine)
+    assert recent.status == mine.status == parse_service.RUNNING
+
+
+def test_worker_checks_for_stale_jobs_while_running(monkeypatch):
+    from app.worker import ParseWorker
+
+    calls = []
+    monkeypatch.setattr(parse_service, "requeue_stale", lambda db, running=(): calls.append(list(running)))
+    worker = ParseWorker(workers=1, poll_interval=0.01)
+    worker.stale_check_interval = 0.0
+    worker._requeue_stale({})
+    worker._requeue_stale({})
+    assert len(calls) == 2
+    worker.stale_check_interval = 3600
+    worker._requeue_stale({})
+    assert len(calls) == 2
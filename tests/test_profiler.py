@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.utils import profiler as profiler_module
+from app.utils.principal_cache import Principal
+from app.utils.profiler import ProfilerMiddleware
+
+
+def _principal(email: str) -> Principal:
+    return Principal(id=1, email=email, full_name=None, created_at=None)
+
+
+def _client(monkeypatch, started: list) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/work")
+    def work():
+        return {"total": sum(range(10000))}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b"]), media_type="text/event-stream")
+
+    tokens = {"Bearer admin": _principal("Admin@Example.com"), "Bearer user": _principal("user@example.com")}
+    app.add_middleware(ProfilerMiddleware, admin_emails=["admin@example.com"], resolve_principal=tokens.get)
+    real_start = profiler_module.SamplingProfiler.start
+    monkeypatch.setattr(profiler_module.SamplingProfiler, "start", lambda self: started.append(1) or real_start(self))
+    return TestClient(app)
+
+
+def test_non_admins_are_never_profiled(monkeypatch):
+    started = []
+    client = _client(monkeypatch, started)
+    for headers in ({}, {"Authorization": "Bearer user"}, {"Authorization": "Bearer bogus"}):
+        r = client.get("/work?profile=1", headers=headers)
+        assert r.json() == {"total": 49995000}
+    assert started == []
+
+
+def test_admin_gets_folded_stacks(monkeypatch):
+    started = []
+    client = _client(monkeypatch, started)
+    r = client.get("/work?profile=1", headers={"Authorization": "Bearer admin"})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    assert r.headers["x-profile-status"] == "200"
+    assert started == [1]
+
+
+def test_streaming_responses_pass_through(monkeypatch):
+    started = []
+    client = _client(monkeypatch, started)
+    r = client.get("/stream?profile=1", headers={"Authorization": "Bearer admin"})
+    assert r.content == b"ab" and "x-profile-status" not in r.headers
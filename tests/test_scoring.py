@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import migrations
+from app.database import SessionLocal
+from app.models import MatchScore, Resume
+from app.services import feature_service, match_service, score_service
+from app.services.feature_service import term_ids, vocabulary
+from app.services.index_service import resume_index
+from conftest import load_script
+
+
+corpus = load_script("synthetic_corpus")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'scoring.db'}")
+    migrations.upgrade(engine)
+    return engine
+
+
+def test_rolled_back_term_ids_are_not_cached(engine):
+    rolled_back, reused = f"t{uuid.uuid4().hex}", f"t{uuid.uuid4().hex}"
+    with Session(engine) as db:
+        first = term_ids(db, [rolled_back])[rolled_back]
+        db.rollback()
+        assert vocabulary.get(rolled_back) is None
+        # SQLite hands the rolled-back id to the next term inserted
+        assert term_ids(db, [reused])[reused] == first
+        assert vocabulary.get(reused) is None
+        db.commit()
+    assert vocabulary.get(reused) == first
+    with Session(engine) as db:
+        assert term_ids(db, [rolled_back])[rolled_back] != first
+
+
+def _parsed_resumes(client, headers, texts) -> list:
+    ids = [client.post("/resumes/", files={"file": ("cv.txt", text)}, headers=headers).json()["id"] for text in texts]
+    client.get("/resumes/events", params={"resume_id": ids, "until_done": True}, headers=headers)
+    return ids
+
+
+def _parsed_resume(client, headers, text: bytes) -> int:
+    return _parsed_resumes(client, headers, [text])[0]
+
+
+def test_recompute_catches_the_index_up_first(client, headers, monkeypatch):
+    resume_id = _parsed_resume(client, headers, b"Python and SQL engineer.")
+    job_id = client.post("/jobs/", json={"title": "t", "description": "Python SQL engineer"}, headers=headers).json()["id"]
+    # As if the job's features were committed but this process had not indexed them yet
+    monkeypatch.setitem(feature_service._sync_state, "checked_at", time.monotonic())
+    resume_index.index_job(job_id, ({}, frozenset()))
+    with SessionLocal() as db:
+        score_service.run_task(db, score_service.ClaimedTask(0, score_service.JOB, job_id, datetime.utcnow()))
+        stored = db.scalar(select(MatchScore.score).where(MatchScore.job_id == job_id, MatchScore.resume_id == resume_id))
+    assert stored > 0
+
+
+def test_resume_deleted_elsewhere_does_not_take_a_top_k_slot(client, headers):
+    kept = _parsed_resume(client, headers, b"Python developer.")
+    gone = _parsed_resume(client, headers, b"Python SQL engineer with Kubernetes.")
+    job_id = client.post(
+        "/jobs/", json={"title": "t", "description": "Python SQL engineer, Kubernetes"}, headers=headers
+    ).json()["id"]
+    with SessionLocal() as db:
+        user_id = db.get(Resume, kept).user_id
+        # Deleted by another process: this process's index still holds it
+        db.delete(db.get(Resume, gone))
+        db.commit()
+        ranked = match_service.top_resumes_for_job(db, job_id, user_id, 1)
+    assert [(resume.id, score > 0) for resume, score in ranked] == [(kept, True)]
+    assert gone not in resume_index.locate([gone])[2]
+
+
+def _wait_for_scores(job_id: int, user_id: int) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        with SessionLocal() as db:
+            if not score_service.scores_pending(db, job_id, Resume.user_id == user_id):
+                return
+        time.sleep(0.1)
+    raise AssertionError("scores were not materialized")
+
+
+def test_rankings_agree_with_pairwise_scores(client, headers):
+    generator = corpus.CorpusGenerator(seed=11)
+    ids = _parsed_resumes(client, headers, [text.encode() for text, _ in generator.resumes(12, words=150)])
+    job = generator.job()
+    job_id = client.post("/jobs/", json={"title": job.title, "description": job.description, "skills": job.skills}, headers=headers).json()["id"]
+    # A deleted resume and one that never parsed have no features and score 0
+    gone = ids.pop()
+    client.delete(f"/resumes/{gone}", headers=headers)
+    with SessionLocal() as db:
+        user_id = db.get(Resume, ids[0]).user_id
+        unparsed = Resume(user_id=user_id, filename="pending.txt", parsed=False)
+        db.add(unparsed)
+        db.commit()
+        pairwise = {rid: float(match_service.score_many(db, [rid], [job_id])[0, 0]) for rid in ids}
+        assert match_service.score_many(db, [gone, unparsed.id], [job_id]).tolist() == [[0.0], [0.0]]
+        batch = match_service.score_many(db, ids, [job_id])[:, 0]
+        assert batch == pytest.approx([pairwise[rid] for rid in ids])
+
+        k = 5
+        expected = sorted((rid for rid in ids if pairwise[rid] > 0), key=lambda rid: (-pairwise[rid], rid))[:k]
+        live = match_service.top_resumes_for_job(db, job_id, user_id, k)
+        assert [resume.id for resume, _ in live] == expected
+        assert [score for _, score in live] == pytest.approx([pairwise[rid] for rid in expected])
+
+    _wait_for_scores(job_id, user_id)
+    with SessionLocal() as db:
+        materialized = score_service.top_from_scores(db, job_id, user_id, k)
+    assert [resume.id for resume, _ in materialized] == expected
+    assert [score for _, score in materialized] == pytest.approx([pairwise[rid] for rid in expected])
+    top = client.get(f"/matching/job/{job_id}/top", params={"k": k}, headers=headers).json()
+    assert [row["resume_id"] for row in top] == expected
+    assert [row["score"] for row in top] == [round(pairwise[rid] * 100, 2) for rid in expected]
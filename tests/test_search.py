@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import migrations
+from app.models import Job, JobSkill, Resume, User
+from app.services import search_service
+from app.services.search_service import SearchFilters, filter_jobs, filter_resumes, replace_skills
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    migrations.upgrade(engine)
+    with Session(engine) as session:
+        session.add(User(id=1, email="a@example.com", password_hash="x"))
+        session.commit()
+        yield session
+
+
+def _filters(q=None, skills=(), mode="any") -> SearchFilters:
+    return SearchFilters(sorted(skills), mode, q, None, None)
+
+
+def _jobs(db, **kwargs) -> list:
+    return sorted(db.scalars(filter_jobs(db, select(Job.id), _filters(**kwargs))).all())
+
+
+def _resumes(db, **kwargs) -> list:
+    return sorted(db.scalars(filter_resumes(db, select(Resume.id), _filters(**kwargs))).all())
+
+
+def test_job_search_follows_updates_and_deletes(db):
+    db.add_all([Job(id=1, title="Backend engineer", description="Python and SQL"), Job(id=2, title="Chef", description="Pastry")])
+    db.commit()
+    assert _jobs(db, q="python") == [1]
+    assert _jobs(db, q="backend sql") == [1] and _jobs(db, q="backend pastry") == []
+
+    job = db.get(Job, 1)
+    job.description = "Rust and Kafka"
+    db.commit()
+    assert _jobs(db, q="python") == [] and _jobs(db, q="kafka") == [1]
+    # The title is indexed too, and survives a description-only edit
+    assert _jobs(db, q="backend") == [1]
+
+    db.delete(job)
+    db.commit()
+    assert _jobs(db, q="kafka") == [] and _jobs(db, q="backend") == []
+    assert _jobs(db, q="pastry") == [2]
+
+
+def test_resume_search_follows_parsed_text_and_deletes(db):
+    db.add(Resume(id=1, user_id=1, filename="a.txt"))
+    db.add(Resume(id=2, user_id=1, filename="b.txt", content_text="Kubernetes operator"))
+    db.commit()
+    assert _resumes(db, q="kubernetes") == [2]
+    # Parsing fills content_text after the row was inserted
+    db.get(Resume, 1).content_text = "Kubernetes and Terraform"
+    db.commit()
+    assert _resumes(db, q="kubernetes") == [1, 2] and _resumes(db, q="terraform") == [1]
+    db.delete(db.get(Resume, 2))
+    db.commit()
+    assert _resumes(db, q="kubernetes") == [1]
+
+
+@pytest.mark.parametrize("q", ['foo" OR *', "python OR NOT sql", 'NEAR(python sql)', '"', "*", "sql:python", "-python"])
+def test_fts_operators_in_user_input_are_inert(db, q):
+    db.add_all([Job(id=1, title="t", description="Python and SQL"), Job(id=2, title="t", description="foo")])
+    db.commit()
+    found = _jobs(db, q=q)
+    # Never a syntax error, and every remaining keyword is required literally
+    words = [w.rstrip("*") for w in search_service._FTS_TOKEN.findall(q) if w.rstrip("*")]
+    if not words:
+        expected = [1, 2]
+    else:
+        expected = [1] if {w.lower() for w in words} <= {"python", "sql"} else []
+    assert found == expected
+
+
+def test_fts_match_quotes_terms_and_keeps_prefixes():
+    assert search_service._fts_match('foo" OR *') == '"foo" AND "OR"'
+    assert search_service._fts_match("pyth* sql") == '"pyth"* AND "sql"'
+    assert search_service._fts_match('" *') is None
+
+
+def test_prefix_search(db):
+    db.add(Job(id=1, title="t", description="PostgreSQL tuning"))
+    db.commit()
+    assert _jobs(db, q="postgre*") == [1] and _jobs(db, q="postgre") == []
+
+
+@pytest.mark.parametrize("rare_rows", [search_service.RARE_SKILL_ROWS, 1])
+def test_skill_modes_agree_across_rare_and_common_plans(db, monkeypatch, rare_rows):
+    # rare_rows=1 makes every skill "common", so the per-row EXISTS plan is used instead of collecting owners
+    monkeypatch.setattr(search_service, "RARE_SKILL_ROWS", rare_rows)
+    skills = {1: ["python", "sql"], 2: ["python"], 3: ["sql", "rust"], 4: []}
+    for job_id, job_skills in skills.items():
+        db.add(Job(id=job_id, title="t", description="d"))
+        db.flush()
+        replace_skills(db, JobSkill, job_id, job_skills)
+    db.commit()
+    assert _jobs(db, skills=["python"]) == [1, 2]
+    assert _jobs(db, skills=["python", "rust"]) == [1, 2, 3]
+    assert _jobs(db, skills=["python", "sql"], mode="all") == [1]
+    assert _jobs(db, skills=["rust", "sql"], mode="all") == [3]
+    assert _jobs(db, skills=["go"], mode="all") == []
+    assert _jobs(db, skills=["python"], q="d") == [1, 2]
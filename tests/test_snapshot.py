@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import migrations
+from app.models import Resume, ResumeFeatures, User
+from app.services import snapshot_service
+from app.services.feature_service import pack_ids
+
+
+STAMP = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_service.settings, "corpus_snapshot", True)
+    monkeypatch.setattr(snapshot_service.settings, "storage_dir", str(tmp_path / "storage"))
+    engine = create_engine(f"sqlite:///{tmp_path / 'snapshot.db'}")
+    migrations.upgrade(engine)
+    with Session(engine) as session:
+        session.add(User(id=1, email="a@example.com", password_hash="x"))
+        session.add(User(id=2, email="b@example.com", password_hash="x"))
+        session.commit()
+        yield session
+
+
+def _add(db, resume_id, user_id, terms, skills=(), at=STAMP):
+    db.add(Resume(id=resume_id, user_id=user_id, filename=f"{resume_id}.txt"))
+    db.flush()
+    db.add(
+        ResumeFeatures(
+            resume_id=resume_id,
+            term_ids=pack_ids(sorted(terms)),
+            term_counts=pack_ids(terms[t] for t in sorted(terms)),
+            skills=list(skills),
+            updated_at=at,
+        )
+    )
+    db.commit()
+
+
+def test_round_trip(db):
+    _add(db, 1, 2, {3: 2, 7: 1}, ["python"])
+    _add(db, 2, 1, {7: 4}, ["sql", "python"])
+    _add(db, 3, 1, {}, [], at=STAMP - timedelta(hours=1))
+    snapshot = snapshot_service.build(db)
+    assert snapshot.generation == 1 and snapshot.rows == 3
+    assert snapshot.watermark == STAMP and snapshot.watermark_rows == 2
+    # Rows are grouped by owner, then id
+    assert list(snapshot.locate([2, 3, 1])) == [0, 1, 2]
+    assert snapshot.user_rows(1) == (0, 2) and snapshot.user_rows(2) == (2, 3)
+    ids, counts = snapshot.terms(snapshot.row(1))
+    assert list(ids) == [3, 7] and list(counts) == [2, 1]
+    assert list(snapshot.term_sizes(0, 3)) == [1, 0, 2]
+    assert list(snapshot.term_hits(0, 3, [7])) == [1, 0, 1]
+    python = snapshot.skill_columns["python"]
+    assert list(snapshot.skill_hits(0, 3, [python])) == [1, 0, 1]
+    assert snapshot_service.build(db).generation == 2
+
+
+def test_other_database_is_ignored(db, monkeypatch):
+    _add(db, 1, 1, {1: 1})
+    snapshot_service.build(db)
+    monkeypatch.setattr(snapshot_service.settings, "database_url", "sqlite:///elsewhere.db")
+    assert snapshot_service.open_snapshot() is None
+
+
+def test_pending_counts_a_write_at_the_watermark(db):
+    _add(db, 1, 1, {1: 1})
+    snapshot = snapshot_service.build(db)
+    assert snapshot_service.pending(db, snapshot) == 0
+    # Written after the build within the same clock tick as the newest row it holds
+    _add(db, 2, 1, {2: 1})
+    assert snapshot_service.pending(db, snapshot) == 1
+    assert snapshot_service.pending(db, snapshot_service.build(db)) == 0
+
+
+def test_pending_counts_rewrites_and_deletes(db):
+    _add(db, 1, 1, {1: 1})
+    _add(db, 2, 1, {2: 1})
+    snapshot = snapshot_service.build(db)
+    db.get(ResumeFeatures, 1).updated_at = STAMP + timedelta(seconds=1)
+    db.commit()
+    # Its old row in the snapshot is stale and its new one is missing
+    assert snapshot_service.pending(db, snapshot) == 2
+    db.delete(db.get(Resume, 2))
+    db.commit()
+    assert snapshot_service.pending(db, snapshot) == 3
+
+
+def test_pending_without_snapshot_counts_everything(db):
+    _add(db, 1, 1, {1: 1})
+    assert snapshot_service.pending(db, None) == 1
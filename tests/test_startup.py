@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import os
+
+from conftest import load_script
+
+
+bench_startup = load_script("bench_startup")
+
+
+def test_cold_start_within_budget():
+    # Budgets can be tightened or relaxed per runner without editing the script
+    import_budget = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", bench_startup.IMPORT_BUDGET_MS))
+    ready_budget = float(os.getenv("STARTUP_READY_BUDGET_MS", bench_startup.READY_BUDGET_MS))
+    report = bench_startup.run(runs=3, top=10)
+    assert not bench_startup.budget_failures(report, import_budget, ready_budget), report
+
+
+def test_budget_failures_reports_each_breach():
+    report = {"eagerly_imported_lazy_modules": ["scipy"], "import_app_main_ms": 900.0, "time_to_first_response_ms": 1200.0}
+    failures = bench_startup.budget_failures(report, 800, 1000)
+    assert len(failures) == 3
+    assert bench_startup.budget_failures(dict(report, eagerly_imported_lazy_modules=[]), 0, 0) == []
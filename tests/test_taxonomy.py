@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from app.taxonomy import SkillRegistry, load_taxonomy
+
+
+def _write(path, data, mtime: float) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+    os.utime(path, (mtime, mtime))
+
+
+def test_synonyms_map_to_canonical_names(tmp_path):
+    path = tmp_path / "skills.json"
+    _write(path, {"kubernetes": ["k8s"], "machine learning": ["ml"]}, 1_000_000)
+    matcher = SkillRegistry(str(path), check_interval=0).matcher()
+    assert matcher.extract("Ran K8s clusters and shipped ML models.") == ["kubernetes", "machine learning"]
+    assert matcher.canonical("K8S") == "kubernetes"
+    assert matcher.canonical("Rust") == "rust"
+
+
+def test_changed_file_is_picked_up(tmp_path):
+    path = tmp_path / "skills.json"
+    _write(path, {"python": []}, 1_000_000)
+    registry = SkillRegistry(str(path), check_interval=1e-9)
+    assert registry.matcher().extract("python and go") == ["python"]
+    _write(path, {"python": [], "go": ["golang"]}, 1_000_100)
+    assert registry.matcher().extract("python and golang") == ["go", "python"]
+
+
+def test_malformed_file_keeps_current_matcher(tmp_path, caplog):
+    path = tmp_path / "skills.json"
+    _write(path, {"python": []}, 1_000_000)
+    registry = SkillRegistry(str(path), check_interval=1e-9)
+    before = registry.matcher()
+    _write(path, "{bad", 1_000_100)
+    assert registry.matcher() is before
+    assert registry.matcher().extract("python") == ["python"]
+    assert sum("reload" in r.message for r in caplog.records) == 1
+    # A later fix is loaded once the file changes again
+    _write(path, {"python": [], "go": []}, 1_000_200)
+    assert registry.matcher().extract("python go") == ["go", "python"]
+
+
+def test_reload_endpoint_is_admin_only(client, headers, admin_headers):
+    assert client.get("/skills/", headers=headers).status_code == 200
+    assert client.post("/skills/reload", headers=headers).status_code == 403
+    r = client.post("/skills/reload", headers=admin_headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["skills"] > 0
+
+
+def test_string_synonym_is_one_term(tmp_path):
+    path = tmp_path / "skills.json"
+    _write(path, {"kubernetes": "k8s", "python": None}, 1_000_000)
+    assert load_taxonomy(str(path)) == {"kubernetes": ["k8s"], "python": []}
+    matcher = SkillRegistry(str(path), check_interval=0).matcher()
+    assert matcher.extract("It's a Java developer's resume with 8 years") == []
+    assert matcher.extract("Runs k8s") == ["kubernetes"]
+
+
+def test_other_synonym_values_are_rejected(tmp_path):
+    path = tmp_path / "skills.json"
+    _write(path, {"kubernetes": {"k8s": 1}}, 1_000_000)
+    with pytest.raises(ValueError):
+        load_taxonomy(str(path))
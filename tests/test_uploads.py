@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app.routers import uploads
+from app.services import upload_service
+
+
+BODY = b"Resumable upload: Python, SQL and Kubernetes. " * 40
+
+
+def _patch(client, headers, upload_id, offset, data):
+    return client.patch(
+        f"/resumes/uploads/{upload_id}",
+        content=data,
+        headers={**headers, "Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"},
+    )
+
+
+def test_resumable_upload_in_chunks(client, headers):
+    r = client.post("/resumes/uploads", json={"filename": "cv.txt", "size": len(BODY)}, headers=headers)
+    assert r.status_code == 201, r.text
+    upload_id = r.json()["upload_id"]
+    half = len(BODY) // 2
+    r = _patch(client, headers, upload_id, 0, BODY[:half])
+    assert r.status_code == 200 and r.json()["offset"] == half and r.json()["resume"] is None
+    # A chunk sent at a stale offset is refused with the server's offset
+    r = _patch(client, headers, upload_id, 0, BODY[:half])
+    assert r.status_code == 409 and r.headers["Upload-Offset"] == str(half)
+    assert client.head(f"/resumes/uploads/{upload_id}", headers=headers).headers["Upload-Offset"] == str(half)
+    r = _patch(client, headers, upload_id, half, BODY[half:])
+    assert r.status_code == 200, r.text
+    assert r.json()["resume"]["id"]
+    assert not os.path.exists(upload_service.partial_path(upload_id))
+    assert client.get(f"/resumes/uploads/{upload_id}", headers=headers).status_code == 404
+
+
+def test_failed_registration_can_be_retried(client, headers, monkeypatch):
+    r = client.post("/resumes/uploads", json={"filename": "retry.txt", "size": len(BODY)}, headers=headers)
+    upload_id = r.json()["upload_id"]
+    real_register = uploads.register_resume
+
+    def failing_register(db, user_id, stored):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(uploads, "register_resume", failing_register)
+    with pytest.raises(RuntimeError):
+        _patch(client, headers, upload_id, 0, BODY)
+    # The upload is still complete and its bytes are kept for the retry
+    assert os.path.getsize(upload_service.partial_path(upload_id)) == len(BODY)
+    monkeypatch.setattr(uploads, "register_resume", real_register)
+    r = _patch(client, headers, upload_id, len(BODY), b"")
+    assert r.status_code == 200, r.text
+    assert r.json()["resume"]["id"]
+    assert not os.path.exists(upload_service.partial_path(upload_id))